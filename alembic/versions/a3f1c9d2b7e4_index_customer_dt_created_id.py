@@ -0,0 +1,22 @@
+"""index customer dt_created id
+
+Revision ID: a3f1c9d2b7e4
+Revises: 883aada49f94
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3f1c9d2b7e4"
+down_revision = "883aada49f94"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_customer_dt_created_id", "customer", ["dt_created", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_customer_dt_created_id", table_name="customer")
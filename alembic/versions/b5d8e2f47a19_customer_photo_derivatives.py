@@ -0,0 +1,23 @@
+"""customer photo derivatives
+
+Revision ID: b5d8e2f47a19
+Revises: f1a9c6e03b72
+Create Date: 2026-10-18 16:21:09.402817
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b5d8e2f47a19"
+down_revision = "f1a9c6e03b72"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("customer", sa.Column("photo_derivatives", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("customer", "photo_derivatives")
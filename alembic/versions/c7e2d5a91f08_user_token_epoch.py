@@ -0,0 +1,23 @@
+"""user token epoch
+
+Revision ID: c7e2d5a91f08
+Revises: a3f1c9d2b7e4
+Create Date: 2026-10-18 12:05:44.530921
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c7e2d5a91f08"
+down_revision = "a3f1c9d2b7e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("user", sa.Column("token_epoch", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade():
+    op.drop_column("user", "token_epoch")
@@ -0,0 +1,23 @@
+"""customer photo status
+
+Revision ID: d3a7c1e95b40
+Revises: b5d8e2f47a19
+Create Date: 2026-10-18 17:48:52.163044
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d3a7c1e95b40"
+down_revision = "b5d8e2f47a19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("customer", sa.Column("photo_status", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("customer", "photo_status")
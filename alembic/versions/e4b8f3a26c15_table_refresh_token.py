@@ -0,0 +1,40 @@
+"""table refresh token
+
+Revision ID: e4b8f3a26c15
+Revises: c7e2d5a91f08
+Create Date: 2026-10-18 13:21:09.774310
+
+"""
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e4b8f3a26c15"
+down_revision = "c7e2d5a91f08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "refresh_token",
+        sa.Column("id", sqlalchemy_utils.types.uuid.UUIDType(), nullable=False),
+        sa.Column("family_id", sqlalchemy_utils.types.uuid.UUIDType(), nullable=False),
+        sa.Column("user_id", sqlalchemy_utils.types.uuid.UUIDType(), nullable=False),
+        sa.Column("token_hash", sa.String(length=64), nullable=False),
+        sa.Column("dt_created", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("dt_expires", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("dt_used", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("dt_revoked", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(op.f("ix_refresh_token_family_id"), "refresh_token", ["family_id"])
+    op.create_index(op.f("ix_refresh_token_user_id"), "refresh_token", ["user_id"])
+
+
+def downgrade():
+    op.drop_index(op.f("ix_refresh_token_user_id"), table_name="refresh_token")
+    op.drop_index(op.f("ix_refresh_token_family_id"), table_name="refresh_token")
+    op.drop_table("refresh_token")
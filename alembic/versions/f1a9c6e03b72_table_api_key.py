@@ -0,0 +1,39 @@
+"""table api key
+
+Revision ID: f1a9c6e03b72
+Revises: e4b8f3a26c15
+Create Date: 2026-10-18 14:02:37.118264
+
+"""
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f1a9c6e03b72"
+down_revision = "e4b8f3a26c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "api_key",
+        sa.Column("id", sqlalchemy_utils.types.uuid.UUIDType(), nullable=False),
+        sa.Column("user_id", sqlalchemy_utils.types.uuid.UUIDType(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("prefix", sa.String(length=16), nullable=False),
+        sa.Column("key_hash", sa.String(length=64), nullable=False),
+        sa.Column("dt_created", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("dt_revoked", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index(op.f("ix_api_key_prefix"), "api_key", ["prefix"], unique=True)
+    op.create_index(op.f("ix_api_key_user_id"), "api_key", ["user_id"])
+
+
+def downgrade():
+    op.drop_index(op.f("ix_api_key_user_id"), table_name="api_key")
+    op.drop_index(op.f("ix_api_key_prefix"), table_name="api_key")
+    op.drop_table("api_key")
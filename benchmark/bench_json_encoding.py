@@ -0,0 +1,79 @@
+"""
+Encoding cost of a page of customers, with the json module (FAST_JSON=false) and with orjson (FAST_JSON=true).
+The page is built from ORM-like rows, as GET /customers does.
+
+Usage: PYTHONPATH=src python benchmark/bench_json_encoding.py
+"""
+import timeit
+from datetime import datetime
+from datetime import timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi_pagination import Page
+
+import settings
+from customer.domain.customer import Customer
+from json_encoding import encode
+
+REPEAT = 5
+NUMBER = 200
+
+
+def _rows(
+        size: int,
+) -> list:
+    return [
+        SimpleNamespace(
+            id=f"customer_{i}",
+            name="name",
+            surname="surname",
+            photo_url=f"https://bucket.s3.eu-west-1.amazonaws.com/customer/customer_{i}/photo.png",
+            photo_derivatives=dict(
+                thumbnail=f"https://bucket.s3.eu-west-1.amazonaws.com/customer/customer_{i}/photo_thumbnail.webp",
+                small=f"https://bucket.s3.eu-west-1.amazonaws.com/customer/customer_{i}/photo_small.webp",
+            ),
+            photo_status=None,
+            dt_created=datetime.now(timezone.utc),
+            dt_updated=datetime.utcnow(),
+            dt_deleted=None,
+            created_by_id=uuid4(),
+            updated_by_id=uuid4(),
+        )
+        for i in range(size)
+    ]
+
+
+def _page(
+        rows: list,
+) -> Page[Customer]:
+    items = [Customer.from_orm(row) for row in rows]
+    return Page[Customer](items=items, total=len(items), page=1, size=len(items))
+
+
+def _measure(
+        function,
+) -> float:
+    # best of the repeats, in microseconds per call
+    return min(timeit.repeat(function, repeat=REPEAT, number=NUMBER)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f"{'size':>5} {'step':<18} {'json (us)':>10} {'orjson (us)':>12} {'speedup':>8}")
+    for size in (50, 100):
+        rows = _rows(size)
+        page = _page(rows)
+        results = dict()
+        for fast_json in (False, True):
+            settings.FAST_JSON = fast_json
+            results[fast_json] = (
+                _measure(lambda: encode(page)),
+                _measure(lambda: encode(_page(rows))),
+            )
+        for i, step in enumerate(("encode", "build and encode")):
+            before, after = results[False][i], results[True][i]
+            print(f"{size:>5} {step:<18} {before:>10.1f} {after:>12.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
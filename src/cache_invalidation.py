@@ -0,0 +1,209 @@
+import json
+import logging
+import select
+import threading
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import event
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+# the payload of a notification is limited to 8000 bytes, more IDs invalidate the whole table
+MAX_PAYLOAD_SIZE = 7000
+
+_PENDING = "cache_invalidation_pending"
+
+# handler(table, IDs): the IDs are None for all the rows, and the table is None for all the tables
+Handler = Callable[[Optional[str], Optional[List[str]]], None]
+
+
+def notify(
+        db_session: Session,
+        table: str,
+        *ids: str,
+) -> None:
+    """
+    Notify the workers that rows of a table change, when the transaction of the session is committed.
+    Nothing is sent if it is rolled back.
+
+    :param db_session: session of the database
+    :param table: table
+    :param ids: IDs of the rows, none for all of them
+    """
+    if not settings.CACHE_INVALIDATION_ENABLED:
+        return
+
+    payload = json.dumps(dict(table=table, ids=list(ids) or None), default=str)
+    if len(payload) > MAX_PAYLOAD_SIZE:
+        payload = json.dumps(dict(table=table, ids=None))
+    db_session.info.setdefault(_PENDING, []).append(payload)
+
+
+@event.listens_for(Session, "before_commit")
+def _send_pending(
+        session: Session,
+) -> None:
+    # pg_notify is transactional, the listeners get it after the commit
+    for payload in session.info.pop(_PENDING, []):
+        session.execute(text("SELECT pg_notify(:channel, :payload)"), dict(channel=CHANNEL, payload=payload))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(
+        session: Session,
+        previous_transaction: object,
+) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class CacheInvalidationListener:
+    """
+    Background thread of a worker that listens to the notifications of the other workers and invalidates its caches.
+
+    It has its own connection out of the pool. The notifications sent while it is disconnected are lost, so after a
+    reconnection every cache is invalidated.
+    """
+
+    def __init__(
+            self,
+            database_url: Optional[str],
+            poll_seconds: float,
+            reconnect_seconds: float,
+    ) -> None:
+        self.database_url = database_url
+        self.poll_seconds = poll_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self.handlers: List[Handler] = []
+        self.lock = threading.Lock()
+        self.counters = dict(received=0, invalid=0, reconnects=0)
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(
+            self,
+            handler: Handler,
+    ) -> None:
+        """
+        Add a handler called with every notification.
+
+        :param handler: handler
+        """
+        self.handlers.append(handler)
+
+    def _dispatch(
+            self,
+            table: Optional[str],
+            ids: Optional[List[str]],
+    ) -> None:
+        for handler in self.handlers:
+            try:
+                handler(table, ids)
+            except Exception:
+                logger.exception(f"Cache invalidation handler of \"{table}\" failed.")
+
+    def handle(
+            self,
+            payload: str,
+    ) -> None:
+        """
+        Invalidate the caches from the payload of a notification.
+
+        :param payload: payload sent by notify
+        """
+        try:
+            notification = json.loads(payload)
+            table, ids = notification["table"], notification["ids"]
+        except (TypeError, ValueError, KeyError):
+            logger.exception(f"Cache invalidation payload not valid: {payload}")
+            with self.lock:
+                self.counters["invalid"] += 1
+            return
+
+        with self.lock:
+            self.counters["received"] += 1
+        self._dispatch(table=table, ids=ids)
+
+    def _connect(self):
+        url = make_url(self.database_url)
+        # the same arguments as the engine, with the query of the URL: host of a unix socket, sslmode...
+        _, connect_args = url.get_dialect()().create_connect_args(url)
+        connection = psycopg2.connect(**connect_args)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _listen(self) -> None:
+        connection = self._connect()
+        self.connected = True
+        try:
+            while not self._stop.is_set():
+                if select.select([connection], [], [], self.poll_seconds) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.handle(connection.notifies.pop(0).payload)
+        finally:
+            self.connected = False
+            connection.close()
+
+    def _run(self) -> None:
+        first = True
+        while not self._stop.is_set():
+            if not first:
+                with self.lock:
+                    self.counters["reconnects"] += 1
+                # the notifications sent meanwhile are lost
+                self._dispatch(table=None, ids=None)
+            first = False
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected.")
+                self._stop.wait(self.reconnect_seconds)
+
+    def start(self) -> None:
+        """
+        Start the background thread that listens to the notifications.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(**self.counters, connected=self.connected)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+cache_invalidation_listener = CacheInvalidationListener(
+    database_url=settings.DATABASE_URL,
+    poll_seconds=settings.CACHE_INVALIDATION_POLL_SECONDS,
+    reconnect_seconds=settings.CACHE_INVALIDATION_RECONNECT_SECONDS,
+)
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import settings
+from cache_invalidation import cache_invalidation_listener
+from customer.domain.customer import Customer
+from single_flight import SingleFlight
+
+
+class _Entry(NamedTuple):
+    # None for a customer that does not exist
+    customer: Optional[Customer]
+    expires_at: float
+
+
+class CustomerCache:
+    """
+    In-process LRU cache of customers by ID, with a TTL. The customers that do not exist are cached too, with their
+    own TTL, so repeated lookups of unknown IDs do not reach the database.
+
+    The generation is increased on every invalidation. A value read from the database is only stored if no
+    invalidation happened meanwhile, so a slow read never stores a customer older than a concurrent write.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            ttl_seconds: float,
+            negative_ttl_seconds: float,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.lock = threading.Lock()
+        # least recently used first
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.generation = 0
+        self.counters = dict(hits=0, negative_hits=0, misses=0, evictions=0, invalidations=0)
+
+    def get(
+            self,
+            customer_id: str,
+    ) -> Tuple[bool, Optional[Customer], int]:
+        """
+        Get a customer.
+
+        :param customer_id: customer's ID
+        :return: if it was found, the customer or None if it does not exist, and the generation to put it back
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(customer_id)
+            if entry is None or entry.expires_at <= now:
+                self.counters["misses"] += 1
+                return False, None, self.generation
+            self.entries.move_to_end(customer_id)
+            self.counters["hits" if entry.customer is not None else "negative_hits"] += 1
+            # a copy, the callers can not change the cached one
+            return True, entry.customer and entry.customer.copy(deep=True), self.generation
+
+    def put(
+            self,
+            customer_id: str,
+            customer: Optional[Customer],
+            generation: int,
+    ) -> None:
+        """
+        Store a customer read from the database.
+
+        :param customer_id: customer's ID
+        :param customer: customer, None if it does not exist
+        :param generation: generation returned by get before reading it
+        """
+        ttl_seconds = self.ttl_seconds if customer is not None else self.negative_ttl_seconds
+        with self.lock:
+            # disabled with size 0
+            if generation != self.generation or self.max_size <= 0:
+                return
+            self.entries[customer_id] = _Entry(customer=customer, expires_at=time.monotonic() + ttl_seconds)
+            self.entries.move_to_end(customer_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(
+            self,
+            *customer_ids: str,
+    ) -> None:
+        """
+        Drop customers, the next lookup reads them again.
+
+        :param customer_ids: customers' IDs
+        """
+        with self.lock:
+            self.generation += 1
+            self.counters["invalidations"] += 1
+            for customer_id in customer_ids:
+                self.entries.pop(customer_id, None)
+
+    def invalidate_all(self) -> None:
+        with self.lock:
+            self.generation += 1
+            self.counters["invalidations"] += 1
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        Return the counters and the size of the cache.
+
+        :return: stats
+        """
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["negative_hits"] + self.counters["misses"]
+            hits = self.counters["hits"] + self.counters["negative_hits"]
+            return dict(
+                **self.counters,
+                size=len(self.entries),
+                max_size=self.max_size,
+                hit_ratio=hits / lookups if lookups else 0.0,
+            )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+customer_cache = CustomerCache(
+    max_size=settings.CUSTOMER_CACHE_SIZE,
+    ttl_seconds=settings.CUSTOMER_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+# concurrent lookups by ID of the customers that are not in the cache
+customer_single_flight = SingleFlight()
+
+
+def _on_invalidation(
+        table: Optional[str],
+        ids: Optional[List[str]],
+) -> None:
+    # notification of a write of another worker
+    if table not in (None, "customer"):
+        return
+    if ids is None:
+        customer_cache.invalidate_all()
+    else:
+        customer_cache.invalidate(*ids)
+
+
+cache_invalidation_listener.subscribe(_on_invalidation)
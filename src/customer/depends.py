@@ -1,15 +1,24 @@
 import logging
+from datetime import datetime
 from http import HTTPStatus
+from typing import Optional
+from typing import Tuple
 
 from fastapi import Depends
 from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import messages
+from customer.domain.async_customer_repository import AsyncCustomerRepository
 from customer.domain.customer import Customer
 from customer.domain.customer_repository import CustomerRepository
+from database import get_async_db
 from database import get_db
+from depends import get_async_customer_repository
 from depends import get_customer_repository
+from pagination import CursorParams
+from pagination import decode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +31,7 @@ def get_customer_by_id(
 ) -> Customer:
     """
     Get customer by customer_id.
+    It is read from the primary, the customer cache stores the misses and a replica could return a previous version.
 
     :param db_session: session of the database
     :param customer_repository: customer repository
@@ -36,3 +46,54 @@ def get_customer_by_id(
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
 
     return customer_db
+
+
+async def get_customer_by_id_async(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        customer_id: str,
+) -> Customer:
+    """
+    Get customer by customer_id, for the async def views.
+
+    :param db_session: session of the database
+    :param customer_repository: customer repository
+    :param customer_id: customer's ID
+    :raise: HTTPException if customer not exists
+    :return: user
+    """
+    customer_db = await customer_repository.get_by_id(db_session=db_session, customer_id=customer_id)
+
+    if customer_db is None:
+        logger.exception(f"{messages.CUSTOMER_NOT_FOUND} - ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
+
+    return customer_db
+
+
+def get_customer_keyset(
+        params: CursorParams = Depends(),
+) -> Optional[Tuple[datetime, str]]:
+    """
+    Get the keyset (dt_created, id) of the last customer of the previous page from the cursor.
+
+    :param params: cursor params
+    :raise: HTTPException if the cursor is not valid
+    :return: keyset, None for the first page
+    """
+    after = decode_cursor(params.cursor)
+    if after is None:
+        return None
+
+    try:
+        dt_created, customer_id = after
+        dt_created = datetime.fromisoformat(dt_created)
+    except (TypeError, ValueError) as e:
+        logger.exception(str(e))
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CURSOR_NOT_VALID)
+    # compared with the ID column, another type is an error of the database
+    if not isinstance(customer_id, str):
+        logger.exception(f"{messages.CURSOR_NOT_VALID} - customer ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CURSOR_NOT_VALID)
+    return dt_created, customer_id
@@ -0,0 +1,150 @@
+from abc import ABC
+from abc import abstractmethod
+from datetime import datetime
+from typing import AsyncIterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerUpdate
+from user.domain.user import User
+
+
+class AsyncCustomerRepository(ABC):
+    """
+    Async version of CustomerRepository, for the async def views.
+    """
+
+    @classmethod
+    @abstractmethod
+    async def count(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = False,
+    ) -> int:
+        """
+        Count the number of element in the customer table.
+        With the filter only_actives you can count only customers actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :return: number of customers
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def create(
+            cls,
+            db_session: AsyncSession,
+            customer: CustomerCreate,
+            current_user: User,
+    ) -> Optional[Customer]:
+        """
+        Persist a new Customer with a single statement.
+
+        :param db_session: session of the database
+        :param customer: Customer to persist
+        :param current_user: current user
+        :return: customer if the record was created, None if the customer ID already exists
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def update(
+            cls,
+            db_session: AsyncSession,
+            customer_id: str,
+            new_info: CustomerUpdate,
+            current_user: User,
+    ) -> bool:
+        """
+        Update the info of a customer with a single statement.
+
+        :param db_session: session of the database
+        :param customer_id: customer's ID
+        :param new_info: new info
+        :param current_user: current user
+        :return: True if the customer was updated, False if it does not exist
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def get_by_id(
+            cls,
+            db_session: AsyncSession,
+            customer_id: str,
+    ) -> Optional[Customer]:
+        """
+        Searches for a persisted customer by ID and returns it if it exists.
+
+        :param db_session: session of the database
+        :param customer_id: customer's ID
+        :return: customer if found, None otherwise
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def get_list(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+    ) -> List[Customer]:
+        """
+        Searches for a persisted customers.
+        With the filter only_actives you can search only users actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :return: users
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def iter_all(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> AsyncIterator[Customer]:
+        """
+        Iterate over all persisted customers sorted by (dt_created, id).
+        The rows are fetched in batches from a server side cursor, so the memory is flat whatever the table size.
+        With the filter only_actives you can iterate only customers actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :param batch_size: number of rows fetched from the cursor each time
+        :return: customers
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def get_list_keyset(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        """
+        Searches for a page of persisted customers sorted by (dt_created, id).
+        The page starts right after the keyset "after", so every page costs the same as the first one.
+        With the filter only_actives you can search only customers actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :param size: max number of customers
+        :param after: (dt_created, id) of the last customer of the previous page
+        :return: customers
+        """
+        pass
@@ -1,4 +1,7 @@
 from datetime import datetime
+from enum import Enum
+from typing import Dict
+from typing import List
 from typing import Optional
 from uuid import UUID
 
@@ -6,8 +9,18 @@ from pydantic import BaseModel
 from pydantic import constr
 
 
+class CustomerPhotoStatus(str, Enum):
+    pending = "pending"
+    failed = "failed"
+
+
+# static segments of the customer routes, a customer with one of them as ID could not be got by ID
+RESERVED_CUSTOMER_IDS = ("bulk", "cursor", "export", "import")
+CUSTOMER_ID_REGEX = f"^(?!({'|'.join(RESERVED_CUSTOMER_IDS)})$)"
+
+
 class CustomerCreate(BaseModel):
-    id: constr(min_length=1)
+    id: constr(min_length=1, regex=CUSTOMER_ID_REGEX)
     name: constr(min_length=1)
     surname: constr(min_length=1)
     # photo: Optional[str] = None
@@ -15,6 +28,12 @@ class CustomerCreate(BaseModel):
 
 
 class Customer(CustomerCreate):
+    # the customers created before the IDs were reserved keep them
+    id: str
+    # URL of every resized photo by size name, set once they are generated
+    photo_derivatives: Optional[Dict[str, str]] = None
+    # set while the photo is spooled to the storage, or if it could not be stored
+    photo_status: Optional[CustomerPhotoStatus] = None
     dt_created: datetime
     dt_deleted: datetime = None
     dt_updated: datetime = None
@@ -31,6 +50,10 @@ class Customer(CustomerCreate):
                 surname="surname",
                 photo_url="https://assets.website-files.com/5bea194a3705ec25b27ce94e/5bea1afbc107657eff26fb3d_Logo"
                           "%20the%20agile%20monkeys.svg",
+                photo_derivatives=dict(
+                    small="https://bucket.s3.eu-west-1.amazonaws.com/customer/The Agile Monkey/photo_small.webp",
+                    medium="https://bucket.s3.eu-west-1.amazonaws.com/customer/The Agile Monkey/photo_medium.webp",
+                ),
                 dt_created="2021-11-11 12:34:56",
                 dt_updated=None,
                 dt_deleted=None,
@@ -47,3 +70,90 @@ class CustomerUpdate(BaseModel):
     # photo: Optional[str] = None
     photo_url: Optional[str] = None
     dt_deleted: Optional[datetime] = None
+
+
+class CustomerPhoto(BaseModel):
+    photo_url: str
+    photo_status: Optional[CustomerPhotoStatus] = None
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                photo_url="https://bucket.s3.eu-west-1.amazonaws.com/customer/The Agile Monkey"
+                          "/photo_3f2a9c1e7b5d4e8f9a0b1c2d3e4f5a6b",
+            )
+        )
+
+
+class CustomerPhotoUpload(BaseModel):
+    # to confirm the upload
+    photo_id: str
+    upload_url: str
+    method: str = "PUT"
+    content_type: str
+    expires_in: int
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                photo_id="3f2a9c1e7b5d4e8f9a0b1c2d3e4f5a6b",
+                upload_url="https://bucket.s3.eu-west-1.amazonaws.com/customer/The%20Agile%20Monkey"
+                           "/photo_3f2a9c1e7b5d4e8f9a0b1c2d3e4f5a6b.png"
+                           "?AWSAccessKeyId=...&Signature=...&content-type=image%2Fpng&Expires=1637000000",
+                method="PUT",
+                content_type="image/png",
+                expires_in=900,
+            )
+        )
+
+
+class CustomerExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class CustomerBulkStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+
+
+class CustomerBulkResult(BaseModel):
+    id: str
+    status: CustomerBulkStatus
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                id="The Agile Monkey",
+                status="created",
+            )
+        )
+
+
+class CustomerImportRejectedRow(BaseModel):
+    line: int
+    reason: str
+
+
+class CustomerImportReport(BaseModel):
+    rows: int
+    imported: int
+    duplicates: int
+    rejected: int
+    rejected_rows: List[CustomerImportRejectedRow]
+    seconds: float
+    rows_per_second: float
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                rows=3,
+                imported=1,
+                duplicates=1,
+                rejected=1,
+                rejected_rows=[dict(line=3, reason="name is empty")],
+                seconds=0.01,
+                rows_per_second=300.0,
+            )
+        )
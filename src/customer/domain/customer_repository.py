@@ -1,12 +1,17 @@
 from abc import ABC
 from abc import abstractmethod
+from datetime import datetime
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 from sqlalchemy.orm import Session
 
 from customer.domain.customer import Customer
 from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerPhotoStatus
 from customer.domain.customer import CustomerUpdate
 from user.domain.user import User
 
@@ -18,11 +23,14 @@ class CustomerRepository(ABC):
     def count(
             cls,
             db_session: Session,
+            only_actives: bool = False,
     ) -> int:
         """
         Count the number of element in the customer table.
+        With the filter only_actives you can count only customers actives or all.
 
         :param db_session: session of the database
+        :param only_actives: filter
         :return: number of customers
         """
         pass
@@ -36,12 +44,53 @@ class CustomerRepository(ABC):
             current_user: User,
     ) -> Optional[Customer]:
         """
-        Persist a new Customer.
+        Persist a new Customer with a single statement.
 
         :param db_session: session of the database
         :param customer: Customer to persist
         :param current_user: current user
-        :return: customer
+        :return: customer if the record was created, None if the customer ID already exists
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def create_many(
+            cls,
+            db_session: Session,
+            customers: List[CustomerCreate],
+            current_user: User,
+    ) -> Optional[List[str]]:
+        """
+        Persist new Customers with a single statement.
+        The customers whose ID already exists are skipped.
+
+        :param db_session: session of the database
+        :param customers: Customers to persist
+        :param current_user: current user
+        :return: IDs of the created customers, None if the statement failed
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def import_many(
+            cls,
+            db_session: Session,
+            rows: Iterator[Tuple[str, str, str, Optional[str]]],
+            current_user: User,
+            chunk_size: int = 10000,
+    ) -> Optional[int]:
+        """
+        Persist new Customers from (id, name, surname, photo_url) rows already validated.
+        The rows are consumed in chunks, so they can come from a file of any size.
+        The customers whose ID already exists, or is repeated in the rows, are skipped.
+
+        :param db_session: session of the database
+        :param rows: rows to persist
+        :param current_user: current user
+        :param chunk_size: number of rows sent to the database each time
+        :return: number of created customers, None if the import failed
         """
         pass
 
@@ -53,14 +102,77 @@ class CustomerRepository(ABC):
             customer_id: str,
             new_info: CustomerUpdate,
             current_user: User,
-    ) -> None:
+    ) -> bool:
         """
-        Update the info of a customer.
+        Update the info of a customer with a single statement.
 
         :param db_session: session of the database
         :param customer_id: customer's ID
         :param new_info: new info
         :param current_user: current user
+        :return: True if the customer was updated, False if it does not exist
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def update_photo(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+            current_user: User,
+    ) -> bool:
+        """
+        Set a new photo to a customer with a single statement, it clears the derivatives of the previous one.
+
+        :param db_session: session of the database
+        :param customer_id: customer's ID
+        :param photo_url: URL of the photo
+        :param photo_status: status of the photo, None if it is stored
+        :param current_user: current user
+        :return: True if the customer was updated, False if it does not exist
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def update_photo_status(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+    ) -> bool:
+        """
+        Set the status of the photo of a customer, only if the photo is still the same.
+
+        :param db_session: session of the database
+        :param customer_id: customer's ID
+        :param photo_url: URL of the photo
+        :param photo_status: status of the photo, None if it is stored
+        :return: True if it was set, False if the customer does not exist or has another photo
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def update_photo_derivatives(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_derivatives: Dict[str, str],
+    ) -> bool:
+        """
+        Set the derivatives of the photo of a customer, only if the photo is still the same.
+
+        :param db_session: session of the database
+        :param customer_id: customer's ID
+        :param photo_url: URL of the photo the derivatives were generated from
+        :param photo_derivatives: URL of every derivative by size name
+        :return: True if they were set, False if the customer does not exist or has another photo
         """
         pass
 
@@ -96,3 +208,45 @@ class CustomerRepository(ABC):
         :return: users
         """
         pass
+
+    @classmethod
+    @abstractmethod
+    def iter_all(
+            cls,
+            db_session: Session,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> Iterator[Customer]:
+        """
+        Iterate over all persisted customers sorted by (dt_created, id).
+        The rows are fetched in batches from a server side cursor, so the memory is flat whatever the table size.
+        With the filter only_actives you can iterate only customers actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :param batch_size: number of rows fetched from the cursor each time
+        :return: customers
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def get_list_keyset(
+            cls,
+            db_session: Session,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        """
+        Searches for a page of persisted customers sorted by (dt_created, id).
+        The page starts right after the keyset "after", so every page costs the same as the first one.
+        With the filter only_actives you can search only customers actives or all.
+
+        :param db_session: session of the database
+        :param only_actives: filter
+        :param size: max number of customers
+        :param after: (dt_created, id) of the last customer of the previous page
+        :return: customers
+        """
+        pass
@@ -1,4 +1,6 @@
 from abc import ABC
+from typing import BinaryIO
+from typing import Dict
 
 
 class ImageStorageService(ABC):
@@ -14,3 +16,70 @@ class ImageStorageService(ABC):
         :param image: image base64 format
         """
         pass
+
+    def upload_stream(
+            self,
+            path: str,
+            file: BinaryIO,
+            content_type: str,
+    ) -> None:
+        """
+        Persist an image read from a file, without loading it whole in memory.
+
+        :param path: path
+        :param file: binary file
+        :param content_type: MIME type of the image
+        """
+        pass
+
+    def get_url(
+            self,
+            path: str,
+    ) -> str:
+        """
+        Get the public URL of an image.
+
+        :param path: path
+        :return: URL
+        """
+        pass
+
+    def get_upload_url(
+            self,
+            path: str,
+            content_type: str,
+            expires_in: int,
+    ) -> str:
+        """
+        Get a presigned URL to upload an image with a PUT straight to the storage.
+
+        :param path: path
+        :param content_type: MIME type the client must send
+        :param expires_in: seconds the URL is valid
+        :return: URL
+        """
+        pass
+
+    def exists(
+            self,
+            path: str,
+    ) -> bool:
+        """
+        Check if an image is persisted.
+
+        :param path: path
+        :return: True if it exists
+        """
+        pass
+
+    def create_derivatives(
+            self,
+            path: str,
+    ) -> Dict[str, str]:
+        """
+        Persist the resized derivatives of an image, next to it.
+
+        :param path: path of the original image
+        :return: URL of every derivative by size name
+        """
+        pass
@@ -3,6 +3,8 @@ from datetime import datetime
 from sqlalchemy import Column
 from sqlalchemy import DateTime
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import JSON
 from sqlalchemy import String
 from sqlalchemy.orm import relationship
 from sqlalchemy_utils import UUIDType
@@ -12,11 +14,16 @@ from database import Base
 
 class SQLAlchemyCustomer(Base):
     __tablename__ = "customer"
+    __table_args__ = (
+        Index("ix_customer_dt_created_id", "dt_created", "id"),
+    )
 
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
     surname = Column(String, nullable=False)
     photo_url = Column(String, nullable=True)
+    photo_derivatives = Column(JSON, nullable=True)
+    photo_status = Column(String, nullable=True)
     dt_created = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     dt_updated = Column(DateTime(timezone=True), nullable=True)
     dt_deleted = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,126 @@
+from datetime import datetime
+from typing import AsyncIterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import cache_invalidation
+from customer.customer_cache import CustomerCache
+from customer.domain.async_customer_repository import AsyncCustomerRepository
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerUpdate
+from customer.infrastructure.models.sqlalchemy_customer import SQLAlchemyCustomer
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from user.domain.user import User
+
+
+class CachedAsyncCustomerRepository(AsyncCustomerRepository):
+    """
+    Async version of CachedCustomerRepository, it shares the CustomerCache of the worker with it.
+    """
+
+    def __init__(
+            self,
+            repository: AsyncCustomerRepository,
+            cache: CustomerCache,
+            response_cache: ResponseCache,
+            single_flight: SingleFlight,
+    ) -> None:
+        self.repository = repository
+        self.cache = cache
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+
+    def _invalidate(
+            self,
+            *customer_ids: str,
+    ) -> None:
+        self.cache.invalidate(*customer_ids)
+        # any write can change the pages of the list
+        self.response_cache.invalidate(SQLAlchemyCustomer.__tablename__)
+
+    async def count(
+            self,
+            db_session: AsyncSession,
+            only_actives: bool = False,
+    ) -> int:
+        return await self.repository.count(db_session, only_actives=only_actives)
+
+    async def create(
+            self,
+            db_session: AsyncSession,
+            customer: CustomerCreate,
+            current_user: User,
+    ) -> Optional[Customer]:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, customer.id)
+        try:
+            return await self.repository.create(db_session, customer=customer, current_user=current_user)
+        finally:
+            self._invalidate(customer.id)
+
+    async def update(
+            self,
+            db_session: AsyncSession,
+            customer_id: str,
+            new_info: CustomerUpdate,
+            current_user: User,
+    ) -> bool:
+        # the ID can change
+        customer_ids = [customer_id, *([new_info.id] if new_info.id else [])]
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, *customer_ids)
+        try:
+            return await self.repository.update(
+                db_session,
+                customer_id=customer_id,
+                new_info=new_info,
+                current_user=current_user,
+            )
+        finally:
+            self._invalidate(*customer_ids)
+
+    async def get_by_id(
+            self,
+            db_session: AsyncSession,
+            customer_id: str,
+    ) -> Optional[Customer]:
+        found, customer, generation = self.cache.get(customer_id)
+        if found:
+            return customer
+
+        async def _load() -> Optional[Customer]:
+            customer_db = await self.repository.get_by_id(db_session, customer_id=customer_id)
+            loaded = Customer.from_orm(customer_db) if customer_db is not None else None
+            self.cache.put(customer_id, customer=loaded, generation=generation)
+            return loaded
+
+        # the concurrent lookups of the same customer share a single query, unless a write happens between them
+        customer = await self.single_flight.do_async((customer_id, generation), _load)
+        return customer and customer.copy(deep=True)
+
+    async def get_list(
+            self,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+    ) -> List[Customer]:
+        return await self.repository.get_list(db_session, only_actives=only_actives)
+
+    def iter_all(
+            self,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> AsyncIterator[Customer]:
+        return self.repository.iter_all(db_session, only_actives=only_actives, batch_size=batch_size)
+
+    async def get_list_keyset(
+            self,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        return await self.repository.get_list_keyset(db_session, only_actives=only_actives, size=size, after=after)
@@ -0,0 +1,221 @@
+from datetime import datetime
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sqlalchemy.orm import Session
+
+import cache_invalidation
+from customer.customer_cache import CustomerCache
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerPhotoStatus
+from customer.domain.customer import CustomerUpdate
+from customer.domain.customer_repository import CustomerRepository
+from customer.infrastructure.models.sqlalchemy_customer import SQLAlchemyCustomer
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from user.domain.user import User
+
+
+class CachedCustomerRepository(CustomerRepository):
+    """
+    CustomerRepository that keeps the customers read by ID in a CustomerCache, and delegates everything else.
+    The concurrent misses of the same customer are coalesced in a single query.
+    Every write drops the customers it changes from the cache of this worker, and the pages of the response cache.
+    It also notifies the other workers, when the transaction is committed, to drop them from their caches.
+    """
+
+    def __init__(
+            self,
+            repository: CustomerRepository,
+            cache: CustomerCache,
+            response_cache: ResponseCache,
+            single_flight: SingleFlight,
+    ) -> None:
+        self.repository = repository
+        self.cache = cache
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+
+    def _invalidate(
+            self,
+            *customer_ids: str,
+    ) -> None:
+        self.cache.invalidate(*customer_ids)
+        # any write can change the pages of the list
+        self.response_cache.invalidate(SQLAlchemyCustomer.__tablename__)
+
+    def count(
+            self,
+            db_session: Session,
+            only_actives: bool = False,
+    ) -> int:
+        return self.repository.count(db_session, only_actives=only_actives)
+
+    def create(
+            self,
+            db_session: Session,
+            customer: CustomerCreate,
+            current_user: User,
+    ) -> Optional[Customer]:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, customer.id)
+        try:
+            return self.repository.create(db_session, customer=customer, current_user=current_user)
+        finally:
+            # the ID can be cached as not existing
+            self._invalidate(customer.id)
+
+    def create_many(
+            self,
+            db_session: Session,
+            customers: List[CustomerCreate],
+            current_user: User,
+    ) -> Optional[List[str]]:
+        customer_ids = [customer.id for customer in customers]
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, *customer_ids)
+        try:
+            return self.repository.create_many(db_session, customers=customers, current_user=current_user)
+        finally:
+            self._invalidate(*customer_ids)
+
+    def import_many(
+            self,
+            db_session: Session,
+            rows: Iterator[Tuple[str, str, str, Optional[str]]],
+            current_user: User,
+            chunk_size: int = 10000,
+    ) -> Optional[int]:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__)
+        try:
+            return self.repository.import_many(
+                db_session,
+                rows=rows,
+                current_user=current_user,
+                chunk_size=chunk_size,
+            )
+        finally:
+            # the rows are streamed, their IDs are not kept
+            self.cache.invalidate_all()
+            self.response_cache.invalidate(SQLAlchemyCustomer.__tablename__)
+
+    def update(
+            self,
+            db_session: Session,
+            customer_id: str,
+            new_info: CustomerUpdate,
+            current_user: User,
+    ) -> bool:
+        # the ID can change
+        customer_ids = [customer_id, *([new_info.id] if new_info.id else [])]
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, *customer_ids)
+        try:
+            return self.repository.update(
+                db_session,
+                customer_id=customer_id,
+                new_info=new_info,
+                current_user=current_user,
+            )
+        finally:
+            self._invalidate(*customer_ids)
+
+    def update_photo(
+            self,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+            current_user: User,
+    ) -> bool:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, customer_id)
+        try:
+            return self.repository.update_photo(
+                db_session,
+                customer_id=customer_id,
+                photo_url=photo_url,
+                photo_status=photo_status,
+                current_user=current_user,
+            )
+        finally:
+            self._invalidate(customer_id)
+
+    def update_photo_status(
+            self,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+    ) -> bool:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, customer_id)
+        try:
+            return self.repository.update_photo_status(
+                db_session,
+                customer_id=customer_id,
+                photo_url=photo_url,
+                photo_status=photo_status,
+            )
+        finally:
+            self._invalidate(customer_id)
+
+    def update_photo_derivatives(
+            self,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_derivatives: Dict[str, str],
+    ) -> bool:
+        cache_invalidation.notify(db_session, SQLAlchemyCustomer.__tablename__, customer_id)
+        try:
+            return self.repository.update_photo_derivatives(
+                db_session,
+                customer_id=customer_id,
+                photo_url=photo_url,
+                photo_derivatives=photo_derivatives,
+            )
+        finally:
+            self._invalidate(customer_id)
+
+    def get_by_id(
+            self,
+            db_session: Session,
+            customer_id: str,
+    ) -> Optional[Customer]:
+        found, customer, generation = self.cache.get(customer_id)
+        if found:
+            return customer
+
+        def _load() -> Optional[Customer]:
+            customer_db = self.repository.get_by_id(db_session, customer_id=customer_id)
+            loaded = Customer.from_orm(customer_db) if customer_db is not None else None
+            self.cache.put(customer_id, customer=loaded, generation=generation)
+            return loaded
+
+        # the concurrent lookups of the same customer share a single query, unless a write happens between them
+        customer = self.single_flight.do((customer_id, generation), _load)
+        return customer and customer.copy(deep=True)
+
+    def get_list(
+            self,
+            db_session: Session,
+            only_actives: bool = True,
+    ) -> List[Customer]:
+        return self.repository.get_list(db_session, only_actives=only_actives)
+
+    def iter_all(
+            self,
+            db_session: Session,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> Iterator[Customer]:
+        return self.repository.iter_all(db_session, only_actives=only_actives, batch_size=batch_size)
+
+    def get_list_keyset(
+            self,
+            db_session: Session,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        return self.repository.get_list_keyset(db_session, only_actives=only_actives, size=size, after=after)
@@ -0,0 +1,165 @@
+import logging
+from datetime import datetime
+from typing import AsyncIterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from customer.domain.async_customer_repository import AsyncCustomerRepository
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerUpdate
+from customer.infrastructure.models.sqlalchemy_customer import SQLAlchemyCustomer
+from customer.infrastructure.repositories.sqlalchemy_customer_repository import keyset_after
+from user.domain.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyAsyncCustomerRepository(AsyncCustomerRepository):
+
+    @classmethod
+    async def count(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = False,
+    ) -> int:
+        statement = select(func.count()).select_from(SQLAlchemyCustomer)
+
+        if only_actives:
+            statement = statement.filter_by(dt_deleted=None)
+
+        return (await db_session.execute(statement)).scalar_one()
+
+    @classmethod
+    async def create(
+            cls,
+            db_session: AsyncSession,
+            customer: CustomerCreate,
+            current_user: User,
+    ) -> Optional[Customer]:
+        statement = (
+            insert(SQLAlchemyCustomer)
+            .values(
+                id=customer.id,
+                name=customer.name,
+                surname=customer.surname,
+                photo_url=customer.photo_url,
+                dt_created=datetime.utcnow(),
+                created_by_id=current_user.id,
+            )
+            .on_conflict_do_nothing(index_elements=[SQLAlchemyCustomer.id])
+            .returning(*SQLAlchemyCustomer.__table__.columns)
+        )
+        try:
+            result = await db_session.execute(select(SQLAlchemyCustomer).from_statement(statement))
+            customer_db = result.scalars().first()
+            await db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            await db_session.rollback()
+            raise
+
+        if customer_db is None:
+            logger.info(f"Customer with ID \"{customer.id}\" already exists.")
+            return None
+        logger.info(f"Customer with ID \"{customer.id}\" created.")
+        return customer_db
+
+    @classmethod
+    async def update(
+            cls,
+            db_session: AsyncSession,
+            customer_id: str,
+            new_info: CustomerUpdate,
+            current_user: User,
+    ) -> bool:
+        values = new_info.dict(exclude_unset=True)
+        values["updated_by_id"] = current_user.id
+        values["dt_updated"] = datetime.utcnow()
+        if "photo_url" in values:
+            # the derivatives and the status of the previous photo are not valid anymore
+            values["photo_derivatives"] = None
+            values["photo_status"] = None
+        statement = (
+            update(SQLAlchemyCustomer)
+            .filter_by(id=customer_id)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            result = await db_session.execute(statement)
+            await db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            await db_session.rollback()
+            raise
+
+        if not result.rowcount:
+            return False
+        logger.info(f"Customer with ID \"{customer_id}\" updated.")
+        return True
+
+    @classmethod
+    async def get_by_id(
+            cls,
+            db_session: AsyncSession,
+            customer_id: str,
+    ) -> Optional[Customer]:
+        return await db_session.get(SQLAlchemyCustomer, customer_id)
+
+    @classmethod
+    async def get_list(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+    ) -> List[Customer]:
+        statement = select(SQLAlchemyCustomer)
+
+        if only_actives:
+            statement = statement.filter_by(dt_deleted=None)
+
+        return (await db_session.execute(statement)).scalars().all()
+
+    @classmethod
+    async def iter_all(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> AsyncIterator[Customer]:
+        statement = select(SQLAlchemyCustomer)
+
+        if only_actives:
+            statement = statement.filter_by(dt_deleted=None)
+
+        statement = statement.order_by(SQLAlchemyCustomer.dt_created, SQLAlchemyCustomer.id)
+        result = await db_session.stream_scalars(statement.execution_options(max_row_buffer=batch_size))
+        async for customer in result:
+            yield customer
+
+    @classmethod
+    async def get_list_keyset(
+            cls,
+            db_session: AsyncSession,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        statement = select(SQLAlchemyCustomer)
+
+        if only_actives:
+            statement = statement.filter_by(dt_deleted=None)
+
+        if after is not None:
+            statement = statement.where(keyset_after(after))
+
+        statement = statement.order_by(SQLAlchemyCustomer.dt_created, SQLAlchemyCustomer.id).limit(size)
+        return (await db_session.execute(statement)).scalars().all()
@@ -1,21 +1,68 @@
+import csv
+import io
 import logging
 from datetime import datetime
+from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 
+import psycopg2
+from sqlalchemy import literal
+from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
 
 from customer.domain.customer import Customer
 from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerPhotoStatus
 from customer.domain.customer import CustomerUpdate
 from customer.domain.customer_repository import CustomerRepository
 from customer.infrastructure.models.sqlalchemy_customer import SQLAlchemyCustomer
 from database import commit
-from database import save
 from user.domain.user import User
 
 logger = logging.getLogger(__name__)
 
+IMPORT_CREATE_STAGING_TABLE = """
+    CREATE TEMPORARY TABLE customer_import (
+        id VARCHAR NOT NULL,
+        name VARCHAR NOT NULL,
+        surname VARCHAR NOT NULL,
+        photo_url VARCHAR
+    ) ON COMMIT DROP
+"""
+IMPORT_COPY = "COPY customer_import (id, name, surname, photo_url) FROM STDIN WITH (FORMAT csv)"
+IMPORT_MERGE = """
+    INSERT INTO customer (id, name, surname, photo_url, dt_created, created_by_id)
+    SELECT DISTINCT ON (id) id, name, surname, photo_url, %(dt_created)s, %(created_by_id)s
+    FROM customer_import
+    ORDER BY id
+    ON CONFLICT (id) DO NOTHING
+"""
+IMPORT_DROP_STAGING_TABLE = "DROP TABLE customer_import"
+
+
+def keyset_after(
+        after: Tuple[datetime, str],
+) -> ColumnElement:
+    """
+    Condition for the customers sorted by (dt_created, id) that come after a keyset.
+    The values are bound with the types of the columns, so the timezone of dt_created is kept.
+
+    :param after: (dt_created, id)
+    :return: condition
+    """
+    dt_created, customer_id = after
+    return tuple_(SQLAlchemyCustomer.dt_created, SQLAlchemyCustomer.id) > tuple_(
+        literal(dt_created, SQLAlchemyCustomer.dt_created.type),
+        literal(customer_id, SQLAlchemyCustomer.id.type),
+    )
+
 
 class SQLAlchemyCustomerRepository(CustomerRepository):
 
@@ -23,8 +70,14 @@ class SQLAlchemyCustomerRepository(CustomerRepository):
     def count(
             cls,
             db_session: Session,
+            only_actives: bool = False,
     ) -> int:
-        return db_session.query(SQLAlchemyCustomer).count()
+        query = db_session.query(SQLAlchemyCustomer)
+
+        if only_actives:
+            query = query.filter_by(dt_deleted=None)
+
+        return query.count()
 
     @classmethod
     def create(
@@ -33,19 +86,113 @@ class SQLAlchemyCustomerRepository(CustomerRepository):
             customer: CustomerCreate,
             current_user: User,
     ) -> Optional[Customer]:
-        customer_to_save = SQLAlchemyCustomer()
-        customer_to_save.id = customer.id
-        customer_to_save.name = customer.name
-        customer_to_save.surname = customer.surname
-        customer_to_save.photo_url = customer.photo_url
-        customer_to_save.dt_created = datetime.utcnow()
-        customer_to_save.dt_updated = None
-        customer_to_save.dt_deleted = None
-        customer_to_save.created_by_id = current_user.id
-        customer_to_save.updated_by = None
-        created = save(db_session=db_session, obj=customer_to_save)
+        statement = (
+            insert(SQLAlchemyCustomer)
+            .values(
+                id=customer.id,
+                name=customer.name,
+                surname=customer.surname,
+                photo_url=customer.photo_url,
+                dt_created=datetime.utcnow(),
+                created_by_id=current_user.id,
+            )
+            .on_conflict_do_nothing(index_elements=[SQLAlchemyCustomer.id])
+            .returning(*SQLAlchemyCustomer.__table__.columns)
+        )
+        try:
+            customer_db = db_session.execute(select(SQLAlchemyCustomer).from_statement(statement)).scalars().first()
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if customer_db is None:
+            logger.info(f"Customer with ID \"{customer.id}\" already exists.")
+            return None
         logger.info(f"Customer with ID \"{customer.id}\" created.")
-        return customer_to_save if created else None
+        return customer_db
+
+    @classmethod
+    def create_many(
+            cls,
+            db_session: Session,
+            customers: List[CustomerCreate],
+            current_user: User,
+    ) -> Optional[List[str]]:
+        if not customers:
+            return []
+
+        dt_created = datetime.utcnow()
+        values = [
+            dict(
+                id=customer.id,
+                name=customer.name,
+                surname=customer.surname,
+                photo_url=customer.photo_url,
+                dt_created=dt_created,
+                created_by_id=current_user.id,
+            )
+            for customer in customers
+        ]
+        statement = (
+            insert(SQLAlchemyCustomer)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[SQLAlchemyCustomer.id])
+            .returning(SQLAlchemyCustomer.id)
+        )
+        try:
+            created_ids = db_session.execute(statement).scalars().all()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            return None
+
+        if not commit(db_session=db_session):
+            return None
+        logger.info(f"{len(created_ids)} customers created.")
+        return created_ids
+
+    @classmethod
+    def import_many(
+            cls,
+            db_session: Session,
+            rows: Iterator[Tuple[str, str, str, Optional[str]]],
+            current_user: User,
+            chunk_size: int = 10000,
+    ) -> Optional[int]:
+        cursor = db_session.connection().connection.cursor()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def _copy_buffer() -> None:
+            buffer.seek(0)
+            cursor.copy_expert(IMPORT_COPY, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+
+        try:
+            cursor.execute(IMPORT_CREATE_STAGING_TABLE)
+            for i, row in enumerate(rows, start=1):
+                writer.writerow(row)
+                if i % chunk_size == 0:
+                    _copy_buffer()
+            _copy_buffer()
+
+            cursor.execute(IMPORT_MERGE, dict(dt_created=datetime.utcnow(), created_by_id=str(current_user.id)))
+            imported = cursor.rowcount
+            cursor.execute(IMPORT_DROP_STAGING_TABLE)
+        except psycopg2.Error as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            return None
+        finally:
+            cursor.close()
+
+        if not commit(db_session=db_session):
+            return None
+        logger.info(f"{imported} customers imported.")
+        return imported
 
     @classmethod
     def update(
@@ -54,14 +201,101 @@ class SQLAlchemyCustomerRepository(CustomerRepository):
             customer_id: str,
             new_info: CustomerUpdate,
             current_user: User,
-    ) -> None:
-        customer_db = cls.get_by_id(db_session, customer_id=customer_id)
-        for key, value in new_info.dict(exclude_unset=True).items():
-            setattr(customer_db, key, value)
-        customer_db.updated_by_id = current_user.id
-        customer_db.dt_updated = datetime.utcnow()
-        commit(db_session=db_session)
+    ) -> bool:
+        values = new_info.dict(exclude_unset=True)
+        values["updated_by_id"] = current_user.id
+        values["dt_updated"] = datetime.utcnow()
+        if "photo_url" in values:
+            # the derivatives and the status of the previous photo are not valid anymore
+            values["photo_derivatives"] = None
+            values["photo_status"] = None
+        try:
+            query = db_session.query(SQLAlchemyCustomer).filter_by(id=customer_id)
+            updated = query.update(values, synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if not updated:
+            return False
         logger.info(f"Customer with ID \"{customer_id}\" updated.")
+        return True
+
+    @classmethod
+    def update_photo(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+            current_user: User,
+    ) -> bool:
+        values = dict(
+            photo_url=photo_url,
+            photo_status=photo_status,
+            photo_derivatives=None,
+            updated_by_id=current_user.id,
+            dt_updated=datetime.utcnow(),
+        )
+        try:
+            query = db_session.query(SQLAlchemyCustomer).filter_by(id=customer_id)
+            updated = query.update(values, synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if not updated:
+            return False
+        logger.info(f"Photo of the customer with ID \"{customer_id}\" updated.")
+        return True
+
+    @classmethod
+    def update_photo_status(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_status: Optional[CustomerPhotoStatus],
+    ) -> bool:
+        try:
+            query = db_session.query(SQLAlchemyCustomer).filter_by(id=customer_id, photo_url=photo_url)
+            updated = query.update(dict(photo_status=photo_status), synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if not updated:
+            return False
+        logger.info(f"Photo status of the customer with ID \"{customer_id}\" updated: {photo_status}.")
+        return True
+
+    @classmethod
+    def update_photo_derivatives(
+            cls,
+            db_session: Session,
+            customer_id: str,
+            photo_url: str,
+            photo_derivatives: Dict[str, str],
+    ) -> bool:
+        try:
+            query = db_session.query(SQLAlchemyCustomer).filter_by(id=customer_id, photo_url=photo_url)
+            updated = query.update(dict(photo_derivatives=photo_derivatives), synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if not updated:
+            return False
+        logger.info(f"Photo derivatives of the customer with ID \"{customer_id}\" updated.")
+        return True
 
     @classmethod
     def get_by_id(
@@ -83,3 +317,36 @@ class SQLAlchemyCustomerRepository(CustomerRepository):
             query = query.filter_by(dt_deleted=None)
 
         return query.all()
+
+    @classmethod
+    def iter_all(
+            cls,
+            db_session: Session,
+            only_actives: bool = True,
+            batch_size: int = 1000,
+    ) -> Iterator[Customer]:
+        query = db_session.query(SQLAlchemyCustomer)
+
+        if only_actives:
+            query = query.filter_by(dt_deleted=None)
+
+        query = query.order_by(SQLAlchemyCustomer.dt_created, SQLAlchemyCustomer.id)
+        yield from query.execution_options(stream_results=True).yield_per(batch_size)
+
+    @classmethod
+    def get_list_keyset(
+            cls,
+            db_session: Session,
+            only_actives: bool = True,
+            size: int = 50,
+            after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Customer]:
+        query = db_session.query(SQLAlchemyCustomer)
+
+        if only_actives:
+            query = query.filter_by(dt_deleted=None)
+
+        if after is not None:
+            query = query.filter(keyset_after(after))
+
+        return query.order_by(SQLAlchemyCustomer.dt_created, SQLAlchemyCustomer.id).limit(size).all()
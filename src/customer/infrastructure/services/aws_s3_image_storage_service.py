@@ -1,17 +1,48 @@
 import base64
 import binascii
 import logging
+import threading
 from http import HTTPStatus
+from typing import BinaryIO
+from typing import Dict
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from fastapi import HTTPException
 
 import messages
 import settings
 from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.services import photo_derivatives
 
 logger = logging.getLogger(__name__)
 
+# boto3 clients are thread safe, one per process shares its connection pool between all the requests
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Get the S3 client of the process, it is created on first use.
+
+    :return: S3 client
+    """
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.session.Session().client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region_name=settings.S3_REGION_NAME,
+                aws_access_key_id=settings.S3_AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.S3_AWS_SECRET_ACCESS_KEY,
+                config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
+            )
+        return _s3_client
+
 
 class AWSS3ImageStorageService(ImageStorageService):
     def upload(
@@ -19,20 +50,87 @@ class AWSS3ImageStorageService(ImageStorageService):
             path: str,
             image: str,
     ) -> None:
-        boto3_session = boto3.session.Session()
-        s3_client = boto3_session.resource(
-            "s3",
-            endpoint_url=settings.S3_ENDPOINT_URL,
-            region_name=settings.S3_REGION_NAME,
-            aws_access_key_id=settings.S3_AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.S3_AWS_SECRET_ACCESS_KEY,
-        )
-
         try:
             image_binary = base64.b64decode(image)
         except binascii.Error:
             logger.exception(messages.IMAGE_BASE64_NOT_VALID)
             raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.IMAGE_BASE64_NOT_VALID)
 
-        s3_client.Object(settings.BUCKET, path).put(Body=image_binary, ContentType="image/jpeg")
+        get_s3_client().put_object(Bucket=settings.BUCKET, Key=path, Body=image_binary, ContentType="image/jpeg")
         logger.info("Photo uploaded.")
+
+    def upload_stream(
+            self,
+            path: str,
+            file: BinaryIO,
+            content_type: str,
+    ) -> None:
+        # the file is read in chunks, above the threshold it is sent as a multipart upload with parts in parallel
+        transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+        )
+        get_s3_client().upload_fileobj(
+            Fileobj=file,
+            Bucket=settings.BUCKET,
+            Key=path,
+            ExtraArgs=dict(ContentType=content_type),
+            Config=transfer_config,
+        )
+        logger.info(f"Photo uploaded to \"{path}\".")
+
+    def get_url(
+            self,
+            path: str,
+    ) -> str:
+        if settings.S3_ENDPOINT_URL:
+            return f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{settings.BUCKET}/{path}"
+        return f"https://{settings.BUCKET}.s3.{settings.S3_REGION_NAME}.amazonaws.com/{path}"
+
+    def get_upload_url(
+            self,
+            path: str,
+            content_type: str,
+            expires_in: int,
+    ) -> str:
+        # signed locally, the client must send the same Content-Type header
+        return get_s3_client().generate_presigned_url(
+            ClientMethod="put_object",
+            Params=dict(Bucket=settings.BUCKET, Key=path, ContentType=content_type),
+            ExpiresIn=expires_in,
+            HttpMethod="PUT",
+        )
+
+    def exists(
+            self,
+            path: str,
+    ) -> bool:
+        try:
+            get_s3_client().head_object(Bucket=settings.BUCKET, Key=path)
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def create_derivatives(
+            self,
+            path: str,
+    ) -> Dict[str, str]:
+        image = get_s3_client().get_object(Bucket=settings.BUCKET, Key=path)["Body"].read()
+        derivatives = photo_derivatives.create_derivatives(image=image)
+
+        _, content_type = photo_derivatives.FORMATS[settings.PHOTO_DERIVATIVE_FORMAT]
+        urls = dict()
+        for name, derivative in derivatives.items():
+            derivative_path = photo_derivatives.get_derivative_path(path=path, name=name)
+            get_s3_client().put_object(
+                Bucket=settings.BUCKET,
+                Key=derivative_path,
+                Body=derivative,
+                ContentType=content_type,
+            )
+            urls[name] = self.get_url(path=derivative_path)
+        logger.info(f"Photo derivatives of \"{path}\" uploaded: {', '.join(urls)}.")
+        return urls
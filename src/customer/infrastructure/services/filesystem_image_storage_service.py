@@ -0,0 +1,213 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import tempfile
+from http import HTTPStatus
+from typing import BinaryIO
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException
+
+import messages
+import settings
+from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.services import photo_derivatives
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_files_directory() -> str:
+    """
+    Get the directory of the images by path, the one served at IMAGE_STORAGE_URL.
+
+    :return: directory
+    """
+    return os.path.join(os.path.abspath(settings.IMAGE_STORAGE_PATH), "files")
+
+
+def _get_blob_path(
+        digest: str,
+) -> str:
+    # sharded by the first bytes of the hash, so no directory grows too big
+    return os.path.join(os.path.abspath(settings.IMAGE_STORAGE_PATH), "blobs", digest[:2], digest[2:4], digest)
+
+
+def _get_tmp_directory() -> str:
+    directory = os.path.join(os.path.abspath(settings.IMAGE_STORAGE_PATH), "tmp")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _get_digest(
+        file_path: str,
+) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileSystemImageStorageService(ImageStorageService):
+    """
+    Images stored in the local filesystem by the SHA-256 of their content, so identical images are stored once.
+
+    Every blob lives in IMAGE_STORAGE_PATH/blobs/<2 chars>/<2 chars>/<hash> and every path is a hard link to its blob
+    in IMAGE_STORAGE_PATH/files, so the link count of a blob is its reference count plus one. The files are written
+    to a temporary file and renamed, readers never see a partial image. A blob only referenced by itself is deleted.
+    """
+
+    @staticmethod
+    def _get_file_path(
+            path: str,
+    ) -> str:
+        directory = get_files_directory()
+        file_path = os.path.abspath(os.path.join(directory, path))
+        if not file_path.startswith(directory + os.sep):
+            logger.exception(f"{messages.IMAGE_PATH_NOT_VALID} - path: {path}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.IMAGE_PATH_NOT_VALID)
+        return file_path
+
+    def _write(
+            self,
+            path: str,
+            chunks: Iterable[bytes],
+    ) -> None:
+        file_path = self._get_file_path(path)
+        fd, tmp_path = tempfile.mkstemp(dir=_get_tmp_directory())
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+            blob_path = _get_blob_path(digest.hexdigest())
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            self._link_blob(tmp_path=tmp_path, blob_path=blob_path)
+
+            previous_blob_path = self._get_previous_blob_path(file_path=file_path, blob_path=blob_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            for leftover_path in (tmp_path, f"{tmp_path}.link"):
+                if os.path.exists(leftover_path):
+                    os.unlink(leftover_path)
+            raise
+
+        if previous_blob_path is not None:
+            self._release(previous_blob_path)
+        logger.info(f"Image \"{path}\" stored in blob \"{blob_path}\".")
+
+    @staticmethod
+    def _link_blob(
+            tmp_path: str,
+            blob_path: str,
+    ) -> None:
+        # os.link fails if the target exists, so concurrent writers of the same content end up with a single blob
+        while True:
+            try:
+                # new content, the temporary file becomes the blob
+                os.link(tmp_path, blob_path)
+                return
+            except FileExistsError:
+                pass
+            try:
+                # duplicated content, the temporary file is replaced by a link to the existing blob
+                os.link(blob_path, f"{tmp_path}.link")
+                os.replace(f"{tmp_path}.link", tmp_path)
+                return
+            except FileNotFoundError:
+                # the blob was deleted in the meantime
+                continue
+
+    @staticmethod
+    def _get_previous_blob_path(
+            file_path: str,
+            blob_path: str,
+    ) -> Optional[str]:
+        # the blob the path links before being replaced, only if the path is its last reference
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        if stat.st_ino == os.stat(blob_path).st_ino or stat.st_nlink > 2:
+            return None
+        return _get_blob_path(_get_digest(file_path))
+
+    @staticmethod
+    def _release(
+            blob_path: str,
+    ) -> None:
+        try:
+            if os.stat(blob_path).st_nlink == 1:
+                # a path linked in the meantime keeps its content, it is just not deduplicated
+                os.unlink(blob_path)
+                logger.info(f"Blob \"{blob_path}\" deleted.")
+        except FileNotFoundError:
+            pass
+
+    def upload(
+            self,
+            path: str,
+            image: str,
+    ) -> None:
+        try:
+            image_binary = base64.b64decode(image)
+        except binascii.Error:
+            logger.exception(messages.IMAGE_BASE64_NOT_VALID)
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.IMAGE_BASE64_NOT_VALID)
+        self._write(path=path, chunks=[image_binary])
+
+    def upload_stream(
+            self,
+            path: str,
+            file: BinaryIO,
+            content_type: str,
+    ) -> None:
+        self._write(path=path, chunks=iter(lambda: file.read(CHUNK_SIZE), b""))
+
+    def get_url(
+            self,
+            path: str,
+    ) -> str:
+        return f"{settings.IMAGE_STORAGE_URL.rstrip('/')}/{quote(path)}"
+
+    def get_upload_url(
+            self,
+            path: str,
+            content_type: str,
+            expires_in: int,
+    ) -> str:
+        logger.exception(messages.IMAGE_UPLOAD_URL_NOT_SUPPORTED)
+        raise HTTPException(status_code=HTTPStatus.NOT_IMPLEMENTED, detail=messages.IMAGE_UPLOAD_URL_NOT_SUPPORTED)
+
+    def exists(
+            self,
+            path: str,
+    ) -> bool:
+        return os.path.isfile(self._get_file_path(path))
+
+    def create_derivatives(
+            self,
+            path: str,
+    ) -> Dict[str, str]:
+        with open(self._get_file_path(path), "rb") as file:
+            image = file.read()
+        derivatives = photo_derivatives.create_derivatives(image=image)
+
+        urls = dict()
+        for name, derivative in derivatives.items():
+            derivative_path = photo_derivatives.get_derivative_path(path=path, name=name)
+            self._write(path=derivative_path, chunks=[derivative])
+            urls[name] = self.get_url(path=derivative_path)
+        return urls
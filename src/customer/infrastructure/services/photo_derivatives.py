@@ -0,0 +1,92 @@
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+from typing import Optional
+
+from PIL import Image
+from PIL import ImageOps
+
+import settings
+
+# file extension and MIME type of every derivative format
+FORMATS = dict(
+    WEBP=("webp", "image/webp"),
+    JPEG=("jpg", "image/jpeg"),
+)
+
+# the photos are decoded and resized in their own process pool, out of the GIL of the worker
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.PHOTO_DERIVATIVE_WORKERS)
+        return _executor
+
+
+def _resize(
+        image: bytes,
+        sizes: Dict[str, int],
+        image_format: str,
+        quality: int,
+) -> Dict[str, bytes]:
+    with Image.open(io.BytesIO(image)) as original:
+        original = ImageOps.exif_transpose(original)
+        # JPEG has no alpha channel
+        original = original.convert("RGB" if image_format == "JPEG" else "RGBA")
+        derivatives = dict()
+        for name, size in sizes.items():
+            derivative = original.copy()
+            # keeps the aspect ratio and never enlarges the photo
+            derivative.thumbnail((size, size), Image.LANCZOS)
+            output = io.BytesIO()
+            derivative.save(output, format=image_format, quality=quality)
+            derivatives[name] = output.getvalue()
+        return derivatives
+
+
+def create_derivatives(
+        image: bytes,
+) -> Dict[str, bytes]:
+    """
+    Resize a photo to every size of PHOTO_DERIVATIVE_SIZES in PHOTO_DERIVATIVE_FORMAT.
+    It runs in the photo derivatives pool, or inline if PHOTO_DERIVATIVE_WORKERS is 0.
+
+    :param image: photo in any format supported by Pillow
+    :raise: PIL.UnidentifiedImageError if the photo is not an image
+    :return: encoded derivative by size name
+    """
+    global _executor
+    args = (image, settings.PHOTO_DERIVATIVE_SIZES, settings.PHOTO_DERIVATIVE_FORMAT, settings.PHOTO_DERIVATIVE_QUALITY)
+    if settings.PHOTO_DERIVATIVE_WORKERS == 0:
+        return _resize(*args)
+
+    try:
+        return _get_executor().submit(_resize, *args).result()
+    except BrokenProcessPool:
+        # a worker died, the next call starts a new pool
+        with _executor_lock:
+            _executor = None
+        raise
+
+
+def get_derivative_path(
+        path: str,
+        name: str,
+) -> str:
+    """
+    Get the path of a derivative: "customer/<ID>/photo.png" and "small" give "customer/<ID>/photo_small.webp".
+
+    :param path: path of the original photo
+    :param name: size name
+    :return: path
+    """
+    directory, _, file_name = path.rpartition("/")
+    stem = file_name.rsplit(".", 1)[0] if "." in file_name else file_name
+    extension, _ = FORMATS[settings.PHOTO_DERIVATIVE_FORMAT]
+    return f"{directory}/{stem}_{name}.{extension}" if directory else f"{stem}_{name}.{extension}"
@@ -0,0 +1,270 @@
+import logging
+from datetime import datetime
+from http import HTTPStatus
+from typing import AsyncIterator
+from typing import Optional
+from typing import Tuple
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from fastapi_pagination import Page
+from fastapi_pagination import Params
+from fastapi_pagination import paginate
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import messages
+from customer.depends import get_customer_by_id_async
+from customer.depends import get_customer_keyset
+from customer.domain.async_customer_repository import AsyncCustomerRepository
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerExportFormat
+from customer.domain.customer import CustomerUpdate
+from customer.infrastructure.views.customer_export import CustomerExportSerializer
+from customer.infrastructure.views.customer_export import EXPORT_BATCH_SIZE
+from customer.infrastructure.views.customer_export import EXPORT_MEDIA_TYPES
+from database import get_async_db
+from depends import check_authenticated_async
+from depends import get_async_customer_repository
+from depends import get_current_user_async
+from pagination import CursorPage
+from pagination import CursorParams
+from pagination import encode_cursor
+from user.domain.user import User
+
+# Async def version of the customer routes, enabled with settings.ASYNC_DATABASE.
+# It is included before api_customers, so these routes take precedence over the sync ones with the same path.
+api_customers_async = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+
+async def _export(
+        customers: AsyncIterator[Customer],
+        export_format: CustomerExportFormat,
+) -> AsyncIterator[str]:
+    """
+    Serialize customers in chunks for a streaming response.
+
+    :param customers: customers
+    :param export_format: format
+    :return: chunks
+    """
+    serializer = CustomerExportSerializer(export_format=export_format, batch_size=EXPORT_BATCH_SIZE)
+    async for customer in customers:
+        chunk = serializer.write(customer)
+        if chunk:
+            yield chunk
+    yield serializer.flush()
+
+
+@api_customers_async.post(
+    path="",
+    description="Create a new customer.",
+    status_code=HTTPStatus.CREATED,
+    responses={
+        400: {"description": f"{messages.CUSTOMER_ID_ALREADY_EXISTS} {messages.CUSTOMER_CREATE_ERROR}"},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def create(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        current_user: User = Depends(get_current_user_async),
+        payload: CustomerCreate,
+) -> None:
+    # create new customer, the unique id is checked by the same statement
+    try:
+        new_customer = await customer_repository.create(
+            db_session=db_session,
+            customer=payload,
+            current_user=current_user,
+        )
+    except SQLAlchemyError:
+        # rolled back by the repository
+        logger.exception(messages.CUSTOMER_CREATE_ERROR)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_CREATE_ERROR)
+    if new_customer is None:
+        logger.exception(messages.CUSTOMER_ID_ALREADY_EXISTS)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_ID_ALREADY_EXISTS)
+
+
+@api_customers_async.get(
+    path="/export",
+    description="Export all customers as NDJSON or CSV. The file is streamed, so it can be as big as the table.",
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def export(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        export_format: CustomerExportFormat = Query(CustomerExportFormat.NDJSON, alias="format"),
+        only_actives: Optional[bool] = True,
+) -> StreamingResponse:
+    customers = customer_repository.iter_all(
+        db_session=db_session,
+        only_actives=only_actives,
+        batch_size=EXPORT_BATCH_SIZE,
+    )
+    return StreamingResponse(
+        content=_export(customers=customers, export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=customers.{export_format.value}"},
+    )
+
+
+@api_customers_async.get(
+    path="/cursor",
+    description="List customers using keyset pagination. "
+                "Use the next_cursor of a page to get the next one, the last page has not next_cursor.",
+    response_model=CursorPage[Customer],
+    status_code=HTTPStatus.OK,
+    responses={
+        400: {"description": messages.CURSOR_NOT_VALID},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def get_list_cursor(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        params: CursorParams = Depends(),
+        after: Optional[Tuple[datetime, str]] = Depends(get_customer_keyset),
+        only_actives: Optional[bool] = True,
+) -> CursorPage[Customer]:
+    # ask for one more to know if there is a next page
+    customers = await customer_repository.get_list_keyset(
+        db_session=db_session,
+        only_actives=only_actives,
+        size=params.size + 1,
+        after=after,
+    )
+    next_cursor = None
+    if len(customers) > params.size:
+        customers = customers[:params.size]
+        next_cursor = encode_cursor(customers[-1].dt_created.isoformat(), customers[-1].id)
+
+    total = None
+    if params.include_total:
+        total = await customer_repository.count(db_session=db_session, only_actives=only_actives)
+
+    return CursorPage[Customer](items=customers, size=params.size, next_cursor=next_cursor, total=total)
+
+
+@api_customers_async.get(
+    path="/{customer_id}",
+    description="Get all info about a customer.",
+    response_model=Customer,
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def get_one(
+        *,
+        customer_db: Customer = Depends(get_customer_by_id_async),
+) -> Customer:
+    return customer_db
+
+
+@api_customers_async.get(
+    path="",
+    description="List all customers.",
+    response_model=Page[Customer],
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def get_list(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        params: Params = Depends(),
+        only_actives: Optional[bool] = True,
+) -> Page[Customer]:
+    customers = await customer_repository.get_list(db_session=db_session, only_actives=only_actives)
+    return paginate(customers, params)
+
+
+@api_customers_async.patch(
+    path="/{customer_id}",
+    description="Update customer.",
+    status_code=HTTPStatus.NO_CONTENT,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def update(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        current_user: User = Depends(get_current_user_async),
+        payload: CustomerUpdate,
+        customer_id: str,
+) -> None:
+    updated = await customer_repository.update(
+        db_session=db_session,
+        customer_id=customer_id,
+        new_info=payload,
+        current_user=current_user,
+    )
+    if not updated:
+        logger.exception(f"{messages.CUSTOMER_NOT_FOUND} - ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
+    return Response(status_code=HTTPStatus.NO_CONTENT.value)
+
+
+@api_customers_async.delete(
+    path="/{customer_id}",
+    description="Deactivate a customer.",
+    status_code=HTTPStatus.NO_CONTENT,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+    },
+    dependencies=[Depends(check_authenticated_async)],
+)
+async def delete(
+        *,
+        db_session: AsyncSession = Depends(get_async_db),
+        customer_repository: AsyncCustomerRepository = Depends(get_async_customer_repository),
+        current_user: User = Depends(get_current_user_async),
+        customer_id: str,
+) -> None:
+    updated = await customer_repository.update(
+        db_session=db_session,
+        customer_id=customer_id,
+        new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
+        current_user=current_user,
+    )
+    if not updated:
+        logger.exception(f"{messages.CUSTOMER_NOT_FOUND} - ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
+    return Response(status_code=HTTPStatus.NO_CONTENT.value)
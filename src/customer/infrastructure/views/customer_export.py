@@ -0,0 +1,67 @@
+import csv
+import io
+from typing import Any
+from typing import Optional
+
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerExportFormat
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    CustomerExportFormat.CSV: "text/csv",
+    CustomerExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+class CustomerExportSerializer:
+    """
+    Serialize customers as NDJSON or CSV (with header) in chunks of batch_size customers.
+    """
+
+    def __init__(
+            self,
+            export_format: CustomerExportFormat,
+            batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> None:
+        self.export_format = export_format
+        self.batch_size = batch_size
+        self.count = 0
+        self.buffer = io.StringIO()
+        if export_format == CustomerExportFormat.CSV:
+            self.writer = csv.DictWriter(self.buffer, fieldnames=list(Customer.__fields__))
+            self.writer.writeheader()
+
+    def write(
+            self,
+            customer: Any,
+    ) -> Optional[str]:
+        """
+        Serialize a customer.
+        Return a chunk when the batch is full.
+
+        :param customer: customer, ORM object or Customer
+        :return: chunk or None
+        """
+        customer = Customer.from_orm(customer)
+        if self.export_format == CustomerExportFormat.CSV:
+            self.writer.writerow(customer.dict())
+        else:
+            self.buffer.write(customer.json())
+            self.buffer.write("\n")
+
+        self.count += 1
+        if self.count % self.batch_size == 0:
+            return self.flush()
+        return None
+
+    def flush(self) -> str:
+        """
+        Return the pending chunk.
+
+        :return: chunk
+        """
+        chunk = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return chunk
@@ -1,40 +1,199 @@
+import codecs
+import csv
 import logging
+import time
 from datetime import datetime
 from http import HTTPStatus
+from typing import BinaryIO
+from typing import Callable
+from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Tuple
+from uuid import uuid4
 
 from fastapi import APIRouter
+from fastapi import BackgroundTasks
 from fastapi import Depends
+from fastapi import File
 from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Request
 from fastapi import Response
+from fastapi import UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi_pagination import Page
 from fastapi_pagination import Params
 from fastapi_pagination import paginate
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+import database
 import messages
+import settings
 from customer.depends import get_customer_by_id
+from customer.depends import get_customer_keyset
 from customer.domain.customer import Customer
+from customer.domain.customer import CustomerBulkResult
+from customer.domain.customer import CustomerBulkStatus
 from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerExportFormat
+from customer.domain.customer import CustomerImportRejectedRow
+from customer.domain.customer import CustomerImportReport
+from customer.domain.customer import CustomerPhoto
+from customer.domain.customer import CustomerPhotoStatus
+from customer.domain.customer import CustomerPhotoUpload
 from customer.domain.customer import CustomerUpdate
+from customer.domain.customer import RESERVED_CUSTOMER_IDS
 from customer.domain.customer_repository import CustomerRepository
+from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.models.sqlalchemy_customer import SQLAlchemyCustomer
+from customer.infrastructure.views.customer_export import CustomerExportSerializer
+from customer.infrastructure.views.customer_export import EXPORT_BATCH_SIZE
+from customer.infrastructure.views.customer_export import EXPORT_MEDIA_TYPES
+from customer.photo_spool import PhotoSpoolFull
+from customer.photo_spool import photo_spool
 from database import get_db
+from database import get_read_db
 from depends import check_authenticated
 from depends import get_current_user
 from depends import get_customer_repository
+from depends import get_image_storage_service
+from json_encoding import encode
+from pagination import CursorPage
+from pagination import CursorParams
+from pagination import encode_cursor
+from response_cache import response_cache
 from user.domain.user import User
 
 api_customers = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+IMPORT_REQUIRED_COLUMNS = ("id", "name", "surname")
+IMPORT_MAX_REJECTED_ROWS = 100
+
+# every uploaded photo has its own path, so a derivatives job of an older photo finishing late does not replace the
+# derivatives of a newer one
+PHOTO_PATH = "customer/{customer_id}/photo_{photo_id}"
+PHOTO_UPLOAD_PATH = PHOTO_PATH + ".png"
+PHOTO_ID_REGEX = "^[0-9a-f]{32}$"
+PHOTO_UPLOAD_CONTENT_TYPE = "image/png"
+
+
+def _read_lines(
+        file: BinaryIO,
+) -> Iterator[str]:
+    """
+    Decode the lines of a UTF-8 file.
+
+    :param file: binary file
+    :raise: UnicodeDecodeError if it is not UTF-8, csv.Error if a line has a NUL character
+    :return: lines
+    """
+    for line in codecs.iterdecode(file, "utf-8-sig"):
+        # PostgreSQL does not accept it, and the csv module only rejects it until Python 3.11
+        if "\x00" in line:
+            raise csv.Error("line contains NUL")
+        yield line
+
+
+class _CustomerCsvRows:
+    """
+    Iterate over the valid rows of a customers CSV file, reading it line by line.
+    Keep the count of rows and the rejected ones.
+    A file that is not valid raises UnicodeDecodeError or csv.Error, when it is created or while it is iterated.
+    """
+
+    def __init__(
+            self,
+            file: BinaryIO,
+    ) -> None:
+        self.reader = csv.DictReader(_read_lines(file))
+        if self.reader.fieldnames is None or not set(IMPORT_REQUIRED_COLUMNS) <= set(self.reader.fieldnames):
+            logger.exception(f"{messages.CUSTOMER_IMPORT_CSV_NOT_VALID} - header: {self.reader.fieldnames}")
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_IMPORT_CSV_NOT_VALID)
+        self.rows = 0
+        self.rejected = 0
+        self.rejected_rows = []
+
+    def _reject(
+            self,
+            reason: str,
+    ) -> None:
+        self.rejected += 1
+        if len(self.rejected_rows) < IMPORT_MAX_REJECTED_ROWS:
+            self.rejected_rows.append(CustomerImportRejectedRow(line=self.reader.line_num, reason=reason))
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+        for row in self.reader:
+            self.rows += 1
+            empty = [column for column in IMPORT_REQUIRED_COLUMNS if not (row.get(column) or "").strip()]
+            if empty:
+                self._reject(reason=f"{', '.join(empty)} is empty")
+                continue
+            if row["id"] in RESERVED_CUSTOMER_IDS:
+                self._reject(reason="id is reserved")
+                continue
+            yield row["id"], row["name"], row["surname"], row.get("photo_url") or None
+
+
+def _export(
+        customers: Iterator[Customer],
+        export_format: CustomerExportFormat,
+) -> Iterator[str]:
+    """
+    Serialize customers in chunks for a streaming response.
+
+    :param customers: customers
+    :param export_format: format
+    :return: chunks
+    """
+    serializer = CustomerExportSerializer(export_format=export_format, batch_size=EXPORT_BATCH_SIZE)
+    for customer in customers:
+        chunk = serializer.write(customer)
+        if chunk:
+            yield chunk
+    yield serializer.flush()
+
+
+def _get_cached_page(
+        request: Request,
+        db_session: Session,
+        primary_db_session: Session,
+        key: str,
+        get_page: Callable[[Session], bytes],
+) -> Response:
+    """
+    Get an encoded page of customers from the response cache.
+    The cached pages are computed on the primary, the pages of the clients that skip the cache on the read session.
+    A client that has just written skips it, as it does with the replicas, to read its own writes.
+
+    :param request: request
+    :param db_session: session of the database for the reads
+    :param primary_db_session: session of the primary database
+    :param key: key of the page, from the route and its params
+    :param get_page: function that gets the encoded page with a session
+    :return: response
+    """
+    if settings.RESPONSE_CACHE_TTL_SECONDS <= 0 or database.PRIMARY_COOKIE in request.cookies:
+        body = get_page(db_session)
+    else:
+        body = response_cache.get_or_compute(
+            table=SQLAlchemyCustomer.__tablename__,
+            key=key,
+            db_session=primary_db_session,
+            compute=get_page,
+        )
+    return Response(content=body, media_type="application/json")
+
 
 @api_customers.post(
     path="",
     description="Create a new customer.",
     status_code=HTTPStatus.CREATED,
     responses={
-        400: {"description": messages.CUSTOMER_ID_ALREADY_EXISTS},
+        400: {"description": f"{messages.CUSTOMER_ID_ALREADY_EXISTS} {messages.CUSTOMER_CREATE_ERROR}"},
         401: {"description": messages.USER_NOT_CREDENTIALS},
         403: {"description": messages.USER_NOT_PERMISSION},
     },
@@ -48,12 +207,6 @@ def create(
         current_user: User = Depends(get_current_user),
         payload: CustomerCreate,
 ) -> None:
-    # check the unique id
-    customer_db = customer_repository.get_by_id(db_session=db_session, customer_id=payload.id)
-    if customer_db:
-        logger.exception(messages.CUSTOMER_ID_ALREADY_EXISTS)
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_ID_ALREADY_EXISTS)
-
     # upload photo
     # if payload.photo is not None:
     #    photo_url = image_storage_service.update(
@@ -61,11 +214,195 @@ def create(
     #        image=payload.photo,
     #    )
 
-    # create new customer
-    new_customer = customer_repository.create(db_session=db_session, customer=payload, current_user=current_user)
-    if not new_customer:
+    # create new customer, the unique id is checked by the same statement
+    try:
+        new_customer = customer_repository.create(db_session=db_session, customer=payload, current_user=current_user)
+    except SQLAlchemyError:
+        # rolled back by the repository
         logger.exception(messages.CUSTOMER_CREATE_ERROR)
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_CREATE_ERROR)
+    if new_customer is None:
+        logger.exception(messages.CUSTOMER_ID_ALREADY_EXISTS)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_ID_ALREADY_EXISTS)
+
+
+@api_customers.post(
+    path="/bulk",
+    description="Create a list of new customers. "
+                "Return the result for each customer: created, duplicate (the ID already exists) or error.",
+    response_model=List[CustomerBulkResult],
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def create_bulk(
+        *,
+        db_session: Session = Depends(get_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        current_user: User = Depends(get_current_user),
+        payload: List[CustomerCreate],
+) -> List[CustomerBulkResult]:
+    results = []
+    for start in range(0, len(payload), settings.CUSTOMER_BULK_BATCH_SIZE):
+        batch = payload[start:start + settings.CUSTOMER_BULK_BATCH_SIZE]
+        created_ids = customer_repository.create_many(
+            db_session=db_session,
+            customers=batch,
+            current_user=current_user,
+        )
+        if created_ids is None:
+            logger.exception(f"{messages.CUSTOMER_CREATE_ERROR} - batch: {start}")
+            results.extend(CustomerBulkResult(id=customer.id, status=CustomerBulkStatus.ERROR) for customer in batch)
+            continue
+
+        # an ID repeated in the payload is created only once, the next ones are duplicates
+        created_ids = set(created_ids)
+        for customer in batch:
+            if customer.id in created_ids:
+                created_ids.remove(customer.id)
+                results.append(CustomerBulkResult(id=customer.id, status=CustomerBulkStatus.CREATED))
+            else:
+                results.append(CustomerBulkResult(id=customer.id, status=CustomerBulkStatus.DUPLICATE))
+    return results
+
+
+@api_customers.post(
+    path="/import",
+    description="Import customers from a CSV file with header: id, name, surname and optionally photo_url. "
+                "The file is read line by line and loaded with COPY, the customers whose ID already exists are "
+                "skipped. Return a report with the imported, duplicated and rejected rows.",
+    response_model=CustomerImportReport,
+    status_code=HTTPStatus.OK,
+    responses={
+        400: {"description": messages.CUSTOMER_IMPORT_CSV_NOT_VALID},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def import_csv(
+        *,
+        db_session: Session = Depends(get_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        current_user: User = Depends(get_current_user),
+        file: UploadFile = File(...),
+) -> CustomerImportReport:
+    start = time.perf_counter()
+    try:
+        rows = _CustomerCsvRows(file=file.file)
+        imported = customer_repository.import_many(
+            db_session=db_session,
+            rows=iter(rows),
+            current_user=current_user,
+            chunk_size=settings.CUSTOMER_IMPORT_CHUNK_SIZE,
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        # the rows copied before the error are not imported
+        db_session.rollback()
+        logger.exception(f"{messages.CUSTOMER_IMPORT_CSV_NOT_VALID} - {e}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_IMPORT_CSV_NOT_VALID)
+    if imported is None:
+        logger.exception(messages.CUSTOMER_IMPORT_ERROR)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CUSTOMER_IMPORT_ERROR)
+    seconds = time.perf_counter() - start
+
+    logger.info(f"Customers import: {rows.rows} rows in {seconds:.3f} seconds.")
+    return CustomerImportReport(
+        rows=rows.rows,
+        imported=imported,
+        duplicates=rows.rows - rows.rejected - imported,
+        rejected=rows.rejected,
+        rejected_rows=rows.rejected_rows,
+        seconds=seconds,
+        rows_per_second=rows.rows / seconds if seconds else 0,
+    )
+
+
+@api_customers.get(
+    path="/export",
+    description="Export all customers as NDJSON or CSV. The file is streamed, so it can be as big as the table.",
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def export(
+        *,
+        db_session: Session = Depends(get_read_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        export_format: CustomerExportFormat = Query(CustomerExportFormat.NDJSON, alias="format"),
+        only_actives: Optional[bool] = True,
+) -> StreamingResponse:
+    customers = customer_repository.iter_all(
+        db_session=db_session,
+        only_actives=only_actives,
+        batch_size=EXPORT_BATCH_SIZE,
+    )
+    return StreamingResponse(
+        content=_export(customers=customers, export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=customers.{export_format.value}"},
+    )
+
+
+@api_customers.get(
+    path="/cursor",
+    description="List customers using keyset pagination. "
+                "Use the next_cursor of a page to get the next one, the last page has not next_cursor.",
+    response_model=CursorPage[Customer],
+    status_code=HTTPStatus.OK,
+    responses={
+        400: {"description": messages.CURSOR_NOT_VALID},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def get_list_cursor(
+        *,
+        request: Request,
+        db_session: Session = Depends(get_read_db),
+        primary_db_session: Session = Depends(get_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        params: CursorParams = Depends(),
+        after: Optional[Tuple[datetime, str]] = Depends(get_customer_keyset),
+        only_actives: Optional[bool] = True,
+) -> Response:
+    def _get_page(session: Session) -> bytes:
+        # ask for one more to know if there is a next page
+        customers = customer_repository.get_list_keyset(
+            db_session=session,
+            only_actives=only_actives,
+            size=params.size + 1,
+            after=after,
+        )
+        next_cursor = None
+        if len(customers) > params.size:
+            customers = customers[:params.size]
+            next_cursor = encode_cursor(customers[-1].dt_created.isoformat(), customers[-1].id)
+
+        total = None
+        if params.include_total:
+            total = customer_repository.count(db_session=session, only_actives=only_actives)
+
+        page = CursorPage[Customer](items=customers, size=params.size, next_cursor=next_cursor, total=total)
+        return encode(page)
+
+    key = f"cursor:{only_actives}:{params.size}:{params.include_total}:{params.cursor}"
+    return _get_cached_page(
+        request=request,
+        db_session=db_session,
+        primary_db_session=primary_db_session,
+        key=key,
+        get_page=_get_page,
+    )
 
 
 @api_customers.get(
@@ -101,13 +438,32 @@ def get_one(
 )
 def get_list(
         *,
-        db_session: Session = Depends(get_db),
+        request: Request,
+        db_session: Session = Depends(get_read_db),
+        primary_db_session: Session = Depends(get_db),
         customer_repository: CustomerRepository = Depends(get_customer_repository),
         params: Params = Depends(),
         only_actives: Optional[bool] = True,
-) -> Page[Customer]:
-    customers = customer_repository.get_list(db_session=db_session, only_actives=only_actives)
-    return paginate(customers, params)
+) -> Response:
+    def _get_page(session: Session) -> bytes:
+        customers = customer_repository.get_list(db_session=session, only_actives=only_actives)
+        page = paginate(customers, params)
+        page = Page[Customer](
+            items=[Customer.from_orm(customer) for customer in page.items],
+            total=page.total,
+            page=page.page,
+            size=page.size,
+        )
+        return encode(page)
+
+    key = f"list:{only_actives}:{params.page}:{params.size}"
+    return _get_cached_page(
+        request=request,
+        db_session=db_session,
+        primary_db_session=primary_db_session,
+        key=key,
+        get_page=_get_page,
+    )
 
 
 @api_customers.patch(
@@ -128,7 +484,6 @@ def update(
         customer_repository: CustomerRepository = Depends(get_customer_repository),
         # image_storage_service: ImageStorageService = Depends(get_image_storage_service),
         current_user: User = Depends(get_current_user),
-        customer: Customer = Depends(get_customer_by_id),
         payload: CustomerUpdate,
         customer_id: str,
 ) -> None:
@@ -139,12 +494,15 @@ def update(
     #        image=payload.photo,
     #    )
 
-    customer_repository.update(
+    updated = customer_repository.update(
         db_session=db_session,
         customer_id=customer_id,
         new_info=payload,
         current_user=current_user,
     )
+    if not updated:
+        logger.exception(f"{messages.CUSTOMER_NOT_FOUND} - ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
     return Response(status_code=HTTPStatus.NO_CONTENT.value)
 
 
@@ -164,13 +522,239 @@ def delete(
         db_session: Session = Depends(get_db),
         customer_repository: CustomerRepository = Depends(get_customer_repository),
         current_user: User = Depends(get_current_user),
-        customer: Customer = Depends(get_customer_by_id),
         customer_id: str,
 ) -> None:
-    customer_repository.update(
+    updated = customer_repository.update(
         db_session=db_session,
         customer_id=customer_id,
         new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
         current_user=current_user,
     )
+    if not updated:
+        logger.exception(f"{messages.CUSTOMER_NOT_FOUND} - ID: {customer_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.CUSTOMER_NOT_FOUND)
     return Response(status_code=HTTPStatus.NO_CONTENT.value)
+
+
+def _create_photo_derivatives(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        customer_id: str,
+        path: str,
+        photo_url: str,
+) -> None:
+    """
+    Generate the derivatives of a photo after the response is sent, and set them to the customer.
+    It runs before the session of the request is closed.
+    """
+    try:
+        photo_derivatives = image_storage_service.create_derivatives(path=path)
+    except Exception:
+        # the customer keeps its photo without derivatives
+        logger.exception(f"Photo derivatives of \"{path}\" failed.")
+        return
+    customer_repository.update_photo_derivatives(
+        db_session=db_session,
+        customer_id=customer_id,
+        photo_url=photo_url,
+        photo_derivatives=photo_derivatives,
+    )
+
+
+def _spool_photo(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        current_user: User,
+        customer_db: Customer,
+        photo: UploadFile,
+        response: Response,
+) -> CustomerPhoto:
+    """
+    Write a photo to the spool and set it pending to the customer, the spool worker stores it afterwards.
+    """
+    path = PHOTO_PATH.format(customer_id=customer_db.id, photo_id=uuid4().hex)
+    photo_url = image_storage_service.get_url(path=path)
+    # pending before it is spooled, so the worker finds it even if it takes the job at once
+    customer_repository.update_photo(
+        db_session=db_session,
+        customer_id=customer_db.id,
+        photo_url=photo_url,
+        photo_status=CustomerPhotoStatus.pending,
+        current_user=current_user,
+    )
+    try:
+        photo_spool.enqueue(
+            customer_id=customer_db.id,
+            path=path,
+            photo_url=photo_url,
+            file=photo.file,
+            content_type=photo.content_type,
+        )
+    except (PhotoSpoolFull, OSError) as e:
+        # without a job nothing would finish the pending photo
+        detail = messages.PHOTO_SPOOL_FULL if isinstance(e, PhotoSpoolFull) else messages.PHOTO_SPOOL_ERROR
+        logger.exception(detail)
+        customer_repository.update_photo_status(
+            db_session=db_session,
+            customer_id=customer_db.id,
+            photo_url=photo_url,
+            photo_status=CustomerPhotoStatus.failed,
+        )
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=detail)
+
+    response.status_code = HTTPStatus.ACCEPTED
+    return CustomerPhoto(photo_url=photo_url, photo_status=CustomerPhotoStatus.pending)
+
+
+@api_customers.put(
+    path="/{customer_id}/photo",
+    description="Upload the photo of a customer as multipart/form-data. "
+                "The file is streamed to the storage, big files as a multipart upload. "
+                "The resized derivatives of the photo are generated in the background. "
+                "With the photo spool, the photo is stored in the background and its status is pending meanwhile.",
+    response_model=CustomerPhoto,
+    status_code=HTTPStatus.OK,
+    responses={
+        202: {"description": "Photo spooled, its status is pending."},
+        400: {"description": messages.PHOTO_NOT_VALID},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+        503: {"description": f"{messages.PHOTO_SPOOL_FULL} {messages.PHOTO_SPOOL_ERROR}"},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def upload_photo(
+        *,
+        db_session: Session = Depends(get_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        image_storage_service: ImageStorageService = Depends(get_image_storage_service),
+        current_user: User = Depends(get_current_user),
+        customer_db: Customer = Depends(get_customer_by_id),
+        photo: UploadFile = File(...),
+        background_tasks: BackgroundTasks,
+        response: Response,
+) -> CustomerPhoto:
+    if not (photo.content_type or "").startswith("image/"):
+        logger.exception(f"{messages.PHOTO_NOT_VALID} - content type: {photo.content_type}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.PHOTO_NOT_VALID)
+
+    if settings.PHOTO_SPOOL_ENABLED:
+        return _spool_photo(
+            db_session=db_session,
+            customer_repository=customer_repository,
+            image_storage_service=image_storage_service,
+            current_user=current_user,
+            customer_db=customer_db,
+            photo=photo,
+            response=response,
+        )
+
+    # the upload is spooled to disk by starlette, it is never whole in memory
+    path = PHOTO_PATH.format(customer_id=customer_db.id, photo_id=uuid4().hex)
+    image_storage_service.upload_stream(path=path, file=photo.file, content_type=photo.content_type)
+
+    photo_url = image_storage_service.get_url(path=path)
+    customer_repository.update_photo(
+        db_session=db_session,
+        customer_id=customer_db.id,
+        photo_url=photo_url,
+        photo_status=None,
+        current_user=current_user,
+    )
+    background_tasks.add_task(
+        _create_photo_derivatives,
+        db_session=db_session,
+        customer_repository=customer_repository,
+        image_storage_service=image_storage_service,
+        customer_id=customer_db.id,
+        path=path,
+        photo_url=photo_url,
+    )
+    return CustomerPhoto(photo_url=photo_url)
+
+
+@api_customers.post(
+    path="/{customer_id}/photo/upload-url",
+    description="Get a presigned URL to upload the photo of a customer straight to the storage with a PUT, sending "
+                "the returned content type. Confirm the upload afterwards with the returned photo ID to set the "
+                "photo URL of the customer.",
+    response_model=CustomerPhotoUpload,
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+        501: {"description": messages.IMAGE_UPLOAD_URL_NOT_SUPPORTED},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def get_photo_upload_url(
+        *,
+        image_storage_service: ImageStorageService = Depends(get_image_storage_service),
+        customer_db: Customer = Depends(get_customer_by_id),
+) -> CustomerPhotoUpload:
+    photo_id = uuid4().hex
+    upload_url = image_storage_service.get_upload_url(
+        path=PHOTO_UPLOAD_PATH.format(customer_id=customer_db.id, photo_id=photo_id),
+        content_type=PHOTO_UPLOAD_CONTENT_TYPE,
+        expires_in=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS,
+    )
+    return CustomerPhotoUpload(
+        photo_id=photo_id,
+        upload_url=upload_url,
+        content_type=PHOTO_UPLOAD_CONTENT_TYPE,
+        expires_in=settings.S3_PRESIGNED_URL_EXPIRE_SECONDS,
+    )
+
+
+@api_customers.post(
+    path="/{customer_id}/photo/confirm",
+    description="Set the photo URL of a customer once the photo is uploaded to its presigned URL, with the photo ID "
+                "returned with it. "
+                "The resized derivatives of the photo are generated in the background.",
+    response_model=CustomerPhoto,
+    status_code=HTTPStatus.OK,
+    responses={
+        400: {"description": messages.PHOTO_NOT_UPLOADED},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.CUSTOMER_NOT_FOUND},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def confirm_photo_upload(
+        *,
+        db_session: Session = Depends(get_db),
+        customer_repository: CustomerRepository = Depends(get_customer_repository),
+        image_storage_service: ImageStorageService = Depends(get_image_storage_service),
+        current_user: User = Depends(get_current_user),
+        customer_db: Customer = Depends(get_customer_by_id),
+        photo_id: str = Query(..., regex=PHOTO_ID_REGEX),
+        background_tasks: BackgroundTasks,
+) -> CustomerPhoto:
+    path = PHOTO_UPLOAD_PATH.format(customer_id=customer_db.id, photo_id=photo_id)
+    if not image_storage_service.exists(path=path):
+        logger.exception(f"{messages.PHOTO_NOT_UPLOADED} - ID: {customer_db.id}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.PHOTO_NOT_UPLOADED)
+
+    photo_url = image_storage_service.get_url(path=path)
+    customer_repository.update_photo(
+        db_session=db_session,
+        customer_id=customer_db.id,
+        photo_url=photo_url,
+        photo_status=None,
+        current_user=current_user,
+    )
+    background_tasks.add_task(
+        _create_photo_derivatives,
+        db_session=db_session,
+        customer_repository=customer_repository,
+        image_storage_service=image_storage_service,
+        customer_id=customer_db.id,
+        path=path,
+        photo_url=photo_url,
+    )
+    return CustomerPhoto(photo_url=photo_url)
@@ -0,0 +1,370 @@
+import json
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from typing import BinaryIO
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import settings
+from customer.domain.customer import CustomerPhotoStatus
+from customer.domain.customer_repository import CustomerRepository
+from customer.domain.image_storage_service import ImageStorageService
+from database import SessionLocal
+from depends import get_customer_repository
+from depends import get_image_storage_service
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class PhotoSpoolFull(Exception):
+    """
+    The spool has too many pending jobs.
+    """
+
+
+class PhotoSpool:
+    """
+    Local on-disk queue of photos to store in the ImageStorageService, so the requests do not wait for the storage.
+
+    Every job is a "<job ID>.bin" file with the photo and a "<job ID>.json" file with its metadata in the pending
+    directory, both written to a temporary file and renamed. A worker takes a job renaming its metadata to
+    "<job ID>.claimed", so several processes can share the spool. A failed job is retried with exponential backoff,
+    after the max attempts it is moved to the failed directory. After consecutive failures the circuit breaker opens
+    and the storage is not called for a while, then a single job is tried again.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_jobs: int,
+            max_attempts: int,
+            backoff_seconds: float,
+            backoff_max_seconds: float,
+            breaker_failures: int,
+            breaker_seconds: float,
+            claim_timeout_seconds: float,
+    ) -> None:
+        self.pending_directory = os.path.join(path, "pending")
+        self.failed_directory = os.path.join(path, "failed")
+        self.max_jobs = max_jobs
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker_failures = breaker_failures
+        self.breaker_seconds = breaker_seconds
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.counters = dict(enqueued=0, stored=0, retried=0, failed=0, breaker_opened=0)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _write_job(
+            self,
+            job: Dict,
+            job_path: str,
+    ) -> None:
+        tmp_path = os.path.join(self.pending_directory, f".{job['id']}.json.tmp")
+        with open(tmp_path, "w") as tmp_file:
+            json.dump(job, tmp_file)
+        os.replace(tmp_path, job_path)
+
+    def _count_jobs(self) -> int:
+        return sum(1 for name in os.listdir(self.pending_directory) if name.endswith((".json", ".claimed")))
+
+    def enqueue(
+            self,
+            customer_id: str,
+            path: str,
+            photo_url: str,
+            file: BinaryIO,
+            content_type: str,
+    ) -> str:
+        """
+        Write a photo to the spool.
+
+        :param customer_id: customer's ID
+        :param path: path of the photo in the storage
+        :param photo_url: URL of the photo once it is stored
+        :param file: binary file
+        :param content_type: MIME type of the photo
+        :raise: PhotoSpoolFull if the spool has PHOTO_SPOOL_MAX_JOBS jobs
+        :return: job ID
+        """
+        os.makedirs(self.pending_directory, exist_ok=True)
+        if self._count_jobs() >= self.max_jobs:
+            raise PhotoSpoolFull()
+
+        # the jobs are taken in order of creation
+        job_id = f"{time.time_ns()}-{uuid4().hex}"
+        tmp_path = os.path.join(self.pending_directory, f".{job_id}.bin.tmp")
+        with open(tmp_path, "wb") as tmp_file:
+            shutil.copyfileobj(file, tmp_file, CHUNK_SIZE)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, os.path.join(self.pending_directory, f"{job_id}.bin"))
+
+        job = dict(
+            id=job_id,
+            customer_id=customer_id,
+            path=path,
+            photo_url=photo_url,
+            content_type=content_type,
+            attempts=0,
+            next_attempt_at=0.0,
+        )
+        self._write_job(job=job, job_path=os.path.join(self.pending_directory, f"{job_id}.json"))
+        with self.lock:
+            self.counters["enqueued"] += 1
+        logger.info(f"Photo \"{path}\" spooled as job \"{job_id}\".")
+        return job_id
+
+    def _release_stale_claims(self) -> None:
+        limit = time.time() - self.claim_timeout_seconds
+        for name in os.listdir(self.pending_directory):
+            if not name.endswith(".claimed"):
+                continue
+            claim_path = os.path.join(self.pending_directory, name)
+            try:
+                if os.stat(claim_path).st_mtime < limit:
+                    os.rename(claim_path, f"{claim_path[:-len('.claimed')]}.json")
+                    logger.warning(f"Photo spool job \"{name}\" released, its worker did not finish it.")
+            except FileNotFoundError:
+                pass
+
+    def _claim(self) -> Optional[Tuple[str, Dict]]:
+        now = time.time()
+        for name in sorted(os.listdir(self.pending_directory)):
+            if not name.endswith(".json") or name.startswith("."):
+                continue
+            job_path = os.path.join(self.pending_directory, name)
+            claim_path = f"{job_path[:-len('.json')]}.claimed"
+            try:
+                with open(job_path) as job_file:
+                    job = json.load(job_file)
+                if job["next_attempt_at"] > now:
+                    continue
+                # only one worker renames it, the others get FileNotFoundError
+                os.rename(job_path, claim_path)
+                os.utime(claim_path)
+            except FileNotFoundError:
+                continue
+            return claim_path, job
+        return None
+
+    def _is_open(self) -> bool:
+        with self.lock:
+            return time.monotonic() < self.open_until
+
+    def _record_success(self) -> None:
+        with self.lock:
+            self.consecutive_failures = 0
+            self.counters["stored"] += 1
+
+    def _record_failure(self) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            # closed again after a successful job, a failure meanwhile opens it again
+            if self.consecutive_failures >= self.breaker_failures:
+                self.open_until = time.monotonic() + self.breaker_seconds
+                self.counters["breaker_opened"] += 1
+                logger.warning(f"Photo spool circuit breaker open for {self.breaker_seconds} seconds.")
+
+    def _fail(
+            self,
+            db_session: Session,
+            customer_repository: CustomerRepository,
+            claim_path: str,
+            job: Dict,
+    ) -> None:
+        self._record_failure()
+        job["attempts"] += 1
+        if job["attempts"] < self.max_attempts:
+            backoff = min(self.backoff_seconds * 2 ** (job["attempts"] - 1), self.backoff_max_seconds)
+            # jitter, so the jobs of an outage are not retried all at once
+            job["next_attempt_at"] = time.time() + backoff * random.uniform(0.5, 1)
+            self._write_job(job=job, job_path=claim_path)
+            os.rename(claim_path, f"{claim_path[:-len('.claimed')]}.json")
+            with self.lock:
+                self.counters["retried"] += 1
+            return
+
+        logger.error(f"Photo \"{job['path']}\" not stored after {job['attempts']} attempts.")
+        # the job is moved once the status is committed, otherwise its claim is released and it is tried again
+        customer_repository.update_photo_status(
+            db_session=db_session,
+            customer_id=job["customer_id"],
+            photo_url=job["photo_url"],
+            photo_status=CustomerPhotoStatus.failed,
+        )
+        os.makedirs(self.failed_directory, exist_ok=True)
+        os.replace(
+            os.path.join(self.pending_directory, f"{job['id']}.bin"),
+            os.path.join(self.failed_directory, f"{job['id']}.bin"),
+        )
+        os.replace(claim_path, os.path.join(self.failed_directory, f"{job['id']}.json"))
+        with self.lock:
+            self.counters["failed"] += 1
+
+    def _create_derivatives(
+            self,
+            db_session: Session,
+            customer_repository: CustomerRepository,
+            image_storage_service: ImageStorageService,
+            job: Dict,
+    ) -> None:
+        try:
+            photo_derivatives = image_storage_service.create_derivatives(path=job["path"])
+        except Exception:
+            logger.exception(f"Photo derivatives of \"{job['path']}\" failed.")
+            return
+        customer_repository.update_photo_derivatives(
+            db_session=db_session,
+            customer_id=job["customer_id"],
+            photo_url=job["photo_url"],
+            photo_derivatives=photo_derivatives,
+        )
+
+    def process(
+            self,
+            db_session: Session,
+            customer_repository: CustomerRepository,
+            image_storage_service: ImageStorageService,
+    ) -> int:
+        """
+        Store the jobs that are due, until there are no more or the circuit breaker opens.
+
+        :param db_session: session of the database
+        :param customer_repository: customer repository
+        :param image_storage_service: image storage service
+        :return: number of photos stored
+        """
+        os.makedirs(self.pending_directory, exist_ok=True)
+        self._release_stale_claims()
+        stored = 0
+        while not self._is_open():
+            claimed = self._claim()
+            if claimed is None:
+                break
+            claim_path, job = claimed
+            bin_path = os.path.join(self.pending_directory, f"{job['id']}.bin")
+            try:
+                with open(bin_path, "rb") as file:
+                    image_storage_service.upload_stream(path=job["path"], file=file, content_type=job["content_type"])
+            except Exception:
+                logger.exception(f"Photo \"{job['path']}\" not stored, attempt {job['attempts'] + 1}.")
+                self._fail(
+                    db_session=db_session,
+                    customer_repository=customer_repository,
+                    claim_path=claim_path,
+                    job=job,
+                )
+                continue
+
+            self._record_success()
+            try:
+                updated = customer_repository.update_photo_status(
+                    db_session=db_session,
+                    customer_id=job["customer_id"],
+                    photo_url=job["photo_url"],
+                    photo_status=None,
+                )
+            except SQLAlchemyError:
+                # the job is kept and stored again on the next poll
+                logger.exception(f"Photo status of \"{job['path']}\" not updated.")
+                os.rename(claim_path, f"{claim_path[:-len('.claimed')]}.json")
+                break
+
+            # deleted once the status is committed, so a failure does not lose the job
+            os.unlink(bin_path)
+            os.unlink(claim_path)
+            stored += 1
+            # otherwise the customer has another photo or it was deleted
+            if updated:
+                self._create_derivatives(
+                    db_session=db_session,
+                    customer_repository=customer_repository,
+                    image_storage_service=image_storage_service,
+                    job=job,
+                )
+        return stored
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            db_session = SessionLocal()
+            try:
+                self.process(
+                    db_session=db_session,
+                    customer_repository=get_customer_repository(),
+                    image_storage_service=get_image_storage_service(),
+                )
+            except Exception:
+                logger.exception("Photo spool worker failed.")
+            finally:
+                db_session.close()
+            self._stop.wait(settings.PHOTO_SPOOL_POLL_SECONDS)
+
+    def start(self) -> None:
+        """
+        Start the background thread that stores the photos of the spool.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="photo-spool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread, the pending jobs stay in the spool.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.PHOTO_SPOOL_POLL_SECONDS + 5)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """
+        Return the counters, the jobs in the spool and the state of the circuit breaker.
+
+        :return: stats
+        """
+        pending = self._count_jobs() if os.path.isdir(self.pending_directory) else 0
+        failed = len(os.listdir(self.failed_directory)) // 2 if os.path.isdir(self.failed_directory) else 0
+        with self.lock:
+            return dict(
+                **self.counters,
+                pending=pending,
+                failed_jobs=failed,
+                breaker_open=time.monotonic() < self.open_until,
+            )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+photo_spool = PhotoSpool(
+    path=settings.PHOTO_SPOOL_PATH,
+    max_jobs=settings.PHOTO_SPOOL_MAX_JOBS,
+    max_attempts=settings.PHOTO_SPOOL_MAX_ATTEMPTS,
+    backoff_seconds=settings.PHOTO_SPOOL_BACKOFF_SECONDS,
+    backoff_max_seconds=settings.PHOTO_SPOOL_BACKOFF_MAX_SECONDS,
+    breaker_failures=settings.PHOTO_SPOOL_BREAKER_FAILURES,
+    breaker_seconds=settings.PHOTO_SPOOL_BREAKER_SECONDS,
+    claim_timeout_seconds=settings.PHOTO_SPOOL_CLAIM_TIMEOUT_SECONDS,
+)
@@ -1,21 +1,133 @@
+import itertools
 import logging
+import math
+import threading
+import time
+from http import HTTPStatus
 from typing import Any
+from typing import Callable
+from typing import Optional
 
+from fastapi import Depends
+from fastapi import Request
+from fastapi import Response
 from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import QueuePool
 
+import pool_metrics
 import settings
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(settings.DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+)
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=pool_metrics.metered_pool_class(QueuePool),
+    **POOL_OPTIONS,
+)
+pool_metrics.register("primary", engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# the async engine is only used by the async def views, so it is created on first use
+_async_session_local: Optional[sessionmaker] = None
+_async_session_local_lock = threading.Lock()
+
 Base = declarative_base()
 
+# cookie set after a write, while present the client reads from the primary
+PRIMARY_COOKIE = "read_primary"
+
+# 0 for a primary or a replica that has replayed everything it received
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class Replica:
+    """
+    Read replica. Its replication lag is checked at most every DATABASE_REPLICA_LAG_CHECK_SECONDS.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            url: str,
+    ) -> None:
+        self.engine = create_engine(url, poolclass=pool_metrics.metered_pool_class(QueuePool), **POOL_OPTIONS)
+        pool_metrics.register(name, self.engine)
+        self.session_local = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def get_lag(self) -> Optional[float]:
+        """
+        Query the replication lag.
+
+        :return: seconds, None if the replica is not reachable
+        """
+        try:
+            with self.engine.connect() as connection:
+                return float(connection.execute(text(REPLICA_LAG_SQL)).scalar())
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            return None
+
+    def is_healthy(self) -> bool:
+        """
+        Return True if the replica is reachable and its lag is under DATABASE_REPLICA_MAX_LAG_SECONDS.
+        Only one thread checks the lag, the others use the last known one.
+        """
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= settings.DATABASE_REPLICA_LAG_CHECK_SECONDS:
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.lag = self.get_lag()
+                    self.checked_at = now
+                finally:
+                    self.lock.release()
+        return self.lag is not None and self.lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+
+
+replicas = [Replica(name=f"replica-{i}", url=url) for i, url in enumerate(settings.DATABASE_REPLICA_URLS)]
+
+_next_replica = itertools.count()
+
+
+def get_replica() -> Optional[Replica]:
+    """
+    Choose a healthy replica, round robin.
+
+    :return: replica, None if there is not any healthy
+    """
+    start = next(_next_replica)
+    for i in range(len(replicas)):
+        replica = replicas[(start + i) % len(replicas)]
+        if replica.is_healthy():
+            return replica
+    return None
+
 
 # Dependency
 def get_db() -> SessionLocal:
@@ -26,6 +138,78 @@ def get_db() -> SessionLocal:
         db.close()
 
 
+def get_read_db(
+        request: Request,
+        db_session: Session = Depends(get_db),
+) -> Session:
+    """
+    Session for the read only routes: a healthy replica, or the primary if there is not any or the client has just
+    written. The primary session is lazy, it does not connect if it is not used.
+    """
+    replica = None if PRIMARY_COOKIE in request.cookies else get_replica()
+    if replica is None:
+        yield db_session
+        return
+
+    db = replica.session_local()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def read_your_writes(
+        request: Request,
+        call_next: Callable,
+) -> Response:
+    """
+    Middleware that keeps a client that has just written on the primary until the replicas have caught up.
+    """
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < HTTPStatus.BAD_REQUEST:
+        max_age = math.ceil(settings.DATABASE_REPLICA_MAX_LAG_SECONDS)
+        response.set_cookie(PRIMARY_COOKIE, "1", max_age=max_age, httponly=True)
+    return response
+
+
+def get_async_database_url() -> URL:
+    """
+    URL of the async engine: ASYNC_DATABASE_URL, or DATABASE_URL with the asyncpg driver.
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+
+def get_async_session_local() -> sessionmaker:
+    """
+    Get the async session factory of the process, its engine is created on first use.
+    """
+    global _async_session_local
+    with _async_session_local_lock:
+        if _async_session_local is None:
+            async_engine = create_async_engine(
+                get_async_database_url(),
+                poolclass=pool_metrics.metered_pool_class(AsyncAdaptedQueuePool),
+                **POOL_OPTIONS,
+            )
+            pool_metrics.register("async", async_engine.sync_engine)
+            # the async session can not lazy load expired attributes, so they are kept after commit
+            _async_session_local = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                expire_on_commit=False,
+                bind=async_engine,
+                class_=AsyncSession,
+            )
+        return _async_session_local
+
+
+async def get_async_db() -> AsyncSession:
+    async with get_async_session_local()() as db:
+        yield db
+
+
 def save(
         db_session: Session,
         obj: Any,
@@ -1,28 +1,54 @@
+import hmac
 import logging
 from http import HTTPStatus
 from typing import Optional
+from typing import Tuple
 from uuid import UUID
 
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi.security import APIKeyHeader
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import messages
 import settings
+from customer.customer_cache import customer_cache
+from customer.customer_cache import customer_single_flight
+from customer.domain.async_customer_repository import AsyncCustomerRepository
 from customer.domain.customer import Customer
 from customer.domain.customer_repository import CustomerRepository
 from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.repositories.cached_async_customer_repository import CachedAsyncCustomerRepository
+from customer.infrastructure.repositories.cached_customer_repository import CachedCustomerRepository
+from customer.infrastructure.repositories.sqlalchemy_async_customer_repository import SQLAlchemyAsyncCustomerRepository
 from customer.infrastructure.repositories.sqlalchemy_customer_repository import SQLAlchemyCustomerRepository
 from customer.infrastructure.services.aws_s3_image_storage_service import AWSS3ImageStorageService
+from customer.infrastructure.services.filesystem_image_storage_service import FileSystemImageStorageService
+from database import get_async_db
 from database import get_db
+from response_cache import response_cache
+from user import token_epochs
+from user.domain.api_key import ApiKey
+from user.domain.api_key_repository import ApiKeyRepository
+from user.domain.async_api_key_repository import AsyncApiKeyRepository
+from user.domain.async_user_repository import AsyncUserRepository
 from user.domain.auth import AuthTokenPayload
-from user.domain.user import User
+from user.domain.refresh_token_repository import RefreshTokenRepository
+from user.domain.user import CurrentUser
 from user.domain.user_repository import UserRepository
+from user.infrastructure.repositories.sqlalchemy_api_key_repository import SQLAlchemyApiKeyRepository
+from user.infrastructure.repositories.sqlalchemy_async_api_key_repository import SQLAlchemyAsyncApiKeyRepository
+from user.infrastructure.repositories.sqlalchemy_async_user_repository import SQLAlchemyAsyncUserRepository
+from user.infrastructure.repositories.sqlalchemy_refresh_token_repository import SQLAlchemyRefreshTokenRepository
 from user.infrastructure.repositories.sqlalchemy_user_repository import SQLAlchemyUserRepository
+from user.security import API_KEY_PREFIX
+from user.security import parse_api_key
+from user.token_epochs import TokenEpoch
 
 logger = logging.getLogger(__name__)
 
@@ -32,14 +58,48 @@ def get_user_repository() -> UserRepository:
 
 
 def get_customer_repository() -> CustomerRepository:
-    return SQLAlchemyCustomerRepository()
+    return CachedCustomerRepository(
+        repository=SQLAlchemyCustomerRepository(),
+        cache=customer_cache,
+        response_cache=response_cache,
+        single_flight=customer_single_flight,
+    )
+
+
+def get_refresh_token_repository() -> RefreshTokenRepository:
+    return SQLAlchemyRefreshTokenRepository()
+
+
+def get_api_key_repository() -> ApiKeyRepository:
+    return SQLAlchemyApiKeyRepository()
+
+
+def get_async_user_repository() -> AsyncUserRepository:
+    return SQLAlchemyAsyncUserRepository()
+
+
+def get_async_customer_repository() -> AsyncCustomerRepository:
+    return CachedAsyncCustomerRepository(
+        repository=SQLAlchemyAsyncCustomerRepository(),
+        cache=customer_cache,
+        response_cache=response_cache,
+        single_flight=customer_single_flight,
+    )
+
+
+def get_async_api_key_repository() -> AsyncApiKeyRepository:
+    return SQLAlchemyAsyncApiKeyRepository()
 
 
 def get_image_storage_service() -> ImageStorageService:
+    if settings.IMAGE_STORAGE_BACKEND == "filesystem":
+        return FileSystemImageStorageService()
     return AWSS3ImageStorageService()
 
 
-reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/token")
+# the credentials can be an access token or an API key, get_api_key checks that there is one of them
+reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
 def str_to_uuid(
@@ -62,35 +122,181 @@ def str_to_uuid(
     return result
 
 
+def decode_access_token(
+        token: str,
+) -> AuthTokenPayload:
+    """
+    Decode and validate an access token.
+
+    :param token: access token
+    :raise: HTTPException if the token is not valid
+    :return: payload
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        return AuthTokenPayload(**payload)
+    except (JWTError, ValidationError) as e:
+        logger.exception(str(e))
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.USER_NOT_CREDENTIALS)
+
+
+def get_api_key(
+        token: Optional[str] = Depends(reusable_oauth2),
+        api_key: Optional[str] = Depends(api_key_header),
+) -> Optional[Tuple[str, str]]:
+    """
+    Get the API key of the request, from the X-API-Key header or as Bearer token.
+
+    :param token: Bearer token, an access token or an API key
+    :param api_key: X-API-Key header
+    :raise: HTTPException if there are not credentials or the API key is not valid
+    :return: prefix and digest of the API key, None if the credential is an access token
+    """
+    if api_key is None and token and token.startswith(API_KEY_PREFIX):
+        api_key = token
+
+    if api_key is None:
+        if token is None:
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail=messages.USER_NOT_AUTHENTICATED,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return None
+
+    parsed = parse_api_key(api_key=api_key)
+    if parsed is None:
+        logger.exception(messages.USER_NOT_CREDENTIALS)
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.USER_NOT_CREDENTIALS)
+    return parsed
+
+
+def check_api_key(
+        api_key: Tuple[str, str],
+        api_key_db: Optional[ApiKey],
+) -> CurrentUser:
+    """
+    Check an API key against the persisted one with its prefix.
+
+    :param api_key: prefix and digest of the API key
+    :param api_key_db: persisted API key
+    :raise: HTTPException if the key is not valid or revoked, or its user is deleted
+    :return: current user, owner of the key
+    """
+    if api_key_db is None or api_key_db.dt_revoked or not hmac.compare_digest(api_key_db.key_hash, api_key[1]):
+        logger.exception(f"{messages.USER_NOT_CREDENTIALS} - API key: {api_key[0]}")
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.USER_NOT_CREDENTIALS)
+
+    if api_key_db.user.dt_deleted:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+
+    return CurrentUser(id=api_key_db.user.id, username=api_key_db.user.username, is_admin=api_key_db.user.is_admin)
+
+
+def check_token_epoch(
+        token_data: AuthTokenPayload,
+        token_epoch: TokenEpoch,
+) -> CurrentUser:
+    """
+    Check the claims of an access token against the token epoch of its user.
+
+    :param token_data: payload of the access token
+    :param token_epoch: token epoch of the user
+    :raise: HTTPException if the user is deleted or the token is from a previous epoch
+    :return: current user
+    """
+    if not token_epoch.is_active:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+
+    if token_epoch.epoch != token_data.epoch:
+        logger.exception(f"{messages.USER_NOT_CREDENTIALS} - ID: {token_data.uid}")
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.USER_NOT_CREDENTIALS)
+
+    return CurrentUser(id=token_data.uid, username=token_data.sub, is_admin=token_data.is_admin)
+
+
 def get_current_user(
         db_session: Session = Depends(get_db),
         user_repository: UserRepository = Depends(get_user_repository),
-        token: str = Depends(reusable_oauth2),
-) -> User:
+        api_key_repository: ApiKeyRepository = Depends(get_api_key_repository),
+        api_key: Optional[Tuple[str, str]] = Depends(get_api_key),
+        token: Optional[str] = Depends(reusable_oauth2),
+) -> CurrentUser:
     """
-    Get current user.
+    Get current user from an API key, or from the claims of the access token.
+    The user is only read when its token epoch is not known by this worker, or for legacy tokens without claims.
+    It is read from the primary, a replica could return a previous epoch that would be cached.
 
     :param db_session: database session
     :param user_repository: user repository
+    :param api_key_repository: API key repository
+    :param api_key: prefix and digest of the API key
     :param token: user's ID
     :return: user
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        token_data = AuthTokenPayload(**payload)
-    except (JWTError, ValidationError) as e:
-        logger.exception(str(e))
-        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.USER_NOT_CREDENTIALS)
+    if api_key:
+        api_key_db = api_key_repository.get_by_prefix(db_session=db_session, prefix=api_key[0])
+        return check_api_key(api_key=api_key, api_key_db=api_key_db)
 
-    user_db = user_repository.get_by_username(db_session=db_session, username=token_data.sub)
-    if not user_db or user_db.dt_deleted:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+    token_data = decode_access_token(token=token)
+
+    if token_data.uid is None:
+        user_db = user_repository.get_by_username(db_session=db_session, username=token_data.sub)
+        if not user_db or user_db.dt_deleted:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+        return CurrentUser(id=user_db.id, username=user_db.username, is_admin=user_db.is_admin)
 
-    return user_db
+    token_epoch = token_epochs.get(user_id=token_data.uid)
+    if token_epoch is None:
+        user_db = user_repository.get_by_id(db_session=db_session, user_id=token_data.uid)
+        if not user_db:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+        token_epoch = token_epochs.put(user=user_db)
+
+    return check_token_epoch(token_data=token_data, token_epoch=token_epoch)
+
+
+async def get_current_user_async(
+        db_session: AsyncSession = Depends(get_async_db),
+        user_repository: AsyncUserRepository = Depends(get_async_user_repository),
+        api_key_repository: AsyncApiKeyRepository = Depends(get_async_api_key_repository),
+        api_key: Optional[Tuple[str, str]] = Depends(get_api_key),
+        token: Optional[str] = Depends(reusable_oauth2),
+) -> CurrentUser:
+    """
+    Get current user from an API key, or from the claims of the access token, for the async def views.
+
+    :param db_session: database session
+    :param user_repository: user repository
+    :param api_key_repository: API key repository
+    :param api_key: prefix and digest of the API key
+    :param token: user's ID
+    :return: user
+    """
+    if api_key:
+        api_key_db = await api_key_repository.get_by_prefix(db_session=db_session, prefix=api_key[0])
+        return check_api_key(api_key=api_key, api_key_db=api_key_db)
+
+    token_data = decode_access_token(token=token)
+
+    if token_data.uid is None:
+        user_db = await user_repository.get_by_username(db_session=db_session, username=token_data.sub)
+        if not user_db or user_db.dt_deleted:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+        return CurrentUser(id=user_db.id, username=user_db.username, is_admin=user_db.is_admin)
+
+    token_epoch = token_epochs.get(user_id=token_data.uid)
+    if token_epoch is None:
+        user_db = await user_repository.get_by_id(db_session=db_session, user_id=token_data.uid)
+        if not user_db:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+        token_epoch = token_epochs.put(user=user_db)
+
+    return check_token_epoch(token_data=token_data, token_epoch=token_epoch)
 
 
 def check_authenticated(
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ) -> None:
     """
     Return error if the current user is NOT admin.
@@ -102,8 +308,21 @@ def check_authenticated(
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=messages.USER_NOT_PERMISSION)
 
 
+def check_authenticated_async(
+        current_user: CurrentUser = Depends(get_current_user_async)
+) -> None:
+    """
+    Return error if there is not a current user, for the async def views.
+
+    :param current_user: current user
+    """
+    if not current_user:
+        logger.exception(messages.USER_NOT_PERMISSION)
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=messages.USER_NOT_PERMISSION)
+
+
 def check_authenticated_is_admin(
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ) -> None:
     """
     Return error if the current user is NOT admin.
@@ -123,6 +342,7 @@ def get_customer_by_id(
 ) -> Customer:
     """
     Get customer by customer_id.
+    It is read from the primary, the customer cache stores the misses and a replica could return a previous version.
 
     :param db_session: session of the database
     :param customer_repository: customer repository
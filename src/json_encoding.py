@@ -0,0 +1,34 @@
+from typing import Type
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+import settings
+
+
+def get_response_class() -> Type[JSONResponse]:
+    """
+    Default response class of the routes.
+
+    :return: ORJSONResponse with the fast JSON, JSONResponse otherwise
+    """
+    return ORJSONResponse if settings.FAST_JSON else JSONResponse
+
+
+def encode(
+        model: BaseModel,
+) -> bytes:
+    """
+    Encode a response model in JSON.
+    With the fast JSON the dict of the model goes straight to orjson, without jsonable_encoder. It encodes the UUIDs,
+    enums and datetimes, naive or timezone-aware, as jsonable_encoder does.
+
+    :param model: model
+    :return: JSON
+    """
+    if settings.FAST_JSON:
+        return orjson.dumps(model.dict(), option=orjson.OPT_NON_STR_KEYS)
+    return JSONResponse(content=jsonable_encoder(model)).body
@@ -2,23 +2,64 @@ from http import HTTPStatus
 from typing import Dict
 
 from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi_pagination import add_pagination
 from starlette.middleware.cors import CORSMiddleware
 
+import database
+import messages
+import pool_metrics
+import settings
+from cache_invalidation import cache_invalidation_listener
+from customer.infrastructure.services.filesystem_image_storage_service import get_files_directory
+from customer.customer_cache import customer_cache
+from customer.customer_cache import customer_single_flight
+from customer.infrastructure.views.customer_async_views import api_customers_async
 from customer.infrastructure.views.customer_views import api_customers
+from customer.photo_spool import photo_spool
+from json_encoding import get_response_class
+from main_schema import SchemaCustomerCacheStats
 from main_schema import SchemaHealth
+from main_schema import SchemaLoginLimiterStats
+from main_schema import SchemaPhotoSpoolStats
+from main_schema import SchemaPoolStats
+from main_schema import SchemaResponseCacheStats
+from main_schema import SchemaSingleFlightStats
+from response_cache import response_cache
+from user.infrastructure.views.api_key_views import api_api_keys
 from user.infrastructure.views.auth_views import api_auth
 from user.infrastructure.views.user_views import api_users
+from user.login_limiter import login_limiter
+from user.security import PasswordHasherBusy
+
+
+def password_hasher_busy(
+        request: Request,
+        exc: PasswordHasherBusy,
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        content=dict(detail=messages.PASSWORD_HASHER_BUSY),
+        headers={"Retry-After": "1"},
+    )
 
 
 def create_app() -> FastAPI:
     api = FastAPI(
         title="The CRM service API",
+        default_response_class=get_response_class(),
     )
 
     api.include_router(api_auth, prefix="/auth", tags=["Auth"])
     api.include_router(api_users, prefix="/users", tags=["Users"])
+    api.include_router(api_api_keys, prefix="/api-keys", tags=["API keys"])
+    if settings.ASYNC_DATABASE:
+        api.include_router(api_customers_async, prefix="/customers", tags=["Customers"])
     api.include_router(api_customers, prefix="/customers", tags=["Customers"])
+    if settings.IMAGE_STORAGE_BACKEND == "filesystem" and settings.IMAGE_STORAGE_URL.startswith("/"):
+        api.mount(settings.IMAGE_STORAGE_URL, StaticFiles(directory=get_files_directory(), check_dir=False), "images")
 
     api.add_middleware(
         CORSMiddleware,
@@ -28,6 +69,19 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    api.add_exception_handler(PasswordHasherBusy, password_hasher_busy)
+
+    if database.replicas:
+        api.middleware("http")(database.read_your_writes)
+
+    if settings.CACHE_INVALIDATION_ENABLED:
+        api.add_event_handler("startup", cache_invalidation_listener.start)
+        api.add_event_handler("shutdown", cache_invalidation_listener.stop)
+
+    if settings.PHOTO_SPOOL_ENABLED:
+        api.add_event_handler("startup", photo_spool.start)
+        api.add_event_handler("shutdown", photo_spool.stop)
+
     add_pagination(api)
 
     return api
@@ -46,6 +100,72 @@ def get_check() -> Dict:
     return dict(status="OK")
 
 
+@app.get(
+    path="/health/pool",
+    description="Live state and checkout metrics of the database connection pools of this worker.",
+    status_code=HTTPStatus.OK,
+    response_model=Dict[str, SchemaPoolStats],
+    tags=["Health"],
+)
+def get_pool_stats() -> Dict:
+    return pool_metrics.snapshot()
+
+
+@app.get(
+    path="/health/login",
+    description="Counters of the login limiter of this worker.",
+    status_code=HTTPStatus.OK,
+    response_model=SchemaLoginLimiterStats,
+    tags=["Health"],
+)
+def get_login_limiter_stats() -> Dict:
+    return login_limiter.stats()
+
+
+@app.get(
+    path="/health/photo-spool",
+    description="Counters of the photo upload spool of this worker, and the jobs in the spool.",
+    status_code=HTTPStatus.OK,
+    response_model=SchemaPhotoSpoolStats,
+    tags=["Health"],
+)
+def get_photo_spool_stats() -> Dict:
+    return photo_spool.stats()
+
+
+@app.get(
+    path="/health/customer-cache",
+    description="Counters of the customer cache of this worker.",
+    status_code=HTTPStatus.OK,
+    response_model=SchemaCustomerCacheStats,
+    tags=["Health"],
+)
+def get_customer_cache_stats() -> Dict:
+    return customer_cache.stats()
+
+
+@app.get(
+    path="/health/customer-single-flight",
+    description="Counters of the lookups of customers by ID coalesced in this worker.",
+    status_code=HTTPStatus.OK,
+    response_model=SchemaSingleFlightStats,
+    tags=["Health"],
+)
+def get_customer_single_flight_stats() -> Dict:
+    return customer_single_flight.stats()
+
+
+@app.get(
+    path="/health/response-cache",
+    description="Counters of the response cache of the customer list pages in this worker.",
+    status_code=HTTPStatus.OK,
+    response_model=SchemaResponseCacheStats,
+    tags=["Health"],
+)
+def get_response_cache_stats() -> Dict:
+    return response_cache.stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
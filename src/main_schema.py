@@ -1,3 +1,4 @@
+from typing import Dict
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -23,3 +24,146 @@ class SchemaID(BaseModel):
                 id="f05acf11-ef44-4e9c-95ea-7699f5fe2d34",
             )
         )
+
+
+class SchemaPoolStats(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    connects: int
+    invalidations: int
+    checkout_seconds_avg: float
+    checkout_seconds_max: float
+    checkout_seconds_histogram: Dict[str, int]
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                size=5,
+                checked_in=4,
+                checked_out=1,
+                overflow=0,
+                checkouts=1520,
+                timeouts=0,
+                connects=5,
+                invalidations=0,
+                checkout_seconds_avg=0.0004,
+                checkout_seconds_max=0.021,
+                checkout_seconds_histogram={
+                    "0.001": 1510, "0.005": 1515, "0.01": 1515, "0.05": 1520, "0.1": 1520, "0.5": 1520,
+                    "1": 1520, "5": 1520, "10": 1520, "30": 1520, "+Inf": 1520,
+                },
+            )
+        )
+
+
+class SchemaLoginLimiterStats(BaseModel):
+    allowed: int
+    rejected: int
+    failures: int
+    successes: int
+    lockouts: int
+    keys: int
+    locked: int
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                allowed=1200,
+                rejected=35000,
+                failures=180,
+                successes=1020,
+                lockouts=9,
+                keys=64,
+                locked=2,
+            )
+        )
+
+
+class SchemaPhotoSpoolStats(BaseModel):
+    enqueued: int
+    stored: int
+    retried: int
+    failed: int
+    breaker_opened: int
+    pending: int
+    failed_jobs: int
+    breaker_open: bool
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                enqueued=540,
+                stored=528,
+                retried=14,
+                failed=1,
+                breaker_opened=1,
+                pending=11,
+                failed_jobs=1,
+                breaker_open=False,
+            )
+        )
+
+
+class SchemaCustomerCacheStats(BaseModel):
+    hits: int
+    negative_hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+    max_size: int
+    hit_ratio: float
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                hits=9500,
+                negative_hits=300,
+                misses=700,
+                evictions=0,
+                invalidations=120,
+                size=650,
+                max_size=10000,
+                hit_ratio=0.933,
+            )
+        )
+
+
+class SchemaSingleFlightStats(BaseModel):
+    executions: int
+    coalesced: int
+    errors: int
+    in_flight: int
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                executions=700,
+                coalesced=2300,
+                errors=0,
+                in_flight=1,
+            )
+        )
+
+
+class SchemaResponseCacheStats(BaseModel):
+    hits: int
+    stale_hits: int
+    misses: int
+    refreshes: int
+    invalidations: int
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                hits=4200,
+                stale_hits=150,
+                misses=310,
+                refreshes=140,
+                invalidations=95,
+            )
+        )
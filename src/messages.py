@@ -1,10 +1,26 @@
+API_KEY_CREATE_ERROR = "Error creating the new API key."
+API_KEY_NOT_FOUND = "API key not found."
+CURSOR_NOT_VALID = "The cursor is not valid."
 CUSTOMER_CREATE_ERROR = "Error creating the new customer."
+CUSTOMER_IMPORT_CSV_NOT_VALID = "The CSV file is not valid, the header must contain: id, name, surname."
+CUSTOMER_IMPORT_ERROR = "Error importing the customers."
 CUSTOMER_ID_ALREADY_EXISTS = "The customer ID already exists."
 CUSTOMER_NOT_FOUND = "Customer not found."
 IMAGE_BASE64_NOT_VALID = "The image in base64 is not valid."
+IMAGE_PATH_NOT_VALID = "The path of the image is not valid."
+IMAGE_UPLOAD_URL_NOT_SUPPORTED = "The image storage does not support upload URLs."
+LOGIN_TOO_MANY_ATTEMPTS = "Too many failed login attempts, try again later."
+PHOTO_NOT_VALID = "The photo must be an image."
+PHOTO_NOT_UPLOADED = "The photo has not been uploaded."
+PHOTO_SPOOL_ERROR = "The photo could not be spooled, try again later."
+PHOTO_SPOOL_FULL = "Too many photos waiting to be stored, try again later."
+PASSWORD_HASHER_BUSY = "Too many authentication requests, try again later."
+REFRESH_TOKEN_NOT_VALID = "The refresh token is not valid."
+USER_BULK_TOO_LARGE = "Too many users in the request."
 USER_CREATE_ERROR = "Error creating the new user."
 USER_INCORRECT_USERNAME_PASSWORD = "Incorrect username or password."
 USER_NOT_FOUND = "User not found."
+USER_NOT_AUTHENTICATED = "Not authenticated"
 USER_NOT_CREDENTIALS = "Could not validate credentials."
 USER_NOT_PERMISSION = "The current user has not permission for this resource."
 USERNAME_ALREADY_EXISTS = "Username already exists."
@@ -0,0 +1,71 @@
+import base64
+import binascii
+import json
+import logging
+from http import HTTPStatus
+from typing import Any
+from typing import Generic
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+from fastapi import HTTPException
+from fastapi import Query
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+import messages
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CursorParams(BaseModel):
+    size: int = Query(50, ge=1, le=100, description="Page size")
+    cursor: Optional[str] = Query(None, description="Opaque cursor returned as next_cursor by the previous page")
+    include_total: bool = Query(False, description="Count the total number of items (one extra query)")
+
+
+class CursorPage(GenericModel, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def encode_cursor(
+        *values: Any,
+) -> str:
+    """
+    Encode the keyset values of the last item of a page in an opaque cursor.
+
+    :param values: keyset values, must be JSON serializable
+    :return: cursor
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(
+        cursor: Optional[str],
+) -> Optional[Tuple]:
+    """
+    Decode a cursor created by encode_cursor.
+    Return the keyset values or error.
+
+    :param cursor: cursor
+    :return: keyset values
+    """
+    if cursor is None:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError) as e:
+        logger.exception(str(e))
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CURSOR_NOT_VALID)
+    if not isinstance(values, list):
+        logger.exception(f"{messages.CURSOR_NOT_VALID} - cursor: {cursor}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.CURSOR_NOT_VALID)
+    return tuple(values)
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Dict
+from typing import Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import Pool
+
+# upper bounds in seconds of the checkout latency histogram, the last bucket is +Inf
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+_engines: Dict[str, Engine] = dict()
+
+
+class PoolMetrics:
+    """
+    Counters and checkout latency histogram of a connection pool.
+    The latency is the time spent to get a connection from the pool: waiting for a free one or opening a new one.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checkout_seconds_sum = 0.0
+        self.checkout_seconds_max = 0.0
+        self.checkout_buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def observe_checkout(
+            self,
+            seconds: float,
+    ) -> None:
+        """
+        Record a successful checkout.
+
+        :param seconds: checkout latency
+        """
+        bucket = next((i for i, le in enumerate(CHECKOUT_BUCKETS) if seconds <= le), len(CHECKOUT_BUCKETS))
+        with self.lock:
+            self.checkouts += 1
+            self.checkout_seconds_sum += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.checkout_buckets[bucket] += 1
+
+    def observe_timeout(self) -> None:
+        with self.lock:
+            self.timeouts += 1
+
+    def observe_connect(self) -> None:
+        with self.lock:
+            self.connects += 1
+
+    def observe_invalidation(self) -> None:
+        with self.lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Return the counters and the histogram, the buckets are cumulative like in Prometheus.
+
+        :return: metrics
+        """
+        with self.lock:
+            histogram = dict()
+            count = 0
+            for le, bucket in zip(list(CHECKOUT_BUCKETS) + ["+Inf"], self.checkout_buckets):
+                count += bucket
+                histogram[str(le)] = count
+            return dict(
+                checkouts=self.checkouts,
+                timeouts=self.timeouts,
+                connects=self.connects,
+                invalidations=self.invalidations,
+                checkout_seconds_avg=self.checkout_seconds_sum / self.checkouts if self.checkouts else 0.0,
+                checkout_seconds_max=self.checkout_seconds_max,
+                checkout_seconds_histogram=histogram,
+            )
+
+
+class _MeteredPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            # the pool is exhausted for longer than pool_timeout, the other errors are not timeouts
+            self.metrics.observe_timeout()
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+
+def metered_pool_class(
+        pool_class: Type[Pool],
+) -> Type[Pool]:
+    """
+    Return a subclass of pool_class that records its PoolMetrics.
+    The metrics are a class attribute, so they survive the pool being recreated by engine.dispose().
+
+    :param pool_class: pool class, QueuePool or AsyncAdaptedQueuePool
+    :return: pool class
+    """
+    return type(f"Metered{pool_class.__name__}", (_MeteredPoolMixin, pool_class), dict(metrics=PoolMetrics()))
+
+
+def register(
+        name: str,
+        engine: Engine,
+) -> None:
+    """
+    Publish the metrics of the pool of an engine, it must use a metered_pool_class.
+
+    :param name: name of the engine
+    :param engine: engine, the sync_engine of an async engine
+    """
+    metrics = engine.pool.metrics
+    event.listen(engine, "connect", lambda *args: metrics.observe_connect())
+    event.listen(engine, "invalidate", lambda *args: metrics.observe_invalidation())
+    _engines[name] = engine
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Return the live state and the metrics of every registered pool.
+
+    :return: metrics by engine name
+    """
+    result = dict()
+    for name, engine in _engines.items():
+        pool = engine.pool
+        result[name] = dict(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            **pool.metrics.snapshot(),
+        )
+    return result
@@ -0,0 +1,369 @@
+import logging
+import struct
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sqlalchemy.orm import Session
+
+import database
+import settings
+from cache_invalidation import cache_invalidation_listener
+
+logger = logging.getLogger(__name__)
+
+# version of the table and creation time of the entry, before the body
+_HEADER = struct.Struct("!qd")
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Store of the response cache: encoded responses with an expiration, and a version counter by table.
+    """
+
+    @abstractmethod
+    def get(
+            self,
+            key: str,
+    ) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(
+            self,
+            key: str,
+            value: bytes,
+            expire_seconds: float,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def get_version(
+            self,
+            table: str,
+    ) -> int:
+        pass
+
+    @abstractmethod
+    def incr_version(
+            self,
+            table: str,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def lock(
+            self,
+            key: str,
+            expire_seconds: float,
+    ) -> bool:
+        """
+        Take a lock that expires by itself.
+
+        :return: True if it was free
+        """
+        pass
+
+    @abstractmethod
+    def unlock(
+            self,
+            key: str,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    LRU in the memory of the worker, the writes of other workers are not seen until the entries expire.
+    """
+
+    def __init__(
+            self,
+            max_entries: int,
+    ) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self.versions: Dict[str, int] = dict()
+        self.locks: Dict[str, float] = dict()
+
+    def get(
+            self,
+            key: str,
+    ) -> Optional[bytes]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(
+            self,
+            key: str,
+            value: bytes,
+            expire_seconds: float,
+    ) -> None:
+        with self._lock:
+            self.entries[key] = (value, time.monotonic() + expire_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_version(
+            self,
+            table: str,
+    ) -> int:
+        return self.versions.get(table, 0)
+
+    def incr_version(
+            self,
+            table: str,
+    ) -> None:
+        with self._lock:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def lock(
+            self,
+            key: str,
+            expire_seconds: float,
+    ) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self.locks.get(key, 0) > now:
+                return False
+            self.locks[key] = now + expire_seconds
+            return True
+
+    def unlock(
+            self,
+            key: str,
+    ) -> None:
+        with self._lock:
+            self.locks.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.versions.clear()
+            self.locks.clear()
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    """
+    Redis shared by all the workers, so a write in one of them invalidates the responses of all.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            prefix: str = "response_cache:",
+    ) -> None:
+        # optional dependency, only needed with this backend
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(
+            self,
+            key: str,
+    ) -> Optional[bytes]:
+        return self.client.get(f"{self.prefix}{key}")
+
+    def set(
+            self,
+            key: str,
+            value: bytes,
+            expire_seconds: float,
+    ) -> None:
+        self.client.set(f"{self.prefix}{key}", value, px=max(int(expire_seconds * 1000), 1))
+
+    def get_version(
+            self,
+            table: str,
+    ) -> int:
+        return int(self.client.get(f"{self.prefix}version:{table}") or 0)
+
+    def incr_version(
+            self,
+            table: str,
+    ) -> None:
+        self.client.incr(f"{self.prefix}version:{table}")
+
+    def lock(
+            self,
+            key: str,
+            expire_seconds: float,
+    ) -> bool:
+        return bool(self.client.set(f"{self.prefix}lock:{key}", 1, nx=True, px=max(int(expire_seconds * 1000), 1)))
+
+    def unlock(
+            self,
+            key: str,
+    ) -> None:
+        self.client.delete(f"{self.prefix}lock:{key}")
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache of encoded responses of the read only routes of a table, invalidated by the version of the table.
+
+    The responses are computed on the primary, a lagging replica would store a previous one as the new version.
+    Every entry keeps the version of the table it was computed with. An entry is fresh during the TTL if the version
+    has not changed. Otherwise, during the stale time, it is still returned while a single background refresh, for
+    all the workers sharing the backend, computes it again.
+    """
+
+    def __init__(
+            self,
+            backend: ResponseCacheBackend,
+            ttl_seconds: float,
+            stale_seconds: float,
+            refresh_workers: int,
+            session_factory: Callable[[], Session] = database.SessionLocal,
+    ) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.session_factory = session_factory
+        self.executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="response-cache")
+        self.lock = threading.Lock()
+        self.counters = dict(hits=0, stale_hits=0, misses=0, refreshes=0, invalidations=0)
+        # tables of the cached responses, invalidated when the notifications of other workers are lost
+        self.tables = set()
+
+    def _count(
+            self,
+            counter: str,
+    ) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def _store(
+            self,
+            key: str,
+            version: int,
+            body: bytes,
+    ) -> None:
+        value = _HEADER.pack(version, time.time()) + body
+        self.backend.set(key, value, expire_seconds=self.ttl_seconds + self.stale_seconds)
+
+    def _refresh(
+            self,
+            key: str,
+            compute: Callable[[Session], bytes],
+    ) -> None:
+        try:
+            version = self.backend.get_version(key.split(":", 1)[0])
+            db_session = self.session_factory()
+            try:
+                self._store(key=key, version=version, body=compute(db_session))
+            finally:
+                db_session.close()
+            self._count("refreshes")
+        except Exception:
+            logger.exception(f"Refresh of the response \"{key}\" failed.")
+        finally:
+            self.backend.unlock(key)
+
+    def get_or_compute(
+            self,
+            table: str,
+            key: str,
+            db_session: Session,
+            compute: Callable[[Session], bytes],
+    ) -> bytes:
+        """
+        Get an encoded response from the cache, or compute and store it.
+
+        :param table: table the response is read from
+        :param key: key of the response in the table, from the route and its params
+        :param db_session: session of the primary database of the request
+        :param compute: function that computes the response with a session
+        :return: encoded response
+        """
+        self.tables.add(table)
+        key = f"{table}:{key}"
+        version = self.backend.get_version(table)
+        value = self.backend.get(key)
+        if value is not None:
+            entry_version, created_at, body = *_HEADER.unpack_from(value), value[_HEADER.size:]
+            age = time.time() - created_at
+            if entry_version == version and age < self.ttl_seconds:
+                self._count("hits")
+                return body
+            if self.stale_seconds > 0 and age < self.ttl_seconds + self.stale_seconds:
+                if self.backend.lock(key, expire_seconds=self.ttl_seconds + self.stale_seconds):
+                    self.executor.submit(self._refresh, key, compute)
+                self._count("stale_hits")
+                return body
+
+        self._count("misses")
+        # the version read before computing, a write meanwhile makes the entry stale
+        body = compute(db_session)
+        self._store(key=key, version=version, body=body)
+        return body
+
+    def invalidate(
+            self,
+            table: str,
+    ) -> None:
+        """
+        Increase the version of a table, after a write.
+
+        :param table: table
+        """
+        self.backend.incr_version(table)
+        self._count("invalidations")
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(self.counters)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self.lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+def _get_backend() -> ResponseCacheBackend:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisResponseCacheBackend(url=settings.RESPONSE_CACHE_REDIS_URL)
+    return MemoryResponseCacheBackend(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(
+    backend=_get_backend(),
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale_seconds=settings.RESPONSE_CACHE_STALE_SECONDS,
+    refresh_workers=settings.RESPONSE_CACHE_REFRESH_WORKERS,
+)
+
+
+def _on_invalidation(
+        table: Optional[str],
+        ids: Optional[List[str]],
+) -> None:
+    # notification of a write of another worker
+    for table in [table] if table is not None else list(response_cache.tables):
+        response_cache.invalidate(table)
+
+
+cache_invalidation_listener.subscribe(_on_invalidation)
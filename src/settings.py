@@ -2,8 +2,81 @@ import os
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Connection pool, per engine and per uvicorn worker. The defaults are the SQLAlchemy ones.
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 5))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", 30))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", -1))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "false").lower() == "true"
+
+# Read replicas, comma separated URLs. The read only routes use a replica whose lag is under the max lag,
+# otherwise the primary. A client that has just written reads from the primary during the max lag.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", 5))
+DATABASE_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DATABASE_REPLICA_LAG_CHECK_SECONDS", 5))
+
+# Async database: serve the customer routes with async def views over an asyncpg engine
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() == "true"
+# default: DATABASE_URL with the asyncpg driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Fast JSON: the responses are encoded with orjson instead of the json module
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() == "true"
+
+# Cross-worker cache invalidation: the customer and user writes send a PostgreSQL NOTIFY on commit, and a thread of
+# every worker listens to them and invalidates its caches, so their TTLs can be longer with several workers.
+CACHE_INVALIDATION_ENABLED = os.getenv("CACHE_INVALIDATION_ENABLED", "false").lower() == "true"
+CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv("CACHE_INVALIDATION_POLL_SECONDS", 1))
+CACHE_INVALIDATION_RECONNECT_SECONDS = float(os.getenv("CACHE_INVALIDATION_RECONNECT_SECONDS", 5))
+
+# Customers
+CUSTOMER_BULK_BATCH_SIZE = int(os.getenv("CUSTOMER_BULK_BATCH_SIZE", 1000))
+CUSTOMER_IMPORT_CHUNK_SIZE = int(os.getenv("CUSTOMER_IMPORT_CHUNK_SIZE", 10000))
+# in-process cache of customers by ID, 0 to disable it. The IDs that do not exist are cached for the negative TTL.
+# Disabled by default without the cache invalidation, another worker would return a customer changed meanwhile.
+CUSTOMER_CACHE_SIZE = int(os.getenv("CUSTOMER_CACHE_SIZE", 10000 if CACHE_INVALIDATION_ENABLED else 0))
+CUSTOMER_CACHE_TTL_SECONDS = float(os.getenv("CUSTOMER_CACHE_TTL_SECONDS", 30))
+CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("CUSTOMER_CACHE_NEGATIVE_TTL_SECONDS", 5))
+
+# Response cache of the customer list pages, TTL 0 to disable it. "memory" keeps it in every worker, "redis" shares it.
+# During the stale time after the TTL or a write, the old page is returned while a single refresh computes it again.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Disabled by default in memory without the cache invalidation, another worker would return a page without a write.
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv(
+    "RESPONSE_CACHE_TTL_SECONDS",
+    5 if CACHE_INVALIDATION_ENABLED or RESPONSE_CACHE_BACKEND == "redis" else 0,
+))
+RESPONSE_CACHE_STALE_SECONDS = float(os.getenv("RESPONSE_CACHE_STALE_SECONDS", 0))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+RESPONSE_CACHE_REFRESH_WORKERS = int(os.getenv("RESPONSE_CACHE_REFRESH_WORKERS", 2))
+
+# Users
+USER_BULK_BATCH_SIZE = int(os.getenv("USER_BULK_BATCH_SIZE", 500))
+# max users of a bulk request, every password is hashed with bcrypt
+USER_BULK_MAX_SIZE = int(os.getenv("USER_BULK_MAX_SIZE", 1000))
+
 # Auth
 SECRET_KEY = os.getenv("SECRET_KEY")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+# seconds a worker trusts its known token epoch of a user before reading it again
+USER_TOKEN_EPOCH_TTL_SECONDS = float(os.getenv("USER_TOKEN_EPOCH_TTL_SECONDS", 60))
+# processes that run bcrypt, 0 to run it in the request thread, and calls that can wait for a free one
+PASSWORD_HASHER_WORKERS = int(os.getenv("PASSWORD_HASHER_WORKERS", 2))
+PASSWORD_HASHER_QUEUE_SIZE = int(os.getenv("PASSWORD_HASHER_QUEUE_SIZE", 16))
+# failed logins allowed in the window by username and by client IP before locking them, the lockout doubles each time
+LOGIN_MAX_FAILURES_USERNAME = int(os.getenv("LOGIN_MAX_FAILURES_USERNAME", 5))
+LOGIN_MAX_FAILURES_IP = int(os.getenv("LOGIN_MAX_FAILURES_IP", 20))
+LOGIN_WINDOW_SECONDS = float(os.getenv("LOGIN_WINDOW_SECONDS", 300))
+LOGIN_LOCKOUT_SECONDS = float(os.getenv("LOGIN_LOCKOUT_SECONDS", 60))
+LOGIN_LOCKOUT_MAX_SECONDS = float(os.getenv("LOGIN_LOCKOUT_MAX_SECONDS", 3600))
+
+# Image storage, "s3" or "filesystem". The filesystem one stores the images by content hash in the path and serves
+# them at the URL when it is a path of the API.
+IMAGE_STORAGE_BACKEND = os.getenv("IMAGE_STORAGE_BACKEND", "s3").lower()
+IMAGE_STORAGE_PATH = os.getenv("IMAGE_STORAGE_PATH", "media")
+IMAGE_STORAGE_URL = os.getenv("IMAGE_STORAGE_URL", "/media")
 
 # S3
 BUCKET = os.getenv("BUCKET")
@@ -11,3 +84,40 @@ S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
 S3_REGION_NAME = os.getenv("S3_REGION_NAME")
 S3_AWS_ACCESS_KEY_ID = os.getenv("S3_AWS_ACCESS_KEY_ID")
 S3_AWS_SECRET_ACCESS_KEY = os.getenv("S3_AWS_SECRET_ACCESS_KEY")
+# connections of the S3 client shared by the threads of a worker
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 20))
+# files bigger than the threshold are sent as multipart uploads, in parts of the chunk size
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", 4))
+# seconds a presigned upload URL is valid
+S3_PRESIGNED_URL_EXPIRE_SECONDS = int(os.getenv("S3_PRESIGNED_URL_EXPIRE_SECONDS", 15 * 60))
+
+# Photo derivatives, comma separated "<name>:<max side in pixels>", generated in the background after an upload
+PHOTO_DERIVATIVE_SIZES = {
+    name.strip(): int(size)
+    for name, size in (
+        item.split(":")
+        for item in os.getenv("PHOTO_DERIVATIVE_SIZES", "thumbnail:128,small:320,medium:640").split(",")
+        if item.strip()
+    )
+}
+# WEBP or JPEG
+PHOTO_DERIVATIVE_FORMAT = os.getenv("PHOTO_DERIVATIVE_FORMAT", "WEBP").upper()
+PHOTO_DERIVATIVE_QUALITY = int(os.getenv("PHOTO_DERIVATIVE_QUALITY", 80))
+# processes that resize the photos, 0 to resize them in the background thread
+PHOTO_DERIVATIVE_WORKERS = int(os.getenv("PHOTO_DERIVATIVE_WORKERS", 2))
+
+# Photo upload spool: the uploads are written to a local directory and stored by a background thread of the worker,
+# with exponential backoff between attempts. After consecutive failures the storage is left alone for a while.
+PHOTO_SPOOL_ENABLED = os.getenv("PHOTO_SPOOL_ENABLED", "false").lower() == "true"
+PHOTO_SPOOL_PATH = os.getenv("PHOTO_SPOOL_PATH", "spool")
+PHOTO_SPOOL_MAX_JOBS = int(os.getenv("PHOTO_SPOOL_MAX_JOBS", 1000))
+PHOTO_SPOOL_POLL_SECONDS = float(os.getenv("PHOTO_SPOOL_POLL_SECONDS", 1))
+PHOTO_SPOOL_MAX_ATTEMPTS = int(os.getenv("PHOTO_SPOOL_MAX_ATTEMPTS", 8))
+PHOTO_SPOOL_BACKOFF_SECONDS = float(os.getenv("PHOTO_SPOOL_BACKOFF_SECONDS", 1))
+PHOTO_SPOOL_BACKOFF_MAX_SECONDS = float(os.getenv("PHOTO_SPOOL_BACKOFF_MAX_SECONDS", 300))
+PHOTO_SPOOL_BREAKER_FAILURES = int(os.getenv("PHOTO_SPOOL_BREAKER_FAILURES", 5))
+PHOTO_SPOOL_BREAKER_SECONDS = float(os.getenv("PHOTO_SPOOL_BREAKER_SECONDS", 30))
+# a job taken by a worker that died is taken again after this time
+PHOTO_SPOOL_CLAIM_TIMEOUT_SECONDS = float(os.getenv("PHOTO_SPOOL_CLAIM_TIMEOUT_SECONDS", 300))
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+
+class _Call:
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key: the first one runs the function, and the ones that arrive while it
+    is running wait for it and share its result or its error.
+    The result is the same object for all the callers, they must not change it.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.calls: Dict[Hashable, Any] = dict()
+        self.counters = dict(executions=0, coalesced=0, errors=0)
+
+    def _count(
+            self,
+            counter: str,
+    ) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def do(
+            self,
+            key: Hashable,
+            function: Callable[[], Any],
+    ) -> Any:
+        """
+        Run a function, or wait for the call with the same key that is running.
+
+        :param key: key of the call
+        :param function: function
+        :return: result of the function
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.counters["executions"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            self._count("errors")
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    async def do_async(
+            self,
+            key: Hashable,
+            function: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Async version of do, for the calls of the same event loop.
+        If the first call is cancelled, a waiting call runs the function instead.
+
+        :param key: key of the call
+        :param function: coroutine function
+        :return: result of the function
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+        while True:
+            with self.lock:
+                future = self.calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self.calls[key] = loop.create_future()
+                    self.counters["executions"] += 1
+                else:
+                    self.counters["coalesced"] += 1
+            if leader:
+                break
+            try:
+                # a cancelled waiter does not cancel the call
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+        try:
+            result = await function()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # the waiters try again, one of them runs the function
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # retrieved, it is not logged when there are not waiters
+            future.exception()
+            self._count("errors")
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(**self.counters, in_flight=len(self.calls))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.counters = dict.fromkeys(self.counters, 0)
@@ -7,7 +7,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 import messages
-from database import get_db
+from database import get_read_db
 from depends import get_user_repository
 from depends import str_to_uuid
 from user.domain.user import User
@@ -18,7 +18,7 @@ logger = logging.getLogger(__name__)
 
 def get_user_by_id(
         *,
-        db_session: Session = Depends(get_db),
+        db_session: Session = Depends(get_read_db),
         user_repository: UserRepository = Depends(get_user_repository),
         user_uuid: UUID = Depends(str_to_uuid),
 ) -> User:
@@ -0,0 +1,66 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+from pydantic import constr
+
+from user.domain.user import User
+
+
+class ApiKeyCreate(BaseModel):
+    name: constr(min_length=1)
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                name="billing service",
+            )
+        )
+
+
+class ApiKey(ApiKeyCreate):
+    id: UUID
+    user_id: UUID
+    user: User = None
+    prefix: str
+    key_hash: str
+    dt_created: datetime
+    dt_revoked: datetime = None
+
+
+class ApiKeyOut(BaseModel):
+    id: UUID
+    name: str
+    prefix: str
+    dt_created: datetime
+    dt_revoked: datetime = None
+
+    class Config:
+        orm_mode = True
+
+        schema_extra = dict(
+            example=dict(
+                id="9b0a1c3e-52d4-4c1f-8a55-0c7f3b1e2d44",
+                name="billing service",
+                prefix="crm_5f2a9c0d7b1e",
+                dt_created="2021-11-11 12:34:56",
+                dt_revoked=None,
+            )
+        )
+
+
+class ApiKeyCreated(ApiKeyOut):
+    # only returned when the key is created
+    key: str
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                id="9b0a1c3e-52d4-4c1f-8a55-0c7f3b1e2d44",
+                name="billing service",
+                prefix="crm_5f2a9c0d7b1e",
+                dt_created="2021-11-11 12:34:56",
+                dt_revoked=None,
+                key="crm_5f2a9c0d7b1e.yM3q0Jb2o1V6g8cRkA9dTz4nE7wXhL5sQ2pU0iF3b6c",
+            )
+        )
@@ -0,0 +1,84 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import List
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from user.domain.api_key import ApiKey
+
+
+class ApiKeyRepository(ABC):
+
+    @classmethod
+    @abstractmethod
+    def create(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+            name: str,
+            prefix: str,
+            key_hash: str,
+    ) -> Optional[ApiKey]:
+        """
+        Persist a new API key.
+
+        :param db_session: session of the database
+        :param user_id: user's ID
+        :param name: name of the key
+        :param prefix: public prefix of the key
+        :param key_hash: digest of the secret
+        :return: API key, None if error
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def get_by_prefix(
+            cls,
+            db_session: Session,
+            prefix: str,
+    ) -> Optional[ApiKey]:
+        """
+        Searches for a persisted API key by prefix "unique", with its user, and returns it if it exists.
+
+        :param db_session: session of the database
+        :param prefix: prefix of the key
+        :return: API key if found, None otherwise
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def get_list(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+    ) -> List[ApiKey]:
+        """
+        Get the API keys of a user.
+
+        :param db_session: session of the database
+        :param user_id: user's ID
+        :return: API keys
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def revoke(
+            cls,
+            db_session: Session,
+            api_key_id: UUID,
+            user_id: UUID,
+    ) -> bool:
+        """
+        Revoke an API key of a user.
+
+        :param db_session: session of the database
+        :param api_key_id: API key's ID
+        :param user_id: user's ID, owner of the key
+        :return: True if revoked, False if not found
+        """
+        pass
@@ -0,0 +1,29 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.domain.api_key import ApiKey
+
+
+class AsyncApiKeyRepository(ABC):
+    """
+    Async version of ApiKeyRepository, for the async def views.
+    """
+
+    @classmethod
+    @abstractmethod
+    async def get_by_prefix(
+            cls,
+            db_session: AsyncSession,
+            prefix: str,
+    ) -> Optional[ApiKey]:
+        """
+        Searches for a persisted API key by prefix "unique", with its user, and returns it if it exists.
+
+        :param db_session: session of the database
+        :param prefix: prefix of the key
+        :return: API key if found, None otherwise
+        """
+        pass
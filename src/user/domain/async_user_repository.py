@@ -0,0 +1,46 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.domain.user import User
+
+
+class AsyncUserRepository(ABC):
+    """
+    Async version of UserRepository, for the async def views.
+    """
+
+    @classmethod
+    @abstractmethod
+    async def get_by_id(
+            cls,
+            db_session: AsyncSession,
+            user_id: UUID,
+    ) -> Optional[User]:
+        """
+        Searches for a persisted user by ID and returns it if it exists.
+
+        :param db_session: session of the database
+        :param user_id: user's ID
+        :return: user if found, None otherwise
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    async def get_by_username(
+            cls,
+            db_session: AsyncSession,
+            username: str,
+    ) -> Optional[User]:
+        """
+        Searches for a persisted user by username "unique" and returns it if it exists.
+
+        :param db_session: session of the database
+        :param username: username
+        :return: user if found, None otherwise
+        """
+        pass
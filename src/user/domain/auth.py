@@ -1,4 +1,5 @@
 from typing import Optional
+from uuid import UUID
 
 from pydantic import BaseModel
 
@@ -6,6 +7,7 @@ from pydantic import BaseModel
 class AuthToken(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
     class Config:
         schema_extra = dict(
@@ -13,13 +15,18 @@ class AuthToken(BaseModel):
                 access_token="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"
                              ".eyJzdWIiOiJ0aGVfYWdpbGVfbW9ua2V5IiwibmFtZSI6ImhvbGEhIGJ1ZW5hIHBydWViYSBlaCEhIDspIn0"
                              ".bG13yy_XigEkjuOPign9ogIbbb9o1gKi5IErcMA__YQ",
-                token_type="Bearer"
+                token_type="Bearer",
+                refresh_token="0b5c1b8e-6f3a-4a53-9b1e-2f0f7f8c9d10.q0bH3Xo6mH2k0tT8kQ3rG0e1f5b2VbYlV9nS1Zb8c4A",
             )
         )
 
 
 class AuthTokenPayload(BaseModel):
     sub: Optional[str] = None
+    # claims of the current tokens, the legacy ones only have sub
+    uid: Optional[UUID] = None
+    is_admin: bool = False
+    epoch: Optional[int] = None
 
 
 class AuthLogin(BaseModel):
@@ -33,3 +40,14 @@ class AuthLogin(BaseModel):
                 password="top_secret_password",
             )
         )
+
+
+class AuthRefresh(BaseModel):
+    refresh_token: str
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                refresh_token="0b5c1b8e-6f3a-4a53-9b1e-2f0f7f8c9d10.q0bH3Xo6mH2k0tT8kQ3rG0e1f5b2VbYlV9nS1Zb8c4A",
+            )
+        )
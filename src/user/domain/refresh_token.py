@@ -0,0 +1,15 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class RefreshToken(BaseModel):
+    id: UUID
+    family_id: UUID
+    user_id: UUID
+    token_hash: str
+    dt_created: datetime
+    dt_expires: datetime
+    dt_used: datetime = None
+    dt_revoked: datetime = None
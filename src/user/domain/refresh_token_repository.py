@@ -0,0 +1,99 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from user.domain.refresh_token import RefreshToken
+
+
+class RefreshTokenRepository(ABC):
+
+    @classmethod
+    @abstractmethod
+    def create(
+            cls,
+            db_session: Session,
+            token_id: UUID,
+            user_id: UUID,
+            token_hash: str,
+            family_id: Optional[UUID] = None,
+    ) -> Optional[RefreshToken]:
+        """
+        Persist a new refresh token, it expires after settings.REFRESH_TOKEN_EXPIRE_DAYS.
+
+        :param db_session: session of the database
+        :param token_id: refresh token's ID
+        :param user_id: user's ID
+        :param token_hash: digest of the secret
+        :param family_id: family of the token, a new one if None
+        :return: refresh token, None if error
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def get_by_id(
+            cls,
+            db_session: Session,
+            token_id: UUID,
+    ) -> Optional[RefreshToken]:
+        """
+        Searches for a persisted refresh token by ID and returns it if it exists.
+
+        :param db_session: session of the database
+        :param token_id: refresh token's ID
+        :return: refresh token if found, None otherwise
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def rotate(
+            cls,
+            db_session: Session,
+            refresh_token: RefreshToken,
+            new_token_id: UUID,
+            new_token_hash: str,
+    ) -> Optional[RefreshToken]:
+        """
+        Mark a refresh token as used and persist the next one of its family, in the same transaction.
+
+        :param db_session: session of the database
+        :param refresh_token: refresh token to use
+        :param new_token_id: next refresh token's ID
+        :param new_token_hash: digest of the next secret
+        :return: next refresh token, None if the token was already used or revoked
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def revoke_family(
+            cls,
+            db_session: Session,
+            family_id: UUID,
+    ) -> None:
+        """
+        Revoke all the refresh tokens of a family.
+
+        :param db_session: session of the database
+        :param family_id: family's ID
+        """
+        pass
+
+    @classmethod
+    @abstractmethod
+    def revoke_all(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+    ) -> None:
+        """
+        Revoke all the refresh tokens of a user.
+
+        :param db_session: session of the database
+        :param user_id: user's ID
+        """
+        pass
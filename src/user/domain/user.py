@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 from uuid import UUID
 
@@ -17,6 +18,16 @@ class User(UserCreate):
     dt_created: datetime
     dt_updated: datetime = None
     dt_deleted: datetime = None
+    token_epoch: int = 0
+
+
+class CurrentUser(BaseModel):
+    """
+    Authenticated user, built from the claims of the access token.
+    """
+    id: UUID
+    username: str
+    is_admin: bool = False
 
 
 class UserOut(BaseModel):
@@ -47,3 +58,24 @@ class UserUpdate(BaseModel):
     password: Optional[str] = None
     is_admin: Optional[bool] = None
     dt_deleted: Optional[datetime] = None
+
+
+class UserBulkStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+
+
+class UserBulkResult(BaseModel):
+    username: str
+    id: Optional[UUID] = None
+    status: UserBulkStatus
+
+    class Config:
+        schema_extra = dict(
+            example=dict(
+                username="monkey",
+                id="f05acf11-ef44-4e9c-95ea-7699f5fe2d34",
+                status="created",
+            )
+        )
@@ -1,7 +1,9 @@
 from abc import ABC
 from abc import abstractmethod
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
 from uuid import UUID
 
 from sqlalchemy.orm import Session
@@ -43,6 +45,23 @@ class UserRepository(ABC):
         """
         pass
 
+    @classmethod
+    @abstractmethod
+    def create_many(
+            cls,
+            db_session: Session,
+            users: List[UserCreate],
+    ) -> Optional[Dict[str, UUID]]:
+        """
+        Persist new Users with a single statement, the passwords are hashed in parallel.
+        The users whose username already exists are skipped.
+
+        :param db_session: session of the database
+        :param users: Users to persist
+        :return: IDs of the created users by username, None if the statement failed
+        """
+        pass
+
     @classmethod
     @abstractmethod
     def update(
@@ -50,13 +69,14 @@ class UserRepository(ABC):
             db_session: Session,
             user_id: UUID,
             new_info: UserUpdate,
-    ) -> None:
+    ) -> bool:
         """
-        Update the info about a user.
+        Update the info about a user with a single statement.
 
         :param db_session: session of the database
         :param user_id: user's ID to update
         :param new_info: new info
+        :return: True if the user was updated, False if it does not exist
         """
         pass
 
@@ -92,6 +112,22 @@ class UserRepository(ABC):
         """
         pass
 
+    @classmethod
+    @abstractmethod
+    def get_usernames(
+            cls,
+            db_session: Session,
+            usernames: List[str],
+    ) -> Set[str]:
+        """
+        Get which usernames already exist, with a single query.
+
+        :param db_session: session of the database
+        :param usernames: usernames
+        :return: existing usernames
+        """
+        pass
+
     @classmethod
     @abstractmethod
     def get_list(
@@ -0,0 +1,27 @@
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import String
+from sqlalchemy.orm import relationship
+from sqlalchemy_utils import UUIDType
+
+from database import Base
+
+
+class SQLAlchemyApiKey(Base):
+    __tablename__ = "api_key"
+
+    id = Column(UUIDType, primary_key=True)
+    user_id = Column(UUIDType, ForeignKey("user.id"), nullable=False, index=True)
+    # loaded with the key, the authentication is a single indexed query
+    user = relationship("SQLAlchemyUser", lazy="joined")
+    name = Column(String, nullable=False)
+    # public part of the key, to find it
+    prefix = Column(String(16), nullable=False, index=True, unique=True)
+    # HMAC-SHA256 of the secret, the secret itself is never stored
+    key_hash = Column(String(64), nullable=False)
+    dt_created = Column(DateTime(timezone=True), nullable=False)
+    dt_revoked = Column(DateTime(timezone=True), nullable=True)
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,25 @@
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import String
+from sqlalchemy_utils import UUIDType
+
+from database import Base
+
+
+class SQLAlchemyRefreshToken(Base):
+    __tablename__ = "refresh_token"
+
+    id = Column(UUIDType, primary_key=True)
+    # tokens rotated from the same login, they are revoked together if a used one is presented again
+    family_id = Column(UUIDType, nullable=False, index=True)
+    user_id = Column(UUIDType, ForeignKey("user.id"), nullable=False, index=True)
+    # HMAC-SHA256 of the secret, the secret itself is never stored
+    token_hash = Column(String(64), nullable=False)
+    dt_created = Column(DateTime(timezone=True), nullable=False)
+    dt_expires = Column(DateTime(timezone=True), nullable=False)
+    dt_used = Column(DateTime(timezone=True), nullable=True)
+    dt_revoked = Column(DateTime(timezone=True), nullable=True)
+
+    def __str__(self) -> str:
+        return str(self.id)
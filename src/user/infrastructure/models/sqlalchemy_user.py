@@ -3,6 +3,7 @@ from datetime import datetime
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import DateTime
+from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy_utils import UUIDType
 
@@ -19,6 +20,8 @@ class SQLAlchemyUser(Base):
     dt_updated = Column(DateTime(timezone=True), nullable=True)
     dt_deleted = Column(DateTime(timezone=True), nullable=True)
     is_admin = Column(Boolean, nullable=False)
+    # incremented on every update, the access tokens of a previous epoch are not valid
+    token_epoch = Column(Integer, default=0, server_default="0", nullable=False)
 
     def __str__(self) -> str:
         return self.username
@@ -0,0 +1,77 @@
+import logging
+from datetime import datetime
+from typing import List
+from typing import Optional
+from uuid import UUID
+from uuid import uuid4
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from database import save
+from user.domain.api_key import ApiKey
+from user.domain.api_key_repository import ApiKeyRepository
+from user.infrastructure.models.sqlalchemy_api_key import SQLAlchemyApiKey
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyApiKeyRepository(ApiKeyRepository):
+
+    @classmethod
+    def create(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+            name: str,
+            prefix: str,
+            key_hash: str,
+    ) -> Optional[ApiKey]:
+        api_key_to_save = SQLAlchemyApiKey()
+        api_key_to_save.id = uuid4()
+        api_key_to_save.user_id = user_id
+        api_key_to_save.name = name
+        api_key_to_save.prefix = prefix
+        api_key_to_save.key_hash = key_hash
+        api_key_to_save.dt_created = datetime.utcnow()
+        api_key_to_save.dt_revoked = None
+        created = save(db_session=db_session, obj=api_key_to_save)
+        logger.info(f"API key with ID \"{api_key_to_save.id}\" created.")
+        return api_key_to_save if created else None
+
+    @classmethod
+    def get_by_prefix(
+            cls,
+            db_session: Session,
+            prefix: str,
+    ) -> Optional[ApiKey]:
+        return db_session.query(SQLAlchemyApiKey).filter_by(prefix=prefix).first()
+
+    @classmethod
+    def get_list(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+    ) -> List[ApiKey]:
+        return db_session.query(SQLAlchemyApiKey).filter_by(user_id=user_id).order_by(SQLAlchemyApiKey.dt_created).all()
+
+    @classmethod
+    def revoke(
+            cls,
+            db_session: Session,
+            api_key_id: UUID,
+            user_id: UUID,
+    ) -> bool:
+        try:
+            query = db_session.query(SQLAlchemyApiKey).filter_by(id=api_key_id, user_id=user_id, dt_revoked=None)
+            revoked = query.update(dict(dt_revoked=datetime.utcnow()), synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        if not revoked:
+            return False
+        logger.info(f"API key with ID \"{api_key_id}\" revoked.")
+        return True
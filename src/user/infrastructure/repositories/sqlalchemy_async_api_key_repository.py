@@ -0,0 +1,23 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.domain.api_key import ApiKey
+from user.domain.async_api_key_repository import AsyncApiKeyRepository
+from user.infrastructure.models.sqlalchemy_api_key import SQLAlchemyApiKey
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyAsyncApiKeyRepository(AsyncApiKeyRepository):
+
+    @classmethod
+    async def get_by_prefix(
+            cls,
+            db_session: AsyncSession,
+            prefix: str,
+    ) -> Optional[ApiKey]:
+        statement = select(SQLAlchemyApiKey).filter_by(prefix=prefix)
+        return (await db_session.execute(statement)).scalars().first()
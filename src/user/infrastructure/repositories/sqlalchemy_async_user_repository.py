@@ -0,0 +1,32 @@
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.domain.async_user_repository import AsyncUserRepository
+from user.domain.user import User
+from user.infrastructure.models.sqlalchemy_user import SQLAlchemyUser
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyAsyncUserRepository(AsyncUserRepository):
+
+    @classmethod
+    async def get_by_id(
+            cls,
+            db_session: AsyncSession,
+            user_id: UUID,
+    ) -> Optional[User]:
+        return await db_session.get(SQLAlchemyUser, user_id)
+
+    @classmethod
+    async def get_by_username(
+            cls,
+            db_session: AsyncSession,
+            username: str,
+    ) -> Optional[User]:
+        statement = select(SQLAlchemyUser).filter_by(username=username)
+        return (await db_session.execute(statement)).scalars().first()
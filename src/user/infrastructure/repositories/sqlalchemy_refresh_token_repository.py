@@ -0,0 +1,119 @@
+import logging
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import settings
+from database import commit
+from user.domain.refresh_token import RefreshToken
+from user.domain.refresh_token_repository import RefreshTokenRepository
+from user.infrastructure.models.sqlalchemy_refresh_token import SQLAlchemyRefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+class SQLAlchemyRefreshTokenRepository(RefreshTokenRepository):
+
+    @classmethod
+    def _new(
+            cls,
+            token_id: UUID,
+            user_id: UUID,
+            token_hash: str,
+            family_id: UUID,
+    ) -> SQLAlchemyRefreshToken:
+        # aware, the timestamptz columns do not depend on the timezone of the database session
+        now = datetime.now(timezone.utc)
+        return SQLAlchemyRefreshToken(
+            id=token_id,
+            family_id=family_id,
+            user_id=user_id,
+            token_hash=token_hash,
+            dt_created=now,
+            dt_expires=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+
+    @classmethod
+    def create(
+            cls,
+            db_session: Session,
+            token_id: UUID,
+            user_id: UUID,
+            token_hash: str,
+            family_id: Optional[UUID] = None,
+    ) -> Optional[RefreshToken]:
+        refresh_token = cls._new(
+            token_id=token_id,
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id or token_id,
+        )
+        db_session.add(refresh_token)
+        if not commit(db_session=db_session):
+            return None
+        return refresh_token
+
+    @classmethod
+    def get_by_id(
+            cls,
+            db_session: Session,
+            token_id: UUID,
+    ) -> Optional[RefreshToken]:
+        return db_session.query(SQLAlchemyRefreshToken).get(token_id)
+
+    @classmethod
+    def rotate(
+            cls,
+            db_session: Session,
+            refresh_token: RefreshToken,
+            new_token_id: UUID,
+            new_token_hash: str,
+    ) -> Optional[RefreshToken]:
+        new_refresh_token = cls._new(
+            token_id=new_token_id,
+            user_id=refresh_token.user_id,
+            token_hash=new_token_hash,
+            family_id=refresh_token.family_id,
+        )
+        try:
+            # only one of two concurrent requests with the same token can use it
+            query = db_session.query(SQLAlchemyRefreshToken)
+            query = query.filter_by(id=refresh_token.id, dt_used=None, dt_revoked=None)
+            used = query.update(dict(dt_used=datetime.now(timezone.utc)), synchronize_session=False)
+            if not used:
+                return None
+            db_session.add(new_refresh_token)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+
+        return new_refresh_token
+
+    @classmethod
+    def revoke_family(
+            cls,
+            db_session: Session,
+            family_id: UUID,
+    ) -> None:
+        query = db_session.query(SQLAlchemyRefreshToken).filter_by(family_id=family_id, dt_revoked=None)
+        query.update(dict(dt_revoked=datetime.now(timezone.utc)), synchronize_session=False)
+        commit(db_session=db_session)
+        logger.info(f"Refresh tokens of the family \"{family_id}\" revoked.")
+
+    @classmethod
+    def revoke_all(
+            cls,
+            db_session: Session,
+            user_id: UUID,
+    ) -> None:
+        query = db_session.query(SQLAlchemyRefreshToken).filter_by(user_id=user_id, dt_revoked=None)
+        query.update(dict(dt_revoked=datetime.now(timezone.utc)), synchronize_session=False)
+        commit(db_session=db_session)
+        logger.info(f"Refresh tokens of the user \"{user_id}\" revoked.")
@@ -1,20 +1,27 @@
 import logging
 from datetime import datetime
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
 from uuid import UUID
 from uuid import uuid4
 
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+import cache_invalidation
 from database import commit
 from database import save
+from user import token_epochs
 from user.domain.user import User
 from user.domain.user import UserCreate
 from user.domain.user import UserUpdate
 from user.domain.user_repository import UserRepository
 from user.infrastructure.models.sqlalchemy_user import SQLAlchemyUser
 from user.security import get_password_hash
+from user.security import get_password_hashes
 
 logger = logging.getLogger(__name__)
 
@@ -46,21 +53,75 @@ class SQLAlchemyUserRepository(UserRepository):
         logger.info(f"User with ID \"{user_to_save.id}\" created.")
         return user_to_save if created else None
 
+    @classmethod
+    def create_many(
+            cls,
+            db_session: Session,
+            users: List[UserCreate],
+    ) -> Optional[Dict[str, UUID]]:
+        if not users:
+            return dict()
+
+        hashed_passwords = get_password_hashes(passwords=[user.password for user in users])
+        dt_created = datetime.utcnow()
+        values = [
+            dict(
+                id=uuid4(),
+                username=user.username,
+                password=hashed_password,
+                dt_created=dt_created,
+                is_admin=user.is_admin,
+            )
+            for user, hashed_password in zip(users, hashed_passwords)
+        ]
+        statement = (
+            insert(SQLAlchemyUser)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[SQLAlchemyUser.username])
+            .returning(SQLAlchemyUser.username, SQLAlchemyUser.id)
+        )
+        try:
+            created = dict(db_session.execute(statement).all())
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            return None
+
+        if not commit(db_session=db_session):
+            return None
+        logger.info(f"{len(created)} users created.")
+        return created
+
     @classmethod
     def update(
             cls,
             db_session: Session,
             user_id: UUID,
             new_info: UserUpdate,
-    ) -> None:
+    ) -> bool:
         if new_info.password:
             new_info.password = get_password_hash(new_info.password)
-        user_db = cls.get_by_id(db_session, user_id=user_id)
-        for key, value in new_info.dict(exclude_unset=True).items():
-            setattr(user_db, key, value)
-        user_db.dt_updated = datetime.utcnow()
-        commit(db_session=db_session)
+        values = new_info.dict(exclude_unset=True)
+        values["dt_updated"] = datetime.utcnow()
+        # the access tokens issued before the update are not valid anymore
+        values["token_epoch"] = SQLAlchemyUser.token_epoch + 1
+        # the other workers drop the token epoch they know
+        cache_invalidation.notify(db_session, SQLAlchemyUser.__tablename__, str(user_id))
+        try:
+            query = db_session.query(SQLAlchemyUser).filter_by(id=user_id)
+            updated = query.update(values, synchronize_session=False)
+            db_session.commit()
+        except SQLAlchemyError as e:
+            logger.exception(str(e))
+            db_session.rollback()
+            raise
+        finally:
+            token_epochs.invalidate(user_id=user_id)
+
+        if not updated:
+            return False
         logger.info(f"User with ID \"{user_id}\" updated.")
+        return True
 
     @classmethod
     def get_by_id(
@@ -78,6 +139,17 @@ class SQLAlchemyUserRepository(UserRepository):
     ) -> Optional[User]:
         return db_session.query(SQLAlchemyUser).filter_by(username=username).first()
 
+    @classmethod
+    def get_usernames(
+            cls,
+            db_session: Session,
+            usernames: List[str],
+    ) -> Set[str]:
+        if not usernames:
+            return set()
+        query = db_session.query(SQLAlchemyUser.username).filter(SQLAlchemyUser.username.in_(usernames))
+        return {username for username, in query}
+
     @classmethod
     def get_list(
             cls,
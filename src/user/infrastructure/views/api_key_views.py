@@ -0,0 +1,107 @@
+import logging
+from http import HTTPStatus
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Response
+from sqlalchemy.orm import Session
+
+import messages
+from database import get_db
+from depends import check_authenticated
+from depends import get_api_key_repository
+from depends import get_current_user
+from depends import str_to_uuid
+from user.domain.api_key import ApiKeyCreate
+from user.domain.api_key import ApiKeyCreated
+from user.domain.api_key import ApiKeyOut
+from user.domain.api_key_repository import ApiKeyRepository
+from user.domain.user import CurrentUser
+from user.security import create_api_key
+
+api_api_keys = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+
+@api_api_keys.post(
+    path="",
+    description="Create a new API key for the current user. The key is only returned now, keep it safe. "
+                "Send it in the X-API-Key header or as Bearer token.",
+    status_code=HTTPStatus.CREATED,
+    response_model=ApiKeyCreated,
+    responses={
+        400: {"description": messages.API_KEY_CREATE_ERROR},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def create(
+        *,
+        db_session: Session = Depends(get_db),
+        api_key_repository: ApiKeyRepository = Depends(get_api_key_repository),
+        current_user: CurrentUser = Depends(get_current_user),
+        payload: ApiKeyCreate,
+) -> ApiKeyCreated:
+    prefix, key, key_hash = create_api_key()
+    new_api_key = api_key_repository.create(
+        db_session=db_session,
+        user_id=current_user.id,
+        name=payload.name,
+        prefix=prefix,
+        key_hash=key_hash,
+    )
+    if not new_api_key:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.API_KEY_CREATE_ERROR)
+
+    return ApiKeyCreated(**ApiKeyOut.from_orm(new_api_key).dict(), key=key)
+
+
+@api_api_keys.get(
+    path="",
+    description="List the API keys of the current user.",
+    response_model=List[ApiKeyOut],
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def get_list(
+        *,
+        db_session: Session = Depends(get_db),
+        api_key_repository: ApiKeyRepository = Depends(get_api_key_repository),
+        current_user: CurrentUser = Depends(get_current_user),
+) -> List[ApiKeyOut]:
+    return api_key_repository.get_list(db_session=db_session, user_id=current_user.id)
+
+
+@api_api_keys.delete(
+    path="/{uuid}",
+    description="Revoke an API key of the current user.",
+    status_code=HTTPStatus.NO_CONTENT,
+    responses={
+        400: {"description": messages.UUID_NOT_VALID},
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        404: {"description": messages.API_KEY_NOT_FOUND},
+    },
+    dependencies=[Depends(check_authenticated)],
+)
+def delete(
+        *,
+        db_session: Session = Depends(get_db),
+        api_key_repository: ApiKeyRepository = Depends(get_api_key_repository),
+        current_user: CurrentUser = Depends(get_current_user),
+        api_key_uuid: UUID = Depends(str_to_uuid),
+) -> None:
+    revoked = api_key_repository.revoke(db_session=db_session, api_key_id=api_key_uuid, user_id=current_user.id)
+    if not revoked:
+        logger.exception(f"{messages.API_KEY_NOT_FOUND} - ID: {api_key_uuid}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.API_KEY_NOT_FOUND)
+    return Response(status_code=HTTPStatus.NO_CONTENT.value)
@@ -1,18 +1,29 @@
+import hmac
 import logging
+import math
+from datetime import datetime
+from datetime import timezone
 from http import HTTPStatus
 
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Request
 from sqlalchemy.orm import Session
 
 import messages
 from database import get_db
+from depends import get_refresh_token_repository
 from depends import get_user_repository
 from user.domain.auth import AuthLogin
+from user.domain.auth import AuthRefresh
 from user.domain.auth import AuthToken
+from user.domain.refresh_token_repository import RefreshTokenRepository
 from user.domain.user_repository import UserRepository
+from user.login_limiter import login_limiter
 from user.security import create_access_token
+from user.security import create_refresh_token
+from user.security import parse_refresh_token
 from user.security import verify_password
 
 api_auth = APIRouter()
@@ -25,26 +36,114 @@ logger = logging.getLogger(__name__)
     status_code=HTTPStatus.OK,
     response_model=AuthToken,
     responses={
-        400: {"description": messages.USER_INCORRECT_USERNAME_PASSWORD}
+        400: {"description": messages.USER_INCORRECT_USERNAME_PASSWORD},
+        429: {"description": messages.LOGIN_TOO_MANY_ATTEMPTS},
+        503: {"description": messages.PASSWORD_HASHER_BUSY},
     },
 )
 def generate_token(
         *,
+        request: Request,
         db_session: Session = Depends(get_db),
         user_repository: UserRepository = Depends(get_user_repository),
+        refresh_token_repository: RefreshTokenRepository = Depends(get_refresh_token_repository),
         payload: AuthLogin,
 ) -> AuthToken:
+    # before any database or bcrypt work
+    client_ip = request.client.host
+    retry_after = login_limiter.check(username=payload.username, ip=client_ip)
+    if retry_after:
+        logger.exception(f"{messages.LOGIN_TOO_MANY_ATTEMPTS} - username: {payload.username} - IP: {client_ip}")
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail=messages.LOGIN_TOO_MANY_ATTEMPTS,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     user_db = user_repository.get_by_username(db_session=db_session, username=payload.username)
 
     if not user_db or user_db.dt_deleted:
+        login_limiter.failure(username=payload.username, ip=client_ip)
         logger.exception(f"{messages.USER_NOT_FOUND} - username: {payload.username}")
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
 
     if not verify_password(plain_password=payload.password, hashed_password=user_db.password):
+        login_limiter.failure(username=payload.username, ip=client_ip)
         logger.exception(f"{messages.USER_INCORRECT_USERNAME_PASSWORD} - username: {payload.username}")
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.USER_INCORRECT_USERNAME_PASSWORD)
 
+    login_limiter.success(username=payload.username, ip=client_ip)
+
+    # new family of refresh tokens
+    token_id, refresh_token, token_hash = create_refresh_token()
+    refresh_token_db = refresh_token_repository.create(
+        db_session=db_session,
+        token_id=token_id,
+        user_id=user_db.id,
+        token_hash=token_hash,
+    )
+
+    return AuthToken(
+        access_token=create_access_token(user=user_db),
+        token_type="bearer",
+        refresh_token=refresh_token if refresh_token_db else None,
+    )
+
+
+@api_auth.post(
+    path="/refresh",
+    description="Get a new access token with a refresh token. The refresh token is rotated, the response has the next "
+                "one. Presenting a used refresh token again revokes all the tokens rotated from the same login.",
+    status_code=HTTPStatus.OK,
+    response_model=AuthToken,
+    responses={
+        401: {"description": messages.REFRESH_TOKEN_NOT_VALID},
+        404: {"description": messages.USER_NOT_FOUND},
+    },
+)
+def refresh(
+        *,
+        db_session: Session = Depends(get_db),
+        user_repository: UserRepository = Depends(get_user_repository),
+        refresh_token_repository: RefreshTokenRepository = Depends(get_refresh_token_repository),
+        payload: AuthRefresh,
+) -> AuthToken:
+    parsed = parse_refresh_token(refresh_token=payload.refresh_token)
+    refresh_token_db = None
+    if parsed:
+        refresh_token_db = refresh_token_repository.get_by_id(db_session=db_session, token_id=parsed[0])
+
+    if (
+            refresh_token_db is None
+            or not hmac.compare_digest(refresh_token_db.token_hash, parsed[1])
+            or refresh_token_db.dt_expires < datetime.now(timezone.utc)
+    ):
+        logger.exception(messages.REFRESH_TOKEN_NOT_VALID)
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.REFRESH_TOKEN_NOT_VALID)
+
+    user_db = user_repository.get_by_id(db_session=db_session, user_id=refresh_token_db.user_id)
+    if not user_db or user_db.dt_deleted:
+        logger.exception(f"{messages.USER_NOT_FOUND} - ID: {refresh_token_db.user_id}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+
+    token_id, refresh_token, token_hash = create_refresh_token()
+    new_refresh_token_db = None
+    if not refresh_token_db.dt_used and not refresh_token_db.dt_revoked:
+        new_refresh_token_db = refresh_token_repository.rotate(
+            db_session=db_session,
+            refresh_token=refresh_token_db,
+            new_token_id=token_id,
+            new_token_hash=token_hash,
+        )
+
+    if new_refresh_token_db is None:
+        # a used or revoked token presented again may have been stolen, so its family is revoked
+        refresh_token_repository.revoke_family(db_session=db_session, family_id=refresh_token_db.family_id)
+        logger.exception(f"{messages.REFRESH_TOKEN_NOT_VALID} - reused: {refresh_token_db.id}")
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=messages.REFRESH_TOKEN_NOT_VALID)
+
     return AuthToken(
-        access_token=create_access_token(username=user_db.username),
+        access_token=create_access_token(user=user_db),
         token_type="bearer",
+        refresh_token=refresh_token,
     )
@@ -1,7 +1,9 @@
 import logging
 from datetime import datetime
 from http import HTTPStatus
+from typing import List
 from typing import Optional
+from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import Depends
@@ -13,12 +15,17 @@ from fastapi_pagination import paginate
 from sqlalchemy.orm import Session
 
 import messages
+import settings
 from database import get_db
+from database import get_read_db
 from depends import check_authenticated_is_admin
+from depends import get_refresh_token_repository
 from depends import get_user_repository
+from depends import str_to_uuid
 from main_schema import SchemaID
-from user.depends import get_user_by_id
-from user.domain.user import User
+from user.domain.refresh_token_repository import RefreshTokenRepository
+from user.domain.user import UserBulkResult
+from user.domain.user import UserBulkStatus
 from user.domain.user import UserCreate
 from user.domain.user import UserOut
 from user.domain.user import UserUpdate
@@ -38,6 +45,7 @@ logger = logging.getLogger(__name__)
         400: {"description": messages.USERNAME_ALREADY_EXISTS},
         401: {"description": messages.USER_NOT_CREDENTIALS},
         403: {"description": messages.USER_NOT_PERMISSION},
+        503: {"description": messages.PASSWORD_HASHER_BUSY},
     },
     dependencies=[Depends(check_authenticated_is_admin)],
 )
@@ -61,6 +69,66 @@ def create(
     return SchemaID(id=new_user.id)
 
 
+@api_users.post(
+    path="/bulk",
+    description="Create a list of new users. Only for admins. "
+                "Return the result for each user: created, duplicate (the username already exists) or error.",
+    response_model=List[UserBulkResult],
+    status_code=HTTPStatus.OK,
+    responses={
+        401: {"description": messages.USER_NOT_CREDENTIALS},
+        403: {"description": messages.USER_NOT_PERMISSION},
+        413: {"description": messages.USER_BULK_TOO_LARGE},
+        503: {"description": messages.PASSWORD_HASHER_BUSY},
+    },
+    dependencies=[Depends(check_authenticated_is_admin)],
+)
+def create_bulk(
+        *,
+        db_session: Session = Depends(get_db),
+        user_repository: UserRepository = Depends(get_user_repository),
+        payload: List[UserCreate],
+) -> List[UserBulkResult]:
+    if len(payload) > settings.USER_BULK_MAX_SIZE:
+        logger.exception(f"{messages.USER_BULK_TOO_LARGE} - size: {len(payload)}")
+        raise HTTPException(status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE, detail=messages.USER_BULK_TOO_LARGE)
+
+    # the existing usernames are checked with one query, so their passwords are not hashed
+    existing = user_repository.get_usernames(db_session=db_session, usernames=[user.username for user in payload])
+
+    # a username repeated in the payload is created only once, the next ones are duplicates
+    to_create = dict()
+    for user in payload:
+        if user.username not in existing and user.username not in to_create:
+            to_create[user.username] = user
+    to_create = list(to_create.values())
+
+    created = dict()
+    errors = set()
+    for start in range(0, len(to_create), settings.USER_BULK_BATCH_SIZE):
+        batch = to_create[start:start + settings.USER_BULK_BATCH_SIZE]
+        created_ids = user_repository.create_many(db_session=db_session, users=batch)
+        if created_ids is None:
+            logger.exception(f"{messages.USER_CREATE_ERROR} - batch: {start}")
+            errors.update(user.username for user in batch)
+            continue
+        created.update(created_ids)
+
+    results = []
+    for user in payload:
+        if user.username in created:
+            results.append(UserBulkResult(
+                username=user.username,
+                id=created.pop(user.username),
+                status=UserBulkStatus.CREATED,
+            ))
+        elif user.username in errors:
+            results.append(UserBulkResult(username=user.username, status=UserBulkStatus.ERROR))
+        else:
+            results.append(UserBulkResult(username=user.username, status=UserBulkStatus.DUPLICATE))
+    return results
+
+
 @api_users.get(
     path="",
     description="List all users. Only for admins.",
@@ -75,7 +143,7 @@ def create(
 )
 def get_list(
         *,
-        db_session: Session = Depends(get_db),
+        db_session: Session = Depends(get_read_db),
         user_repository: UserRepository = Depends(get_user_repository),
         params: Params = Depends(),
         only_users: Optional[bool] = True,
@@ -94,6 +162,7 @@ def get_list(
         401: {"description": messages.USER_NOT_CREDENTIALS},
         403: {"description": messages.USER_NOT_PERMISSION},
         404: {"description": messages.USER_NOT_FOUND},
+        503: {"description": messages.PASSWORD_HASHER_BUSY},
     },
     dependencies=[Depends(check_authenticated_is_admin)],
 )
@@ -101,16 +170,26 @@ def update(
         *,
         db_session: Session = Depends(get_db),
         user_repository: UserRepository = Depends(get_user_repository),
-        user: User = Depends(get_user_by_id),
+        refresh_token_repository: RefreshTokenRepository = Depends(get_refresh_token_repository),
+        user_uuid: UUID = Depends(str_to_uuid),
         payload: UserUpdate,
 ) -> None:
     # check the unique username
-    user_db = user_repository.get_by_username(db_session=db_session, username=payload.username)
-    if user_db:
-        logger.exception(messages.USERNAME_ALREADY_EXISTS)
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.USERNAME_ALREADY_EXISTS)
+    if payload.username is not None:
+        user_db = user_repository.get_by_username(db_session=db_session, username=payload.username)
+        if user_db:
+            logger.exception(messages.USERNAME_ALREADY_EXISTS)
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=messages.USERNAME_ALREADY_EXISTS)
+
+    # a new password or a deactivation logs out the sessions of the user
+    logout = payload.password is not None or payload.dt_deleted is not None
 
-    user_repository.update(db_session, user_id=user.id, new_info=payload)
+    updated = user_repository.update(db_session, user_id=user_uuid, new_info=payload)
+    if not updated:
+        logger.exception(f"{messages.USER_NOT_FOUND} - ID: {user_uuid}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+    if logout:
+        refresh_token_repository.revoke_all(db_session=db_session, user_id=user_uuid)
     return Response(status_code=HTTPStatus.NO_CONTENT.value)
 
 
@@ -130,7 +209,12 @@ def delete(
         *,
         db_session: Session = Depends(get_db),
         user_repository: UserRepository = Depends(get_user_repository),
-        user: User = Depends(get_user_by_id),
+        refresh_token_repository: RefreshTokenRepository = Depends(get_refresh_token_repository),
+        user_uuid: UUID = Depends(str_to_uuid),
 ) -> None:
-    user_repository.update(db_session, user_id=user.id, new_info=UserUpdate(dt_deleted=datetime.utcnow()))
+    updated = user_repository.update(db_session, user_id=user_uuid, new_info=UserUpdate(dt_deleted=datetime.utcnow()))
+    if not updated:
+        logger.exception(f"{messages.USER_NOT_FOUND} - ID: {user_uuid}")
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=messages.USER_NOT_FOUND)
+    refresh_token_repository.revoke_all(db_session=db_session, user_id=user_uuid)
     return Response(status_code=HTTPStatus.NO_CONTENT.value)
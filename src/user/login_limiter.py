@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from collections import deque
+from typing import Deque
+from typing import Dict
+
+import settings
+
+
+class _State:
+    __slots__ = ("failures", "locked_until", "lockouts")
+
+    def __init__(self) -> None:
+        self.failures: Deque[float] = deque()
+        self.locked_until = 0.0
+        self.lockouts = 0
+
+
+class LoginLimiter:
+    """
+    In-memory sliding window of failed logins by username and by client IP.
+    A key with too many failures in the window is locked, each new lockout of the same key lasts twice the previous
+    one. It is checked before reading the user or running bcrypt, so a rejected attempt costs microseconds.
+    """
+
+    def __init__(
+            self,
+            max_failures_username: int,
+            max_failures_ip: int,
+            window_seconds: float,
+            lockout_seconds: float,
+            lockout_max_seconds: float,
+            max_keys: int = 100000,
+    ) -> None:
+        self.max_failures = dict(username=max_failures_username, ip=max_failures_ip)
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.lockout_max_seconds = lockout_max_seconds
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        # least recently used first, so the oldest keys are dropped above max_keys
+        self.states: "OrderedDict[str, _State]" = OrderedDict()
+        self.counters = dict(allowed=0, rejected=0, failures=0, successes=0, lockouts=0)
+
+    def _get(
+            self,
+            key: str,
+            now: float,
+    ) -> _State:
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _State()
+            if len(self.states) > self.max_keys:
+                self.states.popitem(last=False)
+        else:
+            self.states.move_to_end(key)
+        while state.failures and state.failures[0] <= now - self.window_seconds:
+            state.failures.popleft()
+        # the backoff is forgotten after a long enough quiet period
+        if not state.failures and state.locked_until + self.lockout_max_seconds <= now:
+            state.lockouts = 0
+        return state
+
+    def check(
+            self,
+            username: str,
+            ip: str,
+    ) -> float:
+        """
+        Check if a login attempt is allowed.
+
+        :param username: username
+        :param ip: client IP
+        :return: seconds until the attempt is allowed, 0 if it is allowed now
+        """
+        now = time.monotonic()
+        with self.lock:
+            retry_after = max(
+                self._get(key=f"username:{username}", now=now).locked_until - now,
+                self._get(key=f"ip:{ip}", now=now).locked_until - now,
+                0,
+            )
+            self.counters["rejected" if retry_after else "allowed"] += 1
+        return retry_after
+
+    def failure(
+            self,
+            username: str,
+            ip: str,
+    ) -> None:
+        """
+        Record a failed login, and lock the username or the IP if they have too many failures.
+
+        :param username: username
+        :param ip: client IP
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.counters["failures"] += 1
+            for kind, key in (("username", f"username:{username}"), ("ip", f"ip:{ip}")):
+                state = self._get(key=key, now=now)
+                state.failures.append(now)
+                if len(state.failures) >= self.max_failures[kind]:
+                    lockout = min(self.lockout_seconds * 2 ** state.lockouts, self.lockout_max_seconds)
+                    state.locked_until = now + lockout
+                    state.lockouts += 1
+                    state.failures.clear()
+                    self.counters["lockouts"] += 1
+
+    def success(
+            self,
+            username: str,
+            ip: str,
+    ) -> None:
+        """
+        Record a successful login, it clears the failures of the username.
+
+        :param username: username
+        :param ip: client IP
+        """
+        with self.lock:
+            self.counters["successes"] += 1
+            self.states.pop(f"username:{username}", None)
+
+    def stats(self) -> Dict:
+        """
+        Return the counters and the keys currently locked.
+
+        :return: stats
+        """
+        now = time.monotonic()
+        with self.lock:
+            locked = sum(1 for state in self.states.values() if state.locked_until > now)
+            return dict(**self.counters, keys=len(self.states), locked=locked)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.states.clear()
+            self.counters = dict.fromkeys(self.counters, 0)
+
+
+login_limiter = LoginLimiter(
+    max_failures_username=settings.LOGIN_MAX_FAILURES_USERNAME,
+    max_failures_ip=settings.LOGIN_MAX_FAILURES_IP,
+    window_seconds=settings.LOGIN_WINDOW_SECONDS,
+    lockout_seconds=settings.LOGIN_LOCKOUT_SECONDS,
+    lockout_max_seconds=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+)
@@ -1,29 +1,223 @@
+import hashlib
+import hmac
+import secrets
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from datetime import timedelta
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+from uuid import uuid4
 
 from jose import jwt
 from passlib.context import CryptContext
 
 import settings
+from user.domain.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# start of the API keys, to tell them from the access tokens in the Authorization header
+API_KEY_PREFIX = "crm_"
+
+# bcrypt runs in its own process pool, out of the threadpool of the views and the GIL.
+# Running and queued calls are limited, above that PasswordHasherBusy is raised instead of waiting.
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASHER_WORKERS + settings.PASSWORD_HASHER_QUEUE_SIZE)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    The password hasher pool and its queue are full.
+    """
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASHER_WORKERS)
+        return _executor
+
+
+def _run(
+        fn: Callable,
+        *args: Any,
+) -> Any:
+    """
+    Run a bcrypt function in the password hasher pool, or inline if PASSWORD_HASHER_WORKERS is 0.
+
+    :param fn: function, it must be picklable
+    :param args: arguments
+    :raise: PasswordHasherBusy if the pool and its queue are full
+    :return: result of the function
+    """
+    global _executor
+    if settings.PASSWORD_HASHER_WORKERS == 0:
+        return fn(*args)
+
+    if not _slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return _get_executor().submit(fn, *args).result()
+    except BrokenProcessPool:
+        # a worker died, the next call starts a new pool
+        with _executor_lock:
+            _executor = None
+        raise
+    finally:
+        _slots.release()
+
+
+def _run_many(
+        fn: Callable,
+        args: List[Any],
+) -> List[Any]:
+    """
+    Run a bcrypt function for every argument in parallel in the password hasher pool, or inline if
+    PASSWORD_HASHER_WORKERS is 0. Every call takes a slot of the queue, and no more calls than workers are queued at
+    once, so the other requests wait at most for one call per worker.
+
+    :param fn: function, it must be picklable
+    :param args: argument of every call
+    :raise: PasswordHasherBusy if the pool and its queue are full
+    :return: results in the same order
+    """
+    global _executor
+    if settings.PASSWORD_HASHER_WORKERS == 0:
+        return [fn(arg) for arg in args]
+
+    results = []
+    futures = deque()
+    try:
+        for arg in args:
+            # wait for the oldest call of the batch until there is a free slot
+            while len(futures) >= settings.PASSWORD_HASHER_WORKERS or not _slots.acquire(blocking=False):
+                if not futures:
+                    raise PasswordHasherBusy()
+                results.append(futures.popleft().result())
+            try:
+                future = _get_executor().submit(fn, arg)
+            except BaseException:
+                _slots.release()
+                raise
+            future.add_done_callback(lambda _: _slots.release())
+            futures.append(future)
+        while futures:
+            results.append(futures.popleft().result())
+        return results
+    except BrokenProcessPool:
+        with _executor_lock:
+            _executor = None
+        raise
+    finally:
+        # on error, the calls not started are dropped and release their slot
+        for future in futures:
+            future.cancel()
+
+
+def _verify(
+        plain_password: str,
+        hashed_password: str,
+) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(
+        password: str,
+) -> str:
+    return pwd_context.hash(password)
+
 
 def create_access_token(
-        username: str,
+        user: User,
 ) -> str:
     """
-    Create a new access token.
+    Create a new access token. It carries the claims needed to authenticate without reading the user.
 
-    :param username: username
+    :param user: user
     :return: access token
     """
-    expire = datetime.utcnow() + timedelta(minutes=30)
-    to_encode = dict(exp=expire, sub=username)
+    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = dict(exp=expire, sub=user.username, uid=str(user.id), is_admin=user.is_admin, epoch=user.token_epoch)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
 
+def create_refresh_token() -> Tuple[UUID, str, str]:
+    """
+    Create a new refresh token "<ID>.<secret>". Only the HMAC of the secret is stored, so it is checked without bcrypt.
+
+    :return: ID, refresh token for the client and digest to store
+    """
+    token_id = uuid4()
+    secret = secrets.token_urlsafe(32)
+    return token_id, f"{token_id}.{secret}", get_secret_digest(secret=secret)
+
+
+def get_secret_digest(
+        secret: str,
+) -> str:
+    """
+    HMAC-SHA256 of the secret of a refresh token or an API key.
+
+    :param secret: secret
+    :return: digest in hex
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), secret.encode(), hashlib.sha256).hexdigest()
+
+
+def parse_refresh_token(
+        refresh_token: str,
+) -> Optional[Tuple[UUID, str]]:
+    """
+    Split a refresh token into its ID and the digest of its secret.
+
+    :param refresh_token: refresh token
+    :return: ID and digest, None if the format is not valid
+    """
+    token_id, _, secret = refresh_token.partition(".")
+    if not secret:
+        return None
+    try:
+        return UUID(token_id), get_secret_digest(secret=secret)
+    except ValueError:
+        return None
+
+
+def create_api_key() -> Tuple[str, str, str]:
+    """
+    Create a new API key "crm_<prefix>.<secret>". The prefix is stored to find it, and only the HMAC of the secret.
+
+    :return: prefix, API key for the client and digest to store
+    """
+    prefix = f"{API_KEY_PREFIX}{secrets.token_hex(6)}"
+    secret = secrets.token_urlsafe(32)
+    return prefix, f"{prefix}.{secret}", get_secret_digest(secret=secret)
+
+
+def parse_api_key(
+        api_key: str,
+) -> Optional[Tuple[str, str]]:
+    """
+    Split an API key into its prefix and the digest of its secret.
+
+    :param api_key: API key
+    :return: prefix and digest, None if the format is not valid
+    """
+    prefix, _, secret = api_key.partition(".")
+    if not prefix.startswith(API_KEY_PREFIX) or not secret:
+        return None
+    return prefix, get_secret_digest(secret=secret)
+
+
 def verify_password(
         plain_password: str,
         hashed_password: str,
@@ -33,9 +227,10 @@ def verify_password(
 
     :param plain_password: plain password
     :param hashed_password: hashed password
+    :raise: PasswordHasherBusy if the password hasher is full
     :return:
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run(_verify, plain_password, hashed_password)
 
 
 def get_password_hash(
@@ -45,6 +240,20 @@ def get_password_hash(
     Generate a hashed password.
 
     :param password: password
+    :raise: PasswordHasherBusy if the password hasher is full
     :return: hashed password
     """
-    return pwd_context.hash(password)
+    return _run(_hash, password)
+
+
+def get_password_hashes(
+        passwords: List[str],
+) -> List[str]:
+    """
+    Generate the hashed passwords of a list, in parallel.
+
+    :param passwords: passwords
+    :raise: PasswordHasherBusy if the password hasher is full
+    :return: hashed passwords in the same order
+    """
+    return _run_many(_hash, passwords)
@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from uuid import UUID
+
+import settings
+from cache_invalidation import cache_invalidation_listener
+from user.domain.user import User
+
+
+class TokenEpoch(NamedTuple):
+    epoch: int
+    is_active: bool
+    loaded_at: float
+
+
+# In-process map user ID -> token epoch, so get_current_user does not read the user on every request.
+# The entries of this worker are dropped when it updates the user, the ones of other workers expire after the TTL.
+_epochs: Dict[UUID, TokenEpoch] = dict()
+_lock = threading.Lock()
+
+
+def get(
+        user_id: UUID,
+) -> Optional[TokenEpoch]:
+    """
+    Get the token epoch of a user.
+
+    :param user_id: user's ID
+    :return: token epoch, None if it is not known or it has expired
+    """
+    token_epoch = _epochs.get(user_id)
+    if token_epoch is None or time.monotonic() - token_epoch.loaded_at > settings.USER_TOKEN_EPOCH_TTL_SECONDS:
+        return None
+    return token_epoch
+
+
+def put(
+        user: User,
+) -> TokenEpoch:
+    """
+    Store the token epoch of a user read from the database.
+
+    :param user: user
+    :return: token epoch
+    """
+    token_epoch = TokenEpoch(epoch=user.token_epoch, is_active=user.dt_deleted is None, loaded_at=time.monotonic())
+    with _lock:
+        _epochs[user.id] = token_epoch
+    return token_epoch
+
+
+def invalidate(
+        user_id: UUID,
+) -> None:
+    """
+    Drop the token epoch of a user, the next request reads it again.
+
+    :param user_id: user's ID
+    """
+    with _lock:
+        _epochs.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _epochs.clear()
+
+
+def _on_invalidation(
+        table: Optional[str],
+        ids: Optional[List[str]],
+) -> None:
+    # notification of a write of another worker
+    if table not in (None, "user"):
+        return
+    if ids is None:
+        clear()
+        return
+    for user_id in ids:
+        invalidate(user_id=UUID(user_id))
+
+
+cache_invalidation_listener.subscribe(_on_invalidation)
@@ -1,5 +1,6 @@
 import os
 from typing import Any
+from typing import AsyncGenerator
 from typing import Dict
 from typing import Generator
 from uuid import UUID
@@ -10,21 +11,59 @@ from alembic.command import upgrade
 from alembic.config import Config
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 from sqlalchemy_utils import create_database
 from sqlalchemy_utils import database_exists
 from starlette.testclient import TestClient
 
 import settings
+from customer.customer_cache import customer_cache
+from customer.customer_cache import customer_single_flight
+from database import get_async_database_url
 from database import get_db
 from main import app
+from response_cache import response_cache
+from user import token_epochs
+from user.domain.api_key_repository import ApiKeyRepository
+from user.domain.async_user_repository import AsyncUserRepository
+from user.domain.refresh_token_repository import RefreshTokenRepository
 from user.domain.user import User
 from user.domain.user import UserCreate
 from user.domain.user_repository import UserRepository
+from user.infrastructure.repositories.sqlalchemy_api_key_repository import SQLAlchemyApiKeyRepository
+from user.infrastructure.repositories.sqlalchemy_async_user_repository import SQLAlchemyAsyncUserRepository
+from user.infrastructure.repositories.sqlalchemy_refresh_token_repository import SQLAlchemyRefreshTokenRepository
 from user.infrastructure.repositories.sqlalchemy_user_repository import SQLAlchemyUserRepository
+from user.login_limiter import login_limiter
 from user.security import create_access_token
 
 
+@pytest.fixture(autouse=True)
+def clear_token_epochs() -> None:
+    # the database is rolled back after every test, so the epochs known by the worker are not valid
+    token_epochs.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_login_limiter() -> None:
+    login_limiter.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_customer_cache() -> None:
+    # the database is rolled back after every test
+    customer_cache.clear()
+    customer_single_flight.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache() -> None:
+    response_cache.clear()
+
+
 @pytest.fixture
 def client(
         db_session: Session,
@@ -76,11 +115,43 @@ def db_session(
     connection.close()
 
 
+@pytest.fixture
+async def async_db_session(
+        migrations: None,
+) -> AsyncGenerator[AsyncSession, None]:
+    # the connections of an async engine are bound to the event loop of the test
+    engine = create_async_engine(get_async_database_url(), poolclass=NullPool)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+
+        yield session
+
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
+
+
 @pytest.fixture
 def user_repository() -> UserRepository:
     return SQLAlchemyUserRepository()
 
 
+@pytest.fixture
+def api_key_repository() -> ApiKeyRepository:
+    return SQLAlchemyApiKeyRepository()
+
+
+@pytest.fixture
+def refresh_token_repository() -> RefreshTokenRepository:
+    return SQLAlchemyRefreshTokenRepository()
+
+
+@pytest.fixture
+def async_user_repository() -> AsyncUserRepository:
+    return SQLAlchemyAsyncUserRepository()
+
+
 @pytest.fixture
 def user_admin(
         db_session: Session,
@@ -106,11 +177,11 @@ def user_1(
 def user_admin_headers(
         user_admin: User,
 ) -> Dict[str, str]:
-    return dict(Authorization=f"Bearer {create_access_token(username=user_admin.username)}")
+    return dict(Authorization=f"Bearer {create_access_token(user=user_admin)}")
 
 
 @pytest.fixture
 def user_1_headers(
         user_1: User,
 ) -> Dict[str, str]:
-    return dict(Authorization=f"Bearer {create_access_token(username=user_1.username)}")
+    return dict(Authorization=f"Bearer {create_access_token(user=user_1)}")
@@ -1,10 +1,23 @@
+import io
+from typing import Any
+from typing import Generator
+
+import boto3
 import pytest
+from moto import mock_s3
+from PIL import Image
 from sqlalchemy.orm import Session
 
+import settings
+from customer.domain.async_customer_repository import AsyncCustomerRepository
 from customer.domain.customer import Customer
 from customer.domain.customer import CustomerCreate
 from customer.domain.customer_repository import CustomerRepository
+from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.repositories.sqlalchemy_async_customer_repository import SQLAlchemyAsyncCustomerRepository
 from customer.infrastructure.repositories.sqlalchemy_customer_repository import SQLAlchemyCustomerRepository
+from customer.infrastructure.services import aws_s3_image_storage_service
+from customer.infrastructure.services.aws_s3_image_storage_service import AWSS3ImageStorageService
 from user.domain.user import User
 
 
@@ -13,6 +26,11 @@ def customer_repository() -> CustomerRepository:
     return SQLAlchemyCustomerRepository()
 
 
+@pytest.fixture
+def async_customer_repository() -> AsyncCustomerRepository:
+    return SQLAlchemyAsyncCustomerRepository()
+
+
 @pytest.fixture
 def customer_1(
         db_session: Session,
@@ -27,3 +45,35 @@ def customer_1(
                   "%20the%20agile%20monkeys.svg",
     )
     return customer_repository.create(db_session, customer=customer_1, current_user=user_1)
+
+
+@pytest.fixture
+def s3_bucket(
+        monkeypatch: Any,
+) -> Generator[Any, Any, None]:
+    monkeypatch.setattr(settings, "BUCKET", "bucket-test")
+    monkeypatch.setattr(settings, "S3_ENDPOINT_URL", None)
+    monkeypatch.setattr(settings, "S3_REGION_NAME", "us-east-1")
+    monkeypatch.setattr(settings, "S3_AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setattr(settings, "S3_AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_WORKERS", 0)
+    # the client of the process is created again inside the mock
+    monkeypatch.setattr(aws_s3_image_storage_service, "_s3_client", None)
+    with mock_s3():
+        s3 = boto3.resource("s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing")
+        bucket = s3.create_bucket(Bucket="bucket-test")
+        yield bucket
+
+
+@pytest.fixture
+def image_storage_service(
+        s3_bucket: Any,
+) -> ImageStorageService:
+    return AWSS3ImageStorageService()
+
+
+@pytest.fixture
+def photo_png() -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (800, 400), color="orange").save(output, format="PNG")
+    return output.getvalue()
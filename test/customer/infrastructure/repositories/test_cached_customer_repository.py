@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from customer.customer_cache import CustomerCache
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerUpdate
+from customer.domain.customer_repository import CustomerRepository
+from customer.infrastructure.repositories.cached_customer_repository import CachedCustomerRepository
+from response_cache import response_cache
+from single_flight import SingleFlight
+from user.domain.user import User
+
+
+@pytest.fixture
+def customer_cache() -> CustomerCache:
+    return CustomerCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=60)
+
+
+@pytest.fixture
+def cached_customer_repository(
+        customer_repository: CustomerRepository,
+        customer_cache: CustomerCache,
+) -> CachedCustomerRepository:
+    return CachedCustomerRepository(
+        repository=customer_repository,
+        cache=customer_cache,
+        response_cache=response_cache,
+        single_flight=SingleFlight(),
+    )
+
+
+def test_get_by_id_cached(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        customer_cache: CustomerCache,
+        customer_1: Customer,
+) -> None:
+    customer = cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    assert customer.id == customer_1.id
+    assert customer.name == customer_1.name
+    assert cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id) == customer
+
+    stats = customer_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_get_by_id_negative_then_create(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        customer_cache: CustomerCache,
+        user_1: User,
+) -> None:
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is None
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is None
+    assert customer_cache.stats()["negative_hits"] == 1
+
+    new_customer = CustomerCreate(id="new", name="name", surname="surname")
+    cached_customer_repository.create(db_session, customer=new_customer, current_user=user_1)
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new").name == "name"
+
+
+def test_update_invalidates(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new_id") is None
+
+    new_info = CustomerUpdate(id="new_id", name="new_name")
+    cached_customer_repository.update(db_session, customer_id=customer_1.id, new_info=new_info, current_user=user_1)
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new_id").name == "new_name"
+
+
+def test_update_photo_invalidates(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    cached_customer_repository.update_photo(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url="new_photo_url",
+        photo_status=None,
+        current_user=user_1,
+    )
+    assert cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id).photo_url == "new_photo_url"
+
+    cached_customer_repository.update_photo_derivatives(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url="new_photo_url",
+        photo_derivatives=dict(small="small_url"),
+    )
+    customer = cached_customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    assert customer.photo_derivatives == dict(small="small_url")
+
+
+def test_create_many_invalidates(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        user_1: User,
+) -> None:
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is None
+    cached_customer_repository.create_many(
+        db_session,
+        customers=[CustomerCreate(id="new", name="name", surname="surname")],
+        current_user=user_1,
+    )
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is not None
+
+
+def test_import_many_invalidates(
+        db_session: Session,
+        cached_customer_repository: CachedCustomerRepository,
+        user_1: User,
+) -> None:
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is None
+    cached_customer_repository.import_many(
+        db_session,
+        rows=iter([("new", "name", "surname", None)]),
+        current_user=user_1,
+    )
+    assert cached_customer_repository.get_by_id(db_session, customer_id="new") is not None
@@ -0,0 +1,114 @@
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from customer.domain.async_customer_repository import AsyncCustomerRepository
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerUpdate
+from user.domain.async_user_repository import AsyncUserRepository
+from user.domain.user import User
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def user_admin_async(
+        async_db_session: AsyncSession,
+        async_user_repository: AsyncUserRepository,
+) -> User:
+    return await async_user_repository.get_by_id(async_db_session, user_id=UUID("6fc330b1-3d65-402c-b7a3-b5b526240505"))
+
+
+async def test_create_ok(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+        user_admin_async: User,
+) -> None:
+    new_customer = CustomerCreate(id="The Agile Monkey", name="The agile monkey SL", surname="surname")
+    customer = await async_customer_repository.create(
+        async_db_session,
+        customer=new_customer,
+        current_user=user_admin_async,
+    )
+
+    assert customer.id == new_customer.id
+    assert customer.created_by_id == user_admin_async.id
+    assert await async_customer_repository.count(async_db_session) == 1
+
+
+async def test_create_id_already_exists(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+        user_admin_async: User,
+) -> None:
+    new_customer = CustomerCreate(id="The Agile Monkey", name="The agile monkey SL", surname="surname")
+    await async_customer_repository.create(async_db_session, customer=new_customer, current_user=user_admin_async)
+
+    result = await async_customer_repository.create(
+        async_db_session,
+        customer=new_customer,
+        current_user=user_admin_async,
+    )
+    assert result is None
+
+
+async def test_update_ok(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+        user_admin_async: User,
+) -> None:
+    new_customer = CustomerCreate(id="The Agile Monkey", name="The agile monkey SL", surname="surname")
+    await async_customer_repository.create(async_db_session, customer=new_customer, current_user=user_admin_async)
+
+    updated = await async_customer_repository.update(
+        async_db_session,
+        customer_id=new_customer.id,
+        new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
+        current_user=user_admin_async,
+    )
+    assert updated is True
+    assert await async_customer_repository.count(async_db_session, only_actives=True) == 0
+
+
+async def test_update_not_exists(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+        user_admin_async: User,
+) -> None:
+    updated = await async_customer_repository.update(
+        async_db_session,
+        customer_id="not_exists",
+        new_info=CustomerUpdate(name="new_name"),
+        current_user=user_admin_async,
+    )
+    assert updated is False
+
+
+async def test_get_by_id_not_exists(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+) -> None:
+    assert await async_customer_repository.get_by_id(async_db_session, customer_id="not_exists") is None
+
+
+async def test_get_list_keyset_and_iter_all(
+        async_db_session: AsyncSession,
+        async_customer_repository: AsyncCustomerRepository,
+        user_admin_async: User,
+) -> None:
+    for i in range(5):
+        customer = CustomerCreate(id=f"customer_{i}", name="name", surname="surname")
+        await async_customer_repository.create(async_db_session, customer=customer, current_user=user_admin_async)
+
+    page_1 = await async_customer_repository.get_list_keyset(async_db_session, size=3)
+    assert [customer.id for customer in page_1] == ["customer_0", "customer_1", "customer_2"]
+
+    after = (page_1[-1].dt_created, page_1[-1].id)
+    page_2 = await async_customer_repository.get_list_keyset(async_db_session, size=3, after=after)
+    assert [customer.id for customer in page_2] == ["customer_3", "customer_4"]
+
+    result = [customer.id async for customer in async_customer_repository.iter_all(async_db_session, batch_size=2)]
+    assert result == [f"customer_{i}" for i in range(5)]
+    assert len(await async_customer_repository.get_list(async_db_session)) == 5
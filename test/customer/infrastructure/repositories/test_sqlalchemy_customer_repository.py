@@ -76,6 +76,59 @@ def test_update_ok(
     assert_dicts(original=customer_db.__dict__, expected=new_info.dict())
 
 
+def test_update_photo_derivatives_ok(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+) -> None:
+    photo_derivatives = dict(small="small_url")
+    updated = customer_repository.update_photo_derivatives(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url=customer_1.photo_url,
+        photo_derivatives=photo_derivatives,
+    )
+    assert updated is True
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_derivatives == photo_derivatives
+    assert customer_db.updated_by_id is None
+
+
+def test_update_photo_derivatives_other_photo(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+) -> None:
+    updated = customer_repository.update_photo_derivatives(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url="old_photo_url",
+        photo_derivatives=dict(small="small_url"),
+    )
+    assert updated is False
+
+
+def test_update_photo_url_clears_photo_derivatives(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    customer_repository.update_photo_derivatives(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url=customer_1.photo_url,
+        photo_derivatives=dict(small="small_url"),
+    )
+    new_info = CustomerUpdate(photo_url="new_photo_url")
+    customer_repository.update(db_session, customer_id=customer_1.id, new_info=new_info, current_user=user_1)
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_derivatives is None
+
+
 def test_get_by_id_not_exists(
         db_session: Session,
         customer_repository: CustomerRepository,
@@ -128,3 +181,155 @@ def test_get_list_only_actives(
     original = [customer.__dict__ for customer in result]
     expected = []
     assert_lists(original=original, expected=expected)
+
+
+def test_count_only_actives(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    customer_repository.update(
+        db_session=db_session,
+        customer_id=customer_1.id,
+        new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
+        current_user=user_1,
+    )
+    assert customer_repository.count(db_session, only_actives=True) == 0
+    assert customer_repository.count(db_session, only_actives=False) == 1
+
+
+def test_get_list_keyset_pages(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1: User,
+) -> None:
+    for i in range(5):
+        customer = CustomerCreate(id=f"customer_{i}", name="name", surname="surname")
+        customer_repository.create(db_session, customer=customer, current_user=user_1)
+
+    page_1 = customer_repository.get_list_keyset(db_session=db_session, size=3)
+    assert [customer.id for customer in page_1] == ["customer_0", "customer_1", "customer_2"]
+
+    after = (page_1[-1].dt_created, page_1[-1].id)
+    page_2 = customer_repository.get_list_keyset(db_session=db_session, size=3, after=after)
+    assert [customer.id for customer in page_2] == ["customer_3", "customer_4"]
+
+
+def test_get_list_keyset_only_actives(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    customer_repository.update(
+        db_session=db_session,
+        customer_id=customer_1.id,
+        new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
+        current_user=user_1,
+    )
+    assert customer_repository.get_list_keyset(db_session=db_session, only_actives=True) == []
+    assert len(customer_repository.get_list_keyset(db_session=db_session, only_actives=False)) == 1
+
+
+def test_iter_all_ok(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1: User,
+) -> None:
+    for i in range(5):
+        customer = CustomerCreate(id=f"customer_{i}", name="name", surname="surname")
+        customer_repository.create(db_session, customer=customer, current_user=user_1)
+
+    result = customer_repository.iter_all(db_session=db_session, batch_size=2)
+    assert [customer.id for customer in result] == [f"customer_{i}" for i in range(5)]
+
+
+def test_iter_all_only_actives(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    customer_repository.update(
+        db_session=db_session,
+        customer_id=customer_1.id,
+        new_info=CustomerUpdate(dt_deleted=datetime.utcnow()),
+        current_user=user_1,
+    )
+    assert list(customer_repository.iter_all(db_session=db_session, only_actives=True)) == []
+    assert len(list(customer_repository.iter_all(db_session=db_session, only_actives=False))) == 1
+
+
+def test_create_many_ok(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    customers = [
+        CustomerCreate(id="customer_1", name="name", surname="surname"),
+        CustomerCreate(id=customer_1.id, name="name", surname="surname"),
+        CustomerCreate(id="customer_2", name="name", surname="surname"),
+    ]
+    created_ids = customer_repository.create_many(db_session, customers=customers, current_user=user_1)
+
+    assert sorted(created_ids) == ["customer_1", "customer_2"]
+    assert customer_repository.count(db_session) == 3
+    assert customer_repository.get_by_id(db_session, customer_id="customer_2").created_by_id == user_1.id
+
+
+def test_create_many_empty(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1: User,
+) -> None:
+    assert customer_repository.create_many(db_session, customers=[], current_user=user_1) == []
+
+
+def test_import_many_ok(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    rows = [
+        ("customer_1", "name", "surname", "photo_url"),
+        (customer_1.id, "name", "surname", None),
+        ("customer_1", "name", "surname", None),
+        ("customer_2", "name, with comma", "surname", None),
+    ]
+    imported = customer_repository.import_many(db_session, rows=iter(rows), current_user=user_1, chunk_size=2)
+
+    assert imported == 2
+    assert customer_repository.count(db_session) == 3
+    customer_db = customer_repository.get_by_id(db_session, customer_id="customer_2")
+    assert customer_db.name == "name, with comma"
+    assert customer_db.photo_url is None
+    assert customer_db.created_by_id == user_1.id
+
+
+def test_create_id_already_exists(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1: User,
+) -> None:
+    new_customer = CustomerCreate(
+        id=customer_1.id,
+        name="new_name",
+        surname="new_surname",
+    )
+    assert customer_repository.create(db_session, customer=new_customer, current_user=user_1) is None
+    assert customer_repository.count(db_session) == 1
+    assert customer_repository.get_by_id(db_session, customer_id=customer_1.id).name == customer_1.name
+
+
+def test_update_not_exists(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1: User,
+) -> None:
+    new_info = CustomerUpdate(name="new_name")
+    updated = customer_repository.update(db_session, customer_id="not_exists", new_info=new_info, current_user=user_1)
+    assert updated is False
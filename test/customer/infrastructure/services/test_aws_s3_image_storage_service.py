@@ -0,0 +1,101 @@
+import base64
+import io
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+import requests
+from fastapi import HTTPException
+
+import settings
+from customer.domain.image_storage_service import ImageStorageService
+from customer.infrastructure.services.aws_s3_image_storage_service import get_s3_client
+
+
+def test_get_s3_client_shared(
+        s3_bucket: Any,
+) -> None:
+    assert get_s3_client() is get_s3_client()
+
+
+def test_upload_ok(
+        s3_bucket: Any,
+        image_storage_service: ImageStorageService,
+) -> None:
+    image_storage_service.upload(path="customer/1/photo.png", image=base64.b64encode(b"image").decode())
+    assert s3_bucket.Object("customer/1/photo.png").get()["Body"].read() == b"image"
+
+
+def test_upload_base64_not_valid(
+        image_storage_service: ImageStorageService,
+) -> None:
+    with pytest.raises(HTTPException):
+        image_storage_service.upload(path="customer/1/photo.png", image="not base64")
+
+
+def test_upload_stream_ok(
+        s3_bucket: Any,
+        image_storage_service: ImageStorageService,
+) -> None:
+    image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(b"image"), content_type="image/png")
+    s3_object = s3_bucket.Object("customer/1/photo").get()
+    assert s3_object["Body"].read() == b"image"
+    assert s3_object["ContentType"] == "image/png"
+
+
+def test_upload_stream_multipart(
+        s3_bucket: Any,
+        image_storage_service: ImageStorageService,
+        monkeypatch: Any,
+) -> None:
+    # 5 MB is the minimum size of a part
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 5 * 1024 * 1024)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNKSIZE", 5 * 1024 * 1024)
+    image = b"x" * (6 * 1024 * 1024)
+    image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(image), content_type="image/png")
+    s3_object = s3_bucket.Object("customer/1/photo").get()
+    assert s3_object["ContentLength"] == len(image)
+    # the ETag of a multipart upload ends with the number of parts
+    assert s3_object["ETag"].strip('"').endswith("-2")
+
+
+def test_get_url(
+        image_storage_service: ImageStorageService,
+        monkeypatch: Any,
+) -> None:
+    url = image_storage_service.get_url(path="customer/1/photo")
+    assert url == "https://bucket-test.s3.us-east-1.amazonaws.com/customer/1/photo"
+
+    monkeypatch.setattr(settings, "S3_ENDPOINT_URL", "http://localhost:4566/")
+    url = image_storage_service.get_url(path="customer/1/photo")
+    assert url == "http://localhost:4566/bucket-test/customer/1/photo"
+
+
+def test_get_upload_url_ok(
+        s3_bucket: Any,
+        image_storage_service: ImageStorageService,
+) -> None:
+    url = image_storage_service.get_upload_url(path="customer/1/photo.png", content_type="image/png", expires_in=60)
+    assert image_storage_service.exists(path="customer/1/photo.png") is False
+
+    response = requests.put(url, data=b"image", headers={"Content-Type": "image/png"})
+    assert response.status_code == HTTPStatus.OK
+    assert image_storage_service.exists(path="customer/1/photo.png") is True
+    assert s3_bucket.Object("customer/1/photo.png").get()["Body"].read() == b"image"
+
+
+def test_create_derivatives_ok(
+        s3_bucket: Any,
+        image_storage_service: ImageStorageService,
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_SIZES", dict(small=100))
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "WEBP")
+    s3_bucket.put_object(Key="customer/1/photo.png", Body=photo_png, ContentType="image/png")
+
+    urls = image_storage_service.create_derivatives(path="customer/1/photo.png")
+    assert urls == dict(small="https://bucket-test.s3.us-east-1.amazonaws.com/customer/1/photo_small.webp")
+    s3_object = s3_bucket.Object("customer/1/photo_small.webp").get()
+    assert s3_object["ContentType"] == "image/webp"
+    assert s3_object["ContentLength"] < len(photo_png)
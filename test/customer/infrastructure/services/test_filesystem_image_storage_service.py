@@ -0,0 +1,142 @@
+import base64
+import io
+import os
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+
+import settings
+from customer.infrastructure.services.filesystem_image_storage_service import FileSystemImageStorageService
+from customer.infrastructure.services.filesystem_image_storage_service import get_files_directory
+
+
+@pytest.fixture
+def filesystem_image_storage_service(
+        monkeypatch: Any,
+        tmp_path: Any,
+) -> FileSystemImageStorageService:
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_URL", "/media")
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_WORKERS", 0)
+    return FileSystemImageStorageService()
+
+
+def _get_blobs(
+        tmp_path: Any,
+) -> list:
+    return [path for path in (tmp_path / "blobs").glob("*/*/*")]
+
+
+def _read(
+        path: str,
+) -> bytes:
+    with open(os.path.join(get_files_directory(), path), "rb") as file:
+        return file.read()
+
+
+def test_upload_stream_ok(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+        tmp_path: Any,
+) -> None:
+    filesystem_image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(b"image"), content_type="")
+    assert _read("customer/1/photo") == b"image"
+    assert filesystem_image_storage_service.exists(path="customer/1/photo") is True
+    assert filesystem_image_storage_service.exists(path="customer/2/photo") is False
+
+    blobs = _get_blobs(tmp_path)
+    assert len(blobs) == 1
+    # sharded by the hash
+    assert blobs[0].parent.parent.name == blobs[0].name[:2]
+    assert blobs[0].parent.name == blobs[0].name[2:4]
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_upload_ok(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+) -> None:
+    filesystem_image_storage_service.upload(path="customer/1/photo", image=base64.b64encode(b"image").decode())
+    assert _read("customer/1/photo") == b"image"
+
+
+def test_upload_base64_not_valid(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+) -> None:
+    with pytest.raises(HTTPException):
+        filesystem_image_storage_service.upload(path="customer/1/photo", image="not base64")
+
+
+def test_upload_deduplicated(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+        tmp_path: Any,
+) -> None:
+    filesystem_image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(b"image"), content_type="")
+    filesystem_image_storage_service.upload_stream(path="customer/2/photo", file=io.BytesIO(b"image"), content_type="")
+
+    blobs = _get_blobs(tmp_path)
+    assert len(blobs) == 1
+    # the blob and its 2 references
+    assert os.stat(blobs[0]).st_nlink == 3
+    assert _read("customer/2/photo") == b"image"
+
+
+def test_upload_replace_releases_blob(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+        tmp_path: Any,
+) -> None:
+    filesystem_image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(b"image"), content_type="")
+    filesystem_image_storage_service.upload_stream(path="customer/2/photo", file=io.BytesIO(b"image"), content_type="")
+
+    # still referenced by customer 2
+    filesystem_image_storage_service.upload_stream(path="customer/1/photo", file=io.BytesIO(b"new"), content_type="")
+    assert len(_get_blobs(tmp_path)) == 2
+
+    # last reference
+    filesystem_image_storage_service.upload_stream(path="customer/2/photo", file=io.BytesIO(b"new"), content_type="")
+    blobs = _get_blobs(tmp_path)
+    assert len(blobs) == 1
+    assert os.stat(blobs[0]).st_nlink == 3
+
+    # same content
+    filesystem_image_storage_service.upload_stream(path="customer/2/photo", file=io.BytesIO(b"new"), content_type="")
+    assert len(_get_blobs(tmp_path)) == 1
+    assert _read("customer/2/photo") == b"new"
+
+
+def test_upload_path_not_valid(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+) -> None:
+    with pytest.raises(HTTPException):
+        filesystem_image_storage_service.upload_stream(path="../photo", file=io.BytesIO(b"image"), content_type="")
+
+
+def test_get_url(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+) -> None:
+    assert filesystem_image_storage_service.get_url(path="customer/The Agile Monkey/photo") == \
+           "/media/customer/The%20Agile%20Monkey/photo"
+
+
+def test_get_upload_url_not_supported(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+) -> None:
+    with pytest.raises(HTTPException):
+        filesystem_image_storage_service.get_upload_url(path="customer/1/photo", content_type="", expires_in=60)
+
+
+def test_create_derivatives_ok(
+        filesystem_image_storage_service: FileSystemImageStorageService,
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_SIZES", dict(small=100))
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "WEBP")
+    filesystem_image_storage_service.upload_stream(
+        path="customer/1/photo.png",
+        file=io.BytesIO(photo_png),
+        content_type="image/png",
+    )
+
+    urls = filesystem_image_storage_service.create_derivatives(path="customer/1/photo.png")
+    assert urls == dict(small="/media/customer/1/photo_small.webp")
+    assert filesystem_image_storage_service.exists(path="customer/1/photo_small.webp") is True
@@ -0,0 +1,69 @@
+import io
+from typing import Any
+
+import pytest
+from PIL import Image
+from PIL import UnidentifiedImageError
+
+import settings
+from customer.infrastructure.services.photo_derivatives import create_derivatives
+from customer.infrastructure.services.photo_derivatives import get_derivative_path
+
+
+@pytest.fixture(autouse=True)
+def derivatives_inline(
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_WORKERS", 0)
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_SIZES", dict(small=100, big=1000))
+
+
+def test_create_derivatives_webp(
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "WEBP")
+    derivatives = create_derivatives(image=photo_png)
+    assert set(derivatives) == {"small", "big"}
+
+    with Image.open(io.BytesIO(derivatives["small"])) as small:
+        assert small.format == "WEBP"
+        assert small.size == (100, 50)
+    # never enlarged
+    with Image.open(io.BytesIO(derivatives["big"])) as big:
+        assert big.size == (800, 400)
+
+
+def test_create_derivatives_jpeg(
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "JPEG")
+    derivatives = create_derivatives(image=photo_png)
+    with Image.open(io.BytesIO(derivatives["small"])) as small:
+        assert small.format == "JPEG"
+        assert small.size == (100, 50)
+
+
+def test_create_derivatives_process_pool(
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_WORKERS", 1)
+    derivatives = create_derivatives(image=photo_png)
+    assert set(derivatives) == {"small", "big"}
+
+
+def test_create_derivatives_not_image() -> None:
+    with pytest.raises(UnidentifiedImageError):
+        create_derivatives(image=b"image")
+
+
+def test_get_derivative_path(
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "WEBP")
+    assert get_derivative_path(path="customer/1/photo.png", name="small") == "customer/1/photo_small.webp"
+    assert get_derivative_path(path="customer/1/photo", name="small") == "customer/1/photo_small.webp"
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_FORMAT", "JPEG")
+    assert get_derivative_path(path="photo.png", name="small") == "photo_small.jpg"
@@ -0,0 +1,182 @@
+from http import HTTPStatus
+from typing import Any
+from typing import Dict
+from typing import Generator
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.testclient import TestClient
+
+import messages
+import settings
+from customer.infrastructure.repositories.sqlalchemy_async_customer_repository import SQLAlchemyAsyncCustomerRepository
+from database import get_async_database_url
+from database import get_async_db
+from main import create_app
+from user.domain.user import User
+
+
+@pytest.fixture
+def async_client(
+        migrations: None,
+        monkeypatch: Any,
+) -> Generator[TestClient, Any, None]:
+    monkeypatch.setattr(settings, "ASYNC_DATABASE", True)
+    api = create_app()
+    engine = create_async_engine(get_async_database_url(), poolclass=NullPool)
+    with TestClient(api) as client:
+        # the connection is bound to the event loop of the test client, it is rolled back at the end
+        async def _begin():
+            connection = await engine.connect()
+            return connection, await connection.begin()
+
+        connection, transaction = client.portal.call(_begin)
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+
+        async def _get_test_async_db():
+            yield session
+
+        api.dependency_overrides[get_async_db] = _get_test_async_db
+        yield client
+
+        client.portal.call(session.close)
+        client.portal.call(transaction.rollback)
+        client.portal.call(connection.close)
+        client.portal.call(engine.dispose)
+
+
+def _create(
+        client: TestClient,
+        headers: Dict,
+        customer_id: str,
+) -> None:
+    response = client.post(
+        url="/customers",
+        json=dict(id=customer_id, name="name", surname="surname"),
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_customer_async_create_ok(
+        async_client: TestClient,
+        user_admin: User,
+        user_admin_headers: Dict,
+) -> None:
+    _create(async_client, headers=user_admin_headers, customer_id="The Agile Monkey")
+
+    response = async_client.get(url="/customers/The Agile Monkey", headers=user_admin_headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["name"] == "name"
+    assert response.json()["created_by_id"] == str(user_admin.id)
+
+
+def test_customer_async_create_already_exists(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+) -> None:
+    _create(async_client, headers=user_admin_headers, customer_id="The Agile Monkey")
+    response = async_client.post(
+        url="/customers",
+        json=dict(id="The Agile Monkey", name="name", surname="surname"),
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CUSTOMER_ID_ALREADY_EXISTS
+
+
+def test_customer_async_create_error(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    async def _create(*args: Any, **kwargs: Any) -> None:
+        raise OperationalError("INSERT", dict(), Exception("database unavailable"))
+
+    monkeypatch.setattr(SQLAlchemyAsyncCustomerRepository, "create", _create)
+    response = async_client.post(
+        url="/customers",
+        json=dict(id="The Agile Monkey", name="name", surname="surname"),
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CUSTOMER_CREATE_ERROR
+
+
+def test_customer_async_get_one_not_found(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+) -> None:
+    response = async_client.get(url="/customers/not_exists", headers=user_admin_headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == messages.CUSTOMER_NOT_FOUND
+
+
+def test_customer_async_get_list(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+) -> None:
+    _create(async_client, headers=user_admin_headers, customer_id="customer_1")
+    _create(async_client, headers=user_admin_headers, customer_id="customer_2")
+
+    response = async_client.get(url="/customers", headers=user_admin_headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["total"] == 2
+    assert {customer["id"] for customer in response.json()["items"]} == {"customer_1", "customer_2"}
+
+
+def test_customer_async_update(
+        async_client: TestClient,
+        user_admin: User,
+        user_admin_headers: Dict,
+) -> None:
+    _create(async_client, headers=user_admin_headers, customer_id="The Agile Monkey")
+
+    response = async_client.patch(
+        url="/customers/The Agile Monkey",
+        json=dict(name="new_name"),
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = async_client.get(url="/customers/The Agile Monkey", headers=user_admin_headers)
+    assert response.json()["name"] == "new_name"
+    assert response.json()["updated_by_id"] == str(user_admin.id)
+
+
+def test_customer_async_update_not_found(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+) -> None:
+    response = async_client.patch(
+        url="/customers/not_exists",
+        json=dict(name="new_name"),
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == messages.CUSTOMER_NOT_FOUND
+
+
+def test_customer_async_delete(
+        async_client: TestClient,
+        user_admin_headers: Dict,
+) -> None:
+    _create(async_client, headers=user_admin_headers, customer_id="The Agile Monkey")
+
+    response = async_client.delete(url="/customers/The Agile Monkey", headers=user_admin_headers)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = async_client.get(url="/customers", headers=user_admin_headers)
+    assert response.json()["total"] == 0
+    response = async_client.get(url="/customers", params=dict(only_actives=False), headers=user_admin_headers)
+    assert response.json()["total"] == 1
+
+
+def test_customer_async_not_authenticated(
+        async_client: TestClient,
+) -> None:
+    response = async_client.get(url="/customers")
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -1,12 +1,36 @@
+import csv
+import io
+import json
+import re
 from http import HTTPStatus
+from typing import Any
 from typing import Dict
 
+import pytest
+import requests
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 import messages
+import settings
 from customer.domain.customer import Customer
+from customer.domain.customer import CustomerCreate
+from customer.domain.customer import CustomerPhotoStatus
+from customer.domain.customer import RESERVED_CUSTOMER_IDS
 from customer.domain.customer_repository import CustomerRepository
+from customer.infrastructure.repositories.sqlalchemy_customer_repository import SQLAlchemyCustomerRepository
+from customer.infrastructure.views import customer_views
+from customer.photo_spool import photo_spool
+from database import get_db
+from database import get_read_db
+from depends import get_customer_repository
+from depends import get_image_storage_service
+from main import app
+from main import create_app
+from pagination import encode_cursor
+from response_cache import response_cache
 from user.domain.user import User
 from utils import assert_dicts
 
@@ -65,6 +89,42 @@ def test_customer_create_id_already_exists(
     assert response.json()["detail"] == messages.CUSTOMER_ID_ALREADY_EXISTS
 
 
+@pytest.mark.parametrize("customer_id", RESERVED_CUSTOMER_IDS)
+def test_customer_create_id_reserved(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1_headers: Dict,
+        customer_id: str,
+) -> None:
+    # GET /customers/{customer_id} would return another route
+    response = client.post(
+        url="/customers",
+        json=dict(id=customer_id, name="name", surname="surname"),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert customer_repository.count(db_session) == 0
+
+
+def test_customer_create_error(
+        client: TestClient,
+        user_1_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    def _create(*args: Any, **kwargs: Any) -> None:
+        raise OperationalError("INSERT", dict(), Exception("database unavailable"))
+
+    monkeypatch.setattr(SQLAlchemyCustomerRepository, "create", _create)
+    response = client.post(
+        url="/customers",
+        json=dict(id="The Agile Monkey", name="The agile monkey SL", surname="surname"),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CUSTOMER_CREATE_ERROR
+
+
 def test_customer_get_one_ok(
         client: TestClient,
         db_session: Session,
@@ -81,6 +141,22 @@ def test_customer_get_one_ok(
     assert_dicts(original=response.json(), expected=customer_1.__dict__)
 
 
+def test_customer_get_one_reads_primary(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+) -> None:
+    def _get_replica_db():
+        raise AssertionError("the customer is cached from a replica")
+
+    app.dependency_overrides[get_read_db] = _get_replica_db
+    try:
+        response = client.get(url=f"/customers/{customer_1.id}", headers=user_1_headers)
+    finally:
+        del app.dependency_overrides[get_read_db]
+    assert response.status_code == HTTPStatus.OK
+
+
 def test_customer_get_one_not_exists(
         client: TestClient,
         db_session: Session,
@@ -179,3 +255,666 @@ def test_customer_delete_customer_id_not_exists(
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json()["detail"] == messages.CUSTOMER_NOT_FOUND
+
+
+def test_customer_get_list_cursor_pages(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1_headers: Dict,
+        user_1: User,
+) -> None:
+    for i in range(3):
+        customer = CustomerCreate(id=f"customer_{i}", name="name", surname="surname")
+        customer_repository.create(db_session, customer=customer, current_user=user_1)
+
+    response = client.get(
+        url="/customers/cursor?size=2&include_total=true",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    page_1 = response.json()
+    assert [item["id"] for item in page_1["items"]] == ["customer_0", "customer_1"]
+    assert page_1["total"] == 3
+    assert page_1["next_cursor"] is not None
+
+    response = client.get(
+        url=f"/customers/cursor?size=2&cursor={page_1['next_cursor']}",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    page_2 = response.json()
+    assert [item["id"] for item in page_2["items"]] == ["customer_2"]
+    assert page_2["total"] is None
+    assert page_2["next_cursor"] is None
+
+
+def test_customer_get_list_cached(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_TTL_SECONDS", 5)
+    monkeypatch.setattr(response_cache, "ttl_seconds", 5)
+    response = client.get(url="/customers", headers=user_1_headers)
+    assert response.status_code == HTTPStatus.OK
+    assert [item["id"] for item in response.json()["items"]] == [customer_1.id]
+    response = client.get(url="/customers", headers=user_1_headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response_cache.stats()["hits"] == 1
+
+    # the write changes the version of the table
+    data = dict(id="new", name="name", surname="surname")
+    response = client.post(url="/customers", json=data, headers=user_1_headers)
+    assert response.status_code == HTTPStatus.CREATED
+    response = client.get(url="/customers", headers=user_1_headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["total"] == 2
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_customer_get_list_cached_from_primary(
+        client: TestClient,
+        engine: Engine,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_TTL_SECONDS", 5)
+    monkeypatch.setattr(response_cache, "ttl_seconds", 5)
+    # a replica that does not have the customer yet
+    replica_db_session = Session(bind=engine)
+    app.dependency_overrides[get_read_db] = lambda: replica_db_session
+    try:
+        response = client.get(url="/customers", headers=user_1_headers)
+        assert response.status_code == HTTPStatus.OK
+        assert [item["id"] for item in response.json()["items"]] == [customer_1.id]
+        response = client.get(url="/customers/cursor", headers=user_1_headers)
+        assert response.status_code == HTTPStatus.OK
+        assert [item["id"] for item in response.json()["items"]] == [customer_1.id]
+    finally:
+        del app.dependency_overrides[get_read_db]
+        replica_db_session.close()
+
+
+def test_customer_get_list_fast_json(
+        client: TestClient,
+        db_session: Session,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    expected_list = client.get(url="/customers", headers=user_1_headers).json()
+    expected_one = client.get(url=f"/customers/{customer_1.id}", headers=user_1_headers).json()
+
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    response_cache.clear()
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as fast_client:
+        response = fast_client.get(url="/customers", headers=user_1_headers)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == expected_list
+        response = fast_client.get(url=f"/customers/{customer_1.id}", headers=user_1_headers)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == expected_one
+
+
+@pytest.mark.parametrize("cursor", [
+    "not_valid",
+    encode_cursor("not_a_date", "customer_1"),
+    encode_cursor("2021-11-20T10:00:00", 1),
+    encode_cursor("2021-11-20T10:00:00", None),
+    encode_cursor("2021-11-20T10:00:00"),
+])
+def test_customer_get_list_cursor_not_valid(
+        client: TestClient,
+        user_1_headers: Dict,
+        cursor: str,
+) -> None:
+    response = client.get(
+        url="/customers/cursor",
+        params=dict(cursor=cursor),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CURSOR_NOT_VALID
+
+
+def test_customer_export_ndjson(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+) -> None:
+    response = client.get(
+        url="/customers/export?format=ndjson",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    assert_dicts(original=json.loads(lines[0]), expected=customer_1.__dict__)
+
+
+def test_customer_export_csv(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+) -> None:
+    response = client.get(
+        url="/customers/export?format=csv",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["id"] == customer_1.id
+    assert rows[0]["name"] == customer_1.name
+
+
+def test_customer_export_only_actives(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+) -> None:
+    client.delete(url=f"/customers/{customer_1.id}", headers=user_1_headers)
+    response = client.get(
+        url="/customers/export?only_actives=true",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.text == ""
+
+
+def test_customer_create_bulk_ok(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+) -> None:
+    data = [
+        dict(id="customer_1", name="name", surname="surname"),
+        dict(id=customer_1.id, name="name", surname="surname"),
+        dict(id="customer_1", name="name", surname="surname"),
+        dict(id="customer_2", name="name", surname="surname"),
+    ]
+    response = client.post(
+        url="/customers/bulk",
+        json=data,
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [
+        dict(id="customer_1", status="created"),
+        dict(id=customer_1.id, status="duplicate"),
+        dict(id="customer_1", status="duplicate"),
+        dict(id="customer_2", status="created"),
+    ]
+    assert customer_repository.count(db_session) == 3
+
+
+def test_customer_import_csv_ok(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        user_1: User,
+) -> None:
+    content = "\n".join([
+        "id,name,surname,photo_url",
+        "customer_1,name,surname,photo_url",
+        f"{customer_1.id},name,surname,",
+        "customer_2,,surname,",
+        "customer_3,name,surname,",
+        "export,name,surname,",
+    ])
+    response = client.post(
+        url="/customers/import",
+        files=dict(file=("customers.csv", content.encode(), "text/csv")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    expected = dict(
+        rows=5,
+        imported=2,
+        duplicates=1,
+        rejected=2,
+        rejected_rows=[dict(line=4, reason="name is empty"), dict(line=6, reason="id is reserved")],
+        seconds="*",
+        rows_per_second="*",
+    )
+    assert_dicts(original=response.json(), expected=expected)
+    assert customer_repository.count(db_session) == 3
+    assert customer_repository.get_by_id(db_session, customer_id="customer_1").created_by_id == user_1.id
+
+
+def test_customer_import_csv_not_valid(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    response = client.post(
+        url="/customers/import",
+        files=dict(file=("customers.csv", b"id,name\ncustomer_1,name", "text/csv")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CUSTOMER_IMPORT_CSV_NOT_VALID
+
+
+@pytest.mark.parametrize("content", [
+    "id,name,surname\ncustomer_1,name,surname\ncustomer_2,Mu\xf1oz,surname".encode("latin-1"),
+    "id,name,surname\ncustomer_1,name,surname\ncustomer_2,na\x00me,surname".encode(),
+    "id,name,surname\ncustomer_1,name,surname\ncustomer_2,name,{}".format("s" * 200000).encode(),
+    "id,name,surn\xe1me\ncustomer_1,name,surname".encode("latin-1"),
+], ids=["not_utf8", "nul", "field_too_large", "header_not_utf8"])
+def test_customer_import_csv_not_readable(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        user_1_headers: Dict,
+        content: bytes,
+) -> None:
+    response = client.post(
+        url="/customers/import",
+        files=dict(file=("customers.csv", content, "text/csv")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.CUSTOMER_IMPORT_CSV_NOT_VALID
+    # nothing is imported
+    assert customer_repository.count(db_session) == 0
+
+
+def test_customer_upload_photo_ok(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        photo_png: bytes,
+) -> None:
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    photo_url = response.json()["photo_url"]
+    photo_name = photo_url.rsplit("/", 1)[1]
+    assert re.fullmatch(r"photo_[0-9a-f]{32}", photo_name)
+    assert s3_bucket.Object(f"customer/{customer_1.id}/{photo_name}").get()["Body"].read() == photo_png
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == photo_url
+    # generated by the background task, before the test client returns
+    assert set(customer_db.photo_derivatives) == set(settings.PHOTO_DERIVATIVE_SIZES)
+    for name, url in customer_db.photo_derivatives.items():
+        assert url.endswith(f"/{photo_name}_{name}.webp")
+        assert s3_bucket.Object(f"customer/{customer_1.id}/{photo_name}_{name}.webp").get()["ContentType"] == \
+               "image/webp"
+
+    response = client.get(
+        url=f"/customers/{customer_1.id}",
+        headers=user_1_headers,
+    )
+    assert response.json()["photo_derivatives"] == customer_db.photo_derivatives
+
+
+def test_customer_upload_photo_overlapping(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        photo_png: bytes,
+        monkeypatch: Any,
+) -> None:
+    # the derivatives job of the first upload is late, it runs after the second upload
+    create_photo_derivatives = customer_views._create_photo_derivatives
+    late_jobs = []
+
+    def _create_photo_derivatives(**kwargs: Any) -> None:
+        if not late_jobs:
+            late_jobs.append(kwargs)
+        else:
+            create_photo_derivatives(**kwargs)
+
+    monkeypatch.setattr(customer_views, "_create_photo_derivatives", _create_photo_derivatives)
+    response_1 = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response_1.status_code == HTTPStatus.OK
+
+    response_2 = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response_2.status_code == HTTPStatus.OK
+    photo_url = response_2.json()["photo_url"]
+    assert photo_url != response_1.json()["photo_url"]
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    photo_derivatives = customer_db.photo_derivatives
+    assert photo_derivatives is not None
+
+    create_photo_derivatives(**late_jobs[0])
+
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == photo_url
+    assert customer_db.photo_derivatives == photo_derivatives
+    # the files of the second upload are not overwritten either
+    photo_name = photo_url.rsplit("/", 1)[1]
+    for name, url in photo_derivatives.items():
+        assert url.endswith(f"/{photo_name}_{name}.webp")
+
+
+def test_customer_upload_photo_derivatives_failed(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", b"image", "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == response.json()["photo_url"]
+    assert customer_db.photo_derivatives is None
+
+
+def test_customer_upload_photo_not_image(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.txt", b"text", "text/plain")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.PHOTO_NOT_VALID
+
+
+def test_customer_upload_photo_customer_not_found(
+        client: TestClient,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.put(
+        url="/customers/not_exists/photo",
+        files=dict(photo=("photo.png", b"image", "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == messages.CUSTOMER_NOT_FOUND
+
+
+def test_customer_photo_upload_url_ok(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.post(
+        url=f"/customers/{customer_1.id}/photo/upload-url",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    upload = response.json()
+    assert upload["method"] == "PUT"
+    assert upload["content_type"] == "image/png"
+
+    assert re.fullmatch(r"[0-9a-f]{32}", upload["photo_id"])
+
+    response = requests.put(upload["upload_url"], data=b"image", headers={"Content-Type": upload["content_type"]})
+    assert response.status_code == HTTPStatus.OK
+    photo_name = f"photo_{upload['photo_id']}.png"
+    assert s3_bucket.Object(f"customer/{customer_1.id}/{photo_name}").get()["Body"].read() == b"image"
+
+    response = client.post(
+        url=f"/customers/{customer_1.id}/photo/confirm",
+        params=dict(photo_id=upload["photo_id"]),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    photo_url = response.json()["photo_url"]
+    assert photo_url.endswith(f"/customer/{customer_1.id}/{photo_name}")
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    assert customer_db.photo_url == photo_url
+
+
+def test_customer_photo_upload_url_customer_not_found(
+        client: TestClient,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.post(
+        url="/customers/not_exists/photo/upload-url",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == messages.CUSTOMER_NOT_FOUND
+
+
+def test_customer_photo_confirm_not_uploaded(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    response = client.post(
+        url=f"/customers/{customer_1.id}/photo/confirm",
+        params=dict(photo_id="0" * 32),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()["detail"] == messages.PHOTO_NOT_UPLOADED
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    assert customer_db.photo_url == customer_1.photo_url
+
+
+def test_customer_photo_upload_url_overlapping(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+) -> None:
+    uploads = []
+    for content in (b"image_1", b"image_2"):
+        response = client.post(url=f"/customers/{customer_1.id}/photo/upload-url", headers=user_1_headers)
+        upload = response.json()
+        requests.put(upload["upload_url"], data=content, headers={"Content-Type": upload["content_type"]})
+        uploads.append(upload)
+    assert uploads[0]["photo_id"] != uploads[1]["photo_id"]
+
+    # every upload keeps its own photo
+    for upload, content in zip(uploads, (b"image_1", b"image_2")):
+        photo_name = f"photo_{upload['photo_id']}.png"
+        assert s3_bucket.Object(f"customer/{customer_1.id}/{photo_name}").get()["Body"].read() == content
+
+    photo_urls = []
+    for upload in uploads:
+        response = client.post(
+            url=f"/customers/{customer_1.id}/photo/confirm",
+            params=dict(photo_id=upload["photo_id"]),
+            headers=user_1_headers,
+        )
+        assert response.status_code == HTTPStatus.OK
+        photo_urls.append(response.json()["photo_url"])
+    assert photo_urls[0] != photo_urls[1]
+
+
+@pytest.mark.parametrize("photo_id", ["../../other/photo", "0" * 31, "A" * 32])
+def test_customer_photo_confirm_photo_id_not_valid(
+        client: TestClient,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        photo_id: str,
+) -> None:
+    response = client.post(
+        url=f"/customers/{customer_1.id}/photo/confirm",
+        params=dict(photo_id=photo_id),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_customer_upload_photo_filesystem(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        monkeypatch: Any,
+        tmp_path: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_BACKEND", "filesystem")
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "PHOTO_DERIVATIVE_WORKERS", 0)
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    photo_url = response.json()["photo_url"]
+    assert re.fullmatch(r"/media/customer/The%20Agile%20Monkey/photo_[0-9a-f]{32}", photo_url)
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert set(customer_db.photo_derivatives) == set(settings.PHOTO_DERIVATIVE_SIZES)
+
+    # served by the API
+    with TestClient(create_app()) as filesystem_client:
+        response = filesystem_client.get(photo_url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == photo_png
+
+    response = client.post(
+        url=f"/customers/{customer_1.id}/photo/upload-url",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.NOT_IMPLEMENTED
+    assert response.json()["detail"] == messages.IMAGE_UPLOAD_URL_NOT_SUPPORTED
+
+
+def test_customer_upload_photo_spooled(
+        client: TestClient,
+        db_session: Session,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        monkeypatch: Any,
+        tmp_path: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_SPOOL_ENABLED", True)
+    monkeypatch.setattr(photo_spool, "pending_directory", str(tmp_path / "pending"))
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json()["photo_status"] == "pending"
+    photo_url = response.json()["photo_url"]
+
+    response = client.get(
+        url=f"/customers/{customer_1.id}",
+        headers=user_1_headers,
+    )
+    assert response.json()["photo_url"] == photo_url
+    assert response.json()["photo_status"] == "pending"
+
+    photo_spool.process(db_session, get_customer_repository(), get_image_storage_service())
+    response = client.get(
+        url=f"/customers/{customer_1.id}",
+        headers=user_1_headers,
+    )
+    assert response.json()["photo_status"] is None
+    assert response.json()["photo_derivatives"] is not None
+
+
+def test_customer_upload_photo_spool_full(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        monkeypatch: Any,
+        tmp_path: Any,
+        photo_png: bytes,
+) -> None:
+    monkeypatch.setattr(settings, "PHOTO_SPOOL_ENABLED", True)
+    monkeypatch.setattr(photo_spool, "pending_directory", str(tmp_path / "pending"))
+    monkeypatch.setattr(photo_spool, "max_jobs", 0)
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == messages.PHOTO_SPOOL_FULL
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_status == CustomerPhotoStatus.failed
+
+
+def test_customer_upload_photo_spool_error(
+        client: TestClient,
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        customer_1: Customer,
+        user_1_headers: Dict,
+        s3_bucket: Any,
+        monkeypatch: Any,
+        photo_png: bytes,
+) -> None:
+    def _enqueue(**kwargs: Any) -> str:
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(settings, "PHOTO_SPOOL_ENABLED", True)
+    monkeypatch.setattr(photo_spool, "enqueue", _enqueue)
+    response = client.put(
+        url=f"/customers/{customer_1.id}/photo",
+        files=dict(photo=("photo.png", photo_png, "image/png")),
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == messages.PHOTO_SPOOL_ERROR
+
+    # not left pending without a job
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_status == CustomerPhotoStatus.failed
@@ -0,0 +1,96 @@
+import time
+from datetime import datetime
+
+from customer.customer_cache import CustomerCache
+from customer.domain.customer import Customer
+
+
+def _customer(
+        customer_id: str = "customer_1",
+) -> Customer:
+    return Customer(
+        id=customer_id,
+        name="name",
+        surname="surname",
+        dt_created=datetime.utcnow(),
+        created_by_id="6fc330b1-3d65-402c-b7a3-b5b526240505",
+    )
+
+
+def _customer_cache(
+        max_size: int = 10,
+        ttl_seconds: float = 60,
+        negative_ttl_seconds: float = 60,
+) -> CustomerCache:
+    return CustomerCache(max_size=max_size, ttl_seconds=ttl_seconds, negative_ttl_seconds=negative_ttl_seconds)
+
+
+def test_get_miss_and_hit() -> None:
+    customer_cache = _customer_cache()
+    found, customer, generation = customer_cache.get("customer_1")
+    assert found is False
+    customer_cache.put("customer_1", customer=_customer(), generation=generation)
+
+    found, customer, _ = customer_cache.get("customer_1")
+    assert found is True
+    assert customer.id == "customer_1"
+    # a copy
+    customer.name = "other"
+    assert customer_cache.get("customer_1")[1].name == "name"
+
+    stats = customer_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_get_negative() -> None:
+    customer_cache = _customer_cache()
+    _, _, generation = customer_cache.get("customer_1")
+    customer_cache.put("customer_1", customer=None, generation=generation)
+
+    assert customer_cache.get("customer_1")[:2] == (True, None)
+    assert customer_cache.stats()["negative_hits"] == 1
+
+
+def test_get_expired() -> None:
+    customer_cache = _customer_cache(ttl_seconds=0.01, negative_ttl_seconds=0)
+    customer_cache.put("customer_1", customer=_customer(), generation=0)
+    customer_cache.put("customer_2", customer=None, generation=0)
+    time.sleep(0.02)
+    assert customer_cache.get("customer_1")[0] is False
+    assert customer_cache.get("customer_2")[0] is False
+
+
+def test_put_evicts_least_recently_used() -> None:
+    customer_cache = _customer_cache(max_size=2)
+    customer_cache.put("customer_1", customer=_customer("customer_1"), generation=0)
+    customer_cache.put("customer_2", customer=_customer("customer_2"), generation=0)
+    customer_cache.get("customer_1")
+    customer_cache.put("customer_3", customer=_customer("customer_3"), generation=0)
+
+    assert customer_cache.get("customer_1")[0] is True
+    assert customer_cache.get("customer_2")[0] is False
+    assert customer_cache.stats()["evictions"] == 1
+
+
+def test_put_after_invalidation() -> None:
+    customer_cache = _customer_cache()
+    _, _, generation = customer_cache.get("customer_1")
+    # written while it was read
+    customer_cache.invalidate("customer_1")
+    customer_cache.put("customer_1", customer=_customer(), generation=generation)
+    assert customer_cache.get("customer_1")[0] is False
+
+
+def test_invalidate() -> None:
+    customer_cache = _customer_cache()
+    customer_cache.put("customer_1", customer=_customer("customer_1"), generation=0)
+    customer_cache.put("customer_2", customer=_customer("customer_2"), generation=0)
+    customer_cache.invalidate("customer_1")
+    assert customer_cache.get("customer_1")[0] is False
+    assert customer_cache.get("customer_2")[0] is True
+
+    customer_cache.invalidate_all()
+    assert customer_cache.get("customer_2")[0] is False
+    assert customer_cache.stats()["invalidations"] == 2
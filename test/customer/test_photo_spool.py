@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import time
+from typing import Any
+from typing import BinaryIO
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerPhotoStatus
+from customer.domain.customer_repository import CustomerRepository
+from customer.domain.image_storage_service import ImageStorageService
+from customer.photo_spool import PhotoSpool
+from customer.photo_spool import PhotoSpoolFull
+from user.domain.user import User
+
+
+class _UnavailableImageStorageService(ImageStorageService):
+    def __init__(self) -> None:
+        self.uploads = 0
+
+    def upload_stream(
+            self,
+            path: str,
+            file: BinaryIO,
+            content_type: str,
+    ) -> None:
+        self.uploads += 1
+        raise ConnectionError("storage unavailable")
+
+
+@pytest.fixture
+def photo_spool(
+        tmp_path: Any,
+) -> PhotoSpool:
+    return PhotoSpool(
+        path=str(tmp_path),
+        max_jobs=2,
+        max_attempts=3,
+        backoff_seconds=0,
+        backoff_max_seconds=0,
+        breaker_failures=2,
+        breaker_seconds=60,
+        claim_timeout_seconds=60,
+    )
+
+
+def _enqueue(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer: Customer,
+        user: User,
+        photo: bytes,
+) -> str:
+    path = f"customer/{customer.id}/photo_1"
+    photo_url = image_storage_service.get_url(path=path)
+    customer_repository.update_photo(
+        db_session,
+        customer_id=customer.id,
+        photo_url=photo_url,
+        photo_status=CustomerPhotoStatus.pending,
+        current_user=user,
+    )
+    photo_spool.enqueue(
+        customer_id=customer.id,
+        path=path,
+        photo_url=photo_url,
+        file=io.BytesIO(photo),
+        content_type="image/png",
+    )
+    return photo_url
+
+
+def test_process_ok(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+        photo_png: bytes,
+) -> None:
+    photo_url = _enqueue(
+        db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, photo_png,
+    )
+    assert photo_spool.stats()["pending"] == 1
+
+    stored = photo_spool.process(db_session, customer_repository, image_storage_service)
+    assert stored == 1
+    assert s3_bucket.Object(f"customer/{customer_1.id}/photo_1").get()["Body"].read() == photo_png
+    assert os.listdir(photo_spool.pending_directory) == []
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == photo_url
+    assert customer_db.photo_status is None
+    assert customer_db.photo_derivatives is not None
+    assert photo_spool.stats()["stored"] == 1
+
+
+def test_process_status_not_updated(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+        monkeypatch: Any,
+) -> None:
+    photo_url = _enqueue(
+        db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image",
+    )
+
+    def _update_photo_status(**kwargs: Any) -> bool:
+        raise OperationalError("UPDATE", dict(), Exception("database unavailable"))
+
+    with monkeypatch.context() as context:
+        context.setattr(customer_repository, "update_photo_status", _update_photo_status)
+        assert photo_spool.process(db_session, customer_repository, image_storage_service) == 0
+    # the job is kept
+    assert photo_spool.stats()["pending"] == 1
+    assert len(os.listdir(photo_spool.pending_directory)) == 2
+
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 1
+    assert os.listdir(photo_spool.pending_directory) == []
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == photo_url
+    assert customer_db.photo_status is None
+
+
+def test_process_retry_and_fail(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+) -> None:
+    _enqueue(db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image")
+    unavailable = _UnavailableImageStorageService()
+    photo_spool.breaker_failures = 10
+
+    # backoff of 0, so every attempt is due at once
+    assert photo_spool.process(db_session, customer_repository, unavailable) == 0
+    assert unavailable.uploads == 3
+    assert os.listdir(photo_spool.pending_directory) == []
+    assert len(os.listdir(photo_spool.failed_directory)) == 2
+
+    stats = photo_spool.stats()
+    assert stats["retried"] == 2
+    assert stats["failed"] == 1
+    assert stats["failed_jobs"] == 1
+
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_status == CustomerPhotoStatus.failed
+
+
+def test_process_backoff(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+) -> None:
+    _enqueue(db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image")
+    photo_spool.backoff_seconds = 10
+    photo_spool.backoff_max_seconds = 10
+    unavailable = _UnavailableImageStorageService()
+
+    photo_spool.process(db_session, customer_repository, unavailable)
+    assert unavailable.uploads == 1
+    job_name = next(name for name in os.listdir(photo_spool.pending_directory) if name.endswith(".json"))
+    with open(os.path.join(photo_spool.pending_directory, job_name)) as job_file:
+        job = json.load(job_file)
+    assert job["attempts"] == 1
+    assert time.time() + 4 < job["next_attempt_at"] <= time.time() + 10
+
+    # not due yet
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 0
+    assert photo_spool.stats()["pending"] == 1
+
+
+def test_process_circuit_breaker(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+) -> None:
+    _enqueue(db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image")
+    photo_spool.max_attempts = 10
+    unavailable = _UnavailableImageStorageService()
+
+    photo_spool.process(db_session, customer_repository, unavailable)
+    # open after 2 consecutive failures
+    assert unavailable.uploads == 2
+    assert photo_spool.stats()["breaker_open"] is True
+    assert photo_spool.stats()["breaker_opened"] == 1
+
+    # the storage is not called while it is open
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 0
+    assert photo_spool.stats()["pending"] == 1
+
+    # half open, a successful job closes it
+    photo_spool.open_until = 0
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 1
+    assert photo_spool.consecutive_failures == 0
+
+
+def test_process_photo_replaced(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+) -> None:
+    _enqueue(db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image")
+    customer_repository.update_photo(
+        db_session,
+        customer_id=customer_1.id,
+        photo_url="new_photo_url",
+        photo_status=None,
+        current_user=user_1,
+    )
+
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 1
+    customer_db = customer_repository.get_by_id(db_session, customer_id=customer_1.id)
+    db_session.refresh(customer_db)
+    assert customer_db.photo_url == "new_photo_url"
+    assert customer_db.photo_status is None
+
+
+def test_process_stale_claim(
+        db_session: Session,
+        customer_repository: CustomerRepository,
+        image_storage_service: ImageStorageService,
+        photo_spool: PhotoSpool,
+        customer_1: Customer,
+        user_1: User,
+        s3_bucket: Any,
+) -> None:
+    _enqueue(db_session, customer_repository, image_storage_service, photo_spool, customer_1, user_1, b"image")
+    job_path = next(
+        os.path.join(photo_spool.pending_directory, name)
+        for name in os.listdir(photo_spool.pending_directory)
+        if name.endswith(".json")
+    )
+    # claimed by a worker that died
+    claim_path = f"{job_path[:-len('.json')]}.claimed"
+    os.rename(job_path, claim_path)
+    os.utime(claim_path, (time.time() - 120, time.time() - 120))
+
+    assert photo_spool.process(db_session, customer_repository, image_storage_service) == 1
+
+
+def test_enqueue_full(
+        photo_spool: PhotoSpool,
+) -> None:
+    for _ in range(2):
+        photo_spool.enqueue(customer_id="1", path="photo", photo_url="url", file=io.BytesIO(b"image"), content_type="")
+    with pytest.raises(PhotoSpoolFull):
+        photo_spool.enqueue(customer_id="1", path="photo", photo_url="url", file=io.BytesIO(b"image"), content_type="")
@@ -0,0 +1,120 @@
+import json
+import queue
+import time
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+import cache_invalidation
+import settings
+from cache_invalidation import CacheInvalidationListener
+from cache_invalidation import cache_invalidation_listener
+from customer.customer_cache import customer_cache
+from customer.domain.customer import Customer
+from response_cache import response_cache
+from user import token_epochs
+from user.domain.user import User
+
+
+def test_notify_on_commit(
+        engine: Engine,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_ENABLED", True)
+    listener = CacheInvalidationListener(database_url=settings.DATABASE_URL, poll_seconds=0.1, reconnect_seconds=0.1)
+    received = queue.Queue()
+    listener.subscribe(lambda table, ids: received.put((table, ids)))
+    listener.start()
+    try:
+        for _ in range(50):
+            if listener.connected:
+                break
+            time.sleep(0.1)
+
+        with Session(bind=engine) as db_session:
+            # nothing is sent if the transaction is rolled back
+            cache_invalidation.notify(db_session, "customer", "rolled_back")
+            db_session.execute(text("SELECT 1"))
+            db_session.rollback()
+
+            cache_invalidation.notify(db_session, "customer", "customer_1", "customer_2")
+            db_session.execute(text("SELECT 1"))
+            db_session.commit()
+
+        assert received.get(timeout=5) == ("customer", ["customer_1", "customer_2"])
+        assert received.empty()
+        assert listener.stats()["received"] == 1
+    finally:
+        listener.stop()
+
+
+def test_listener_connect_url_query() -> None:
+    url = make_url(settings.DATABASE_URL)
+    # the host and the port in the query string, like the host of a unix socket
+    query = dict(url.query, application_name="cache_invalidation_test")
+    if url.host:
+        query["host"] = url.host
+    if url.port:
+        query["port"] = str(url.port)
+    database_url = url.set(host=None, port=None, query=query).render_as_string(hide_password=False)
+    listener = CacheInvalidationListener(database_url=database_url, poll_seconds=0.1, reconnect_seconds=0.1)
+
+    connection = listener._connect()
+    try:
+        assert connection.get_dsn_parameters()["application_name"] == "cache_invalidation_test"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_database()")
+            assert cursor.fetchone()[0] == url.database
+    finally:
+        connection.close()
+
+
+def test_notify_disabled(
+        db_session: Session,
+) -> None:
+    cache_invalidation.notify(db_session, "customer", "customer_1")
+    assert cache_invalidation._PENDING not in db_session.info
+
+
+def test_notify_too_many_ids(
+        db_session: Session,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_ENABLED", True)
+    cache_invalidation.notify(db_session, "customer", *(str(uuid4()) for _ in range(1000)))
+    payload = db_session.info.pop(cache_invalidation._PENDING)[0]
+    assert json.loads(payload) == dict(table="customer", ids=None)
+
+
+def test_handle_invalidates_caches(
+        user_1: User,
+) -> None:
+    _, _, generation = customer_cache.get("customer_1")
+    customer = Customer(
+        id="customer_1",
+        name="name",
+        surname="surname",
+        dt_created=datetime.utcnow(),
+        created_by_id=user_1.id,
+    )
+    customer_cache.put("customer_1", customer=customer, generation=generation)
+    token_epochs.put(user=user_1)
+    version = response_cache.backend.get_version("customer")
+
+    cache_invalidation_listener.handle(json.dumps(dict(table="customer", ids=["customer_1"])))
+    assert customer_cache.get("customer_1")[0] is False
+    assert response_cache.backend.get_version("customer") == version + 1
+
+    cache_invalidation_listener.handle(json.dumps(dict(table="user", ids=[str(user_1.id)])))
+    assert token_epochs.get(user_1.id) is None
+
+
+def test_handle_not_valid() -> None:
+    cache_invalidation_listener.clear()
+    cache_invalidation_listener.handle("not valid")
+    assert cache_invalidation_listener.stats()["invalid"] == 1
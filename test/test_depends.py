@@ -1,10 +1,27 @@
+from datetime import datetime
+from datetime import timedelta
+from http import HTTPStatus
 from typing import Any
+from typing import Dict
 from uuid import UUID
 
 import pytest
 from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
 
+import settings
+from database import get_read_db
+from depends import get_current_user
+from main import app
+from user import token_epochs
 from user.depends import str_to_uuid
+from user.domain.user import CurrentUser
+from user.domain.user import User
+from user.domain.user import UserUpdate
+from user.domain.user_repository import UserRepository
+from user.security import create_access_token
 
 
 def test_str_to_uuid_ok() -> None:
@@ -17,3 +34,72 @@ def test_str_to_uuid_error(
 ) -> None:
     with pytest.raises(HTTPException):
         str_to_uuid(uuid=uuid)
+
+
+def test_get_current_user_claims(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    token = create_access_token(user=user_1)
+    current_user = get_current_user(db_session=db_session, user_repository=user_repository, api_key=None, token=token)
+    assert current_user == CurrentUser(id=user_1.id, username=user_1.username, is_admin=False)
+    assert token_epochs.get(user_id=user_1.id).epoch == 0
+
+
+def test_get_current_user_previous_epoch(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    token = create_access_token(user=user_1)
+    get_current_user(db_session=db_session, user_repository=user_repository, api_key=None, token=token)
+    user_repository.update(db_session, user_id=user_1.id, new_info=UserUpdate(is_admin=True))
+    assert token_epochs.get(user_id=user_1.id) is None
+
+    with pytest.raises(HTTPException) as e:
+        get_current_user(db_session=db_session, user_repository=user_repository, api_key=None, token=token)
+    assert e.value.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_get_current_user_deleted(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    token = create_access_token(user=user_1)
+    user_repository.update(db_session, user_id=user_1.id, new_info=UserUpdate(dt_deleted=datetime.utcnow()))
+
+    with pytest.raises(HTTPException) as e:
+        get_current_user(db_session=db_session, user_repository=user_repository, api_key=None, token=token)
+    assert e.value.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_current_user_legacy_token(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    token = jwt.encode(dict(exp=datetime.utcnow() + timedelta(minutes=1), sub=user_1.username), settings.SECRET_KEY)
+    current_user = get_current_user(db_session=db_session, user_repository=user_repository, api_key=None, token=token)
+    assert current_user.id == user_1.id
+
+
+def test_get_current_user_reads_primary(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    def _get_replica_db():
+        raise AssertionError("the token epoch is read from a replica")
+
+    # the route writes, only get_current_user could use the read session
+    app.dependency_overrides[get_read_db] = _get_replica_db
+    try:
+        response = client.post(
+            url="/customers",
+            json=dict(id="new", name="name", surname="surname"),
+            headers=user_1_headers,
+        )
+    finally:
+        del app.dependency_overrides[get_read_db]
+    assert response.status_code == HTTPStatus.CREATED
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from fastapi_pagination import Page
+
+import settings
+from customer.domain.customer import Customer
+from customer.domain.customer import CustomerPhotoStatus
+from json_encoding import encode
+from json_encoding import get_response_class
+
+
+def _page() -> Page[Customer]:
+    customers = [
+        Customer(
+            id="naive",
+            name="name",
+            surname="surname",
+            dt_created=datetime(2021, 11, 11, 12, 34, 56, 123456),
+            created_by_id=uuid4(),
+        ),
+        Customer(
+            id="aware",
+            name="náme",
+            surname="surname",
+            photo_derivatives=dict(small="https://bucket/customer/aware/photo_small.webp"),
+            photo_status=CustomerPhotoStatus.pending,
+            dt_created=datetime(2021, 11, 11, 12, 34, 56, tzinfo=timezone(timedelta(hours=2))),
+            dt_updated=datetime(2021, 11, 12, tzinfo=timezone.utc),
+            created_by_id=uuid4(),
+            updated_by_id=uuid4(),
+        ),
+    ]
+    return Page[Customer](items=customers, total=2, page=1, size=50)
+
+
+def test_encode_fast_json(
+        monkeypatch: Any,
+) -> None:
+    page = _page()
+    expected = json.loads(encode(page))
+
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    assert json.loads(encode(page)) == expected
+    assert expected["items"][0]["dt_created"] == "2021-11-11T12:34:56.123456"
+    assert expected["items"][1]["dt_created"] == "2021-11-11T12:34:56+02:00"
+    assert expected["items"][1]["dt_updated"] == "2021-11-12T00:00:00+00:00"
+    assert expected["items"][1]["created_by_id"] == str(page.items[1].created_by_id)
+    assert expected["items"][1]["photo_status"] == "pending"
+
+
+def test_get_response_class(
+        monkeypatch: Any,
+) -> None:
+    assert get_response_class() is JSONResponse
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    assert get_response_class() is ORJSONResponse
@@ -0,0 +1,92 @@
+from typing import Any
+
+from user import login_limiter as login_limiter_module
+from user.login_limiter import LoginLimiter
+
+
+def _login_limiter() -> LoginLimiter:
+    return LoginLimiter(
+        max_failures_username=3,
+        max_failures_ip=5,
+        window_seconds=60,
+        lockout_seconds=10,
+        lockout_max_seconds=100,
+    )
+
+
+def test_check_allowed() -> None:
+    login_limiter = _login_limiter()
+    login_limiter.failure(username="monkey", ip="1.1.1.1")
+    login_limiter.failure(username="monkey", ip="1.1.1.1")
+    assert login_limiter.check(username="monkey", ip="1.1.1.1") == 0
+
+
+def test_check_username_locked() -> None:
+    login_limiter = _login_limiter()
+    for _ in range(3):
+        login_limiter.failure(username="monkey", ip="1.1.1.1")
+    assert 0 < login_limiter.check(username="monkey", ip="2.2.2.2") <= 10
+    assert login_limiter.check(username="other", ip="1.1.1.1") == 0
+    assert login_limiter.stats()["locked"] == 1
+
+
+def test_check_ip_locked() -> None:
+    login_limiter = _login_limiter()
+    for i in range(5):
+        login_limiter.failure(username=f"user_{i}", ip="1.1.1.1")
+    assert login_limiter.check(username="other", ip="1.1.1.1") > 0
+    assert login_limiter.check(username="other", ip="2.2.2.2") == 0
+
+
+def test_failure_backoff(
+        monkeypatch: Any,
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(login_limiter_module.time, "monotonic", lambda: now[0])
+    login_limiter = _login_limiter()
+    for _ in range(3):
+        login_limiter.failure(username="monkey", ip="1.1.1.1")
+    assert login_limiter.check(username="monkey", ip="2.2.2.2") == 10
+
+    now[0] += 10
+    for _ in range(3):
+        login_limiter.failure(username="monkey", ip="3.3.3.3")
+    assert login_limiter.check(username="monkey", ip="2.2.2.2") == 20
+
+
+def test_failures_out_of_window(
+        monkeypatch: Any,
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(login_limiter_module.time, "monotonic", lambda: now[0])
+    login_limiter = _login_limiter()
+    for _ in range(2):
+        login_limiter.failure(username="monkey", ip="1.1.1.1")
+    now[0] += 61
+    login_limiter.failure(username="monkey", ip="1.1.1.1")
+    assert login_limiter.check(username="monkey", ip="1.1.1.1") == 0
+
+
+def test_success_clears_username() -> None:
+    login_limiter = _login_limiter()
+    for _ in range(2):
+        login_limiter.failure(username="monkey", ip="1.1.1.1")
+    login_limiter.success(username="monkey", ip="1.1.1.1")
+    login_limiter.failure(username="monkey", ip="1.1.1.1")
+    assert login_limiter.check(username="monkey", ip="1.1.1.1") == 0
+    assert login_limiter.stats()["successes"] == 1
+    assert login_limiter.stats()["failures"] == 3
+
+
+def test_max_keys() -> None:
+    login_limiter = LoginLimiter(
+        max_failures_username=3,
+        max_failures_ip=5,
+        window_seconds=60,
+        lockout_seconds=10,
+        lockout_max_seconds=100,
+        max_keys=2,
+    )
+    login_limiter.failure(username="monkey", ip="1.1.1.1")
+    login_limiter.failure(username="other", ip="1.1.1.1")
+    assert login_limiter.stats()["keys"] == 2
@@ -9,3 +9,54 @@ def test_health(
     response = client.get("/health")
     assert response.status_code == HTTPStatus.OK
     assert response.json() == dict(status="OK")
+
+
+def test_health_pool(
+    client: TestClient,
+) -> None:
+    response = client.get("/health/pool")
+    assert response.status_code == HTTPStatus.OK
+    stats = response.json()["primary"]
+    assert stats["size"] == 5
+    assert stats["checked_out"] >= 0
+    assert stats["checkout_seconds_histogram"]["+Inf"] == stats["checkouts"]
+
+
+def test_health_login(
+    client: TestClient,
+) -> None:
+    response = client.get("/health/login")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["rejected"] == 0
+
+
+def test_health_photo_spool(
+    client: TestClient,
+) -> None:
+    response = client.get("/health/photo-spool")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["breaker_open"] is False
+
+
+def test_health_customer_cache(
+    client: TestClient,
+) -> None:
+    response = client.get("/health/customer-cache")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["size"] == 0
+
+
+def test_health_customer_single_flight(
+        client: TestClient,
+) -> None:
+    response = client.get("/health/customer-single-flight")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["coalesced"] == 0
+
+
+def test_health_response_cache(
+        client: TestClient,
+) -> None:
+    response = client.get("/health/response-cache")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["hits"] == 0
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+import pool_metrics
+import settings
+from pool_metrics import PoolMetrics
+
+
+def test_pool_metrics_observe_checkout() -> None:
+    metrics = PoolMetrics()
+    metrics.observe_checkout(0.0005)
+    metrics.observe_checkout(0.2)
+    metrics.observe_checkout(60)
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 3
+    assert snapshot["checkout_seconds_max"] == 60
+    assert snapshot["checkout_seconds_histogram"]["0.001"] == 1
+    assert snapshot["checkout_seconds_histogram"]["0.5"] == 2
+    assert snapshot["checkout_seconds_histogram"]["30"] == 2
+    assert snapshot["checkout_seconds_histogram"]["+Inf"] == 3
+
+
+def test_metered_pool_class() -> None:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=pool_metrics.metered_pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    pool_metrics.register("test", engine)
+    try:
+        with engine.connect():
+            stats = pool_metrics.snapshot()["test"]
+            assert stats["checked_out"] == 1
+            with pytest.raises(TimeoutError):
+                engine.connect()
+
+        stats = pool_metrics.snapshot()["test"]
+        assert stats["size"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["connects"] == 1
+
+        # the metrics survive the pool being recreated
+        engine.dispose()
+        assert pool_metrics.snapshot()["test"]["checkouts"] == 1
+    finally:
+        pool_metrics._engines.pop("test")
+        engine.dispose()
+
+
+def test_metered_pool_class_connect_error() -> None:
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=pool_metrics.metered_pool_class(QueuePool),
+        connect_args=dict(port=1),
+    )
+    pool_metrics.register("test", engine)
+    try:
+        with pytest.raises(OperationalError):
+            engine.connect()
+
+        # a connection error is not a timeout
+        stats = pool_metrics.snapshot()["test"]
+        assert stats["timeouts"] == 0
+        assert stats["checkouts"] == 0
+    finally:
+        pool_metrics._engines.pop("test")
+        engine.dispose()
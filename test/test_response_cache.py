@@ -0,0 +1,98 @@
+import threading
+from typing import Any
+from unittest.mock import Mock
+
+import pytest
+
+from response_cache import MemoryResponseCacheBackend
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def backend() -> MemoryResponseCacheBackend:
+    return MemoryResponseCacheBackend(max_entries=2)
+
+
+def _compute(
+        *bodies: bytes,
+) -> Mock:
+    return Mock(side_effect=[*bodies])
+
+
+def test_response_cache_hit(
+        backend: MemoryResponseCacheBackend,
+) -> None:
+    cache = ResponseCache(backend=backend, ttl_seconds=60, stale_seconds=0, refresh_workers=1)
+    compute = _compute(b"1")
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=compute) == b"1"
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=compute) == b"1"
+    assert compute.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_response_cache_invalidate(
+        backend: MemoryResponseCacheBackend,
+) -> None:
+    cache = ResponseCache(backend=backend, ttl_seconds=60, stale_seconds=0, refresh_workers=1)
+    compute = _compute(b"1", b"2")
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=compute) == b"1"
+    cache.invalidate("customer")
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=compute) == b"2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_response_cache_stale_while_revalidate(
+        backend: MemoryResponseCacheBackend,
+) -> None:
+    cache = ResponseCache(
+        backend=backend,
+        ttl_seconds=60,
+        stale_seconds=60,
+        refresh_workers=2,
+        session_factory=Mock,
+    )
+    refreshing = threading.Event()
+    release = threading.Event()
+
+    def _refresh(_: Any) -> bytes:
+        refreshing.set()
+        release.wait(5)
+        return b"2"
+
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=_compute(b"1")) == b"1"
+    cache.invalidate("customer")
+
+    # the stale page is returned while a single refresh runs
+    slow = Mock(side_effect=_refresh)
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=slow) == b"1"
+    assert refreshing.wait(5)
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=slow) == b"1"
+    release.set()
+    cache.executor.shutdown(wait=True)
+    assert slow.call_count == 1
+
+    assert cache.get_or_compute("customer", "list", db_session=Mock(), compute=slow) == b"2"
+    assert cache.stats()["stale_hits"] == 2
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_memory_backend_lru(
+        backend: MemoryResponseCacheBackend,
+) -> None:
+    backend.set("a", b"a", expire_seconds=60)
+    backend.set("b", b"b", expire_seconds=60)
+    assert backend.get("a") == b"a"
+    backend.set("c", b"c", expire_seconds=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"a"
+    assert backend.get("c") == b"c"
+
+
+def test_memory_backend_lock(
+        backend: MemoryResponseCacheBackend,
+) -> None:
+    assert backend.lock("a", expire_seconds=60) is True
+    assert backend.lock("a", expire_seconds=60) is False
+    backend.unlock("a")
+    assert backend.lock("a", expire_seconds=0) is True
+    assert backend.lock("a", expire_seconds=60) is True
@@ -1,10 +1,23 @@
+import threading
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+import settings
+from user import security
+from user.domain.user import User
 from user.security import create_access_token
+from user.security import PasswordHasherBusy
 from user.security import get_password_hash
+from user.security import get_password_hashes
 from user.security import verify_password
 
 
 def test_create_access_token() -> None:
-    token = create_access_token(username="monkey")
+    user = User(id=uuid4(), username="monkey", password="password", dt_created=datetime.utcnow())
+    token = create_access_token(user=user)
     assert token.startswith("eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9")
 
 
@@ -18,3 +31,68 @@ def test_verify_password_error() -> None:
     plain_password = "test"
     hashed_password = get_password_hash(password=plain_password)
     assert verify_password(plain_password=f"no{plain_password}", hashed_password=hashed_password) is False
+
+
+def test_password_hasher_inline(
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "PASSWORD_HASHER_WORKERS", 0)
+    hashed_password = get_password_hash(password="test")
+    assert verify_password(plain_password="test", hashed_password=hashed_password) is True
+
+
+def test_password_hasher_busy(
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(security, "_slots", threading.BoundedSemaphore(1))
+    security._slots.acquire()
+    with pytest.raises(PasswordHasherBusy):
+        get_password_hash(password="test")
+
+
+def test_get_password_hashes() -> None:
+    passwords = ["password_1", "password_2", "password_3"]
+    hashed_passwords = get_password_hashes(passwords=passwords)
+    assert len(hashed_passwords) == 3
+    for plain_password, hashed_password in zip(passwords, hashed_passwords):
+        assert verify_password(plain_password=plain_password, hashed_password=hashed_password) is True
+
+
+def test_get_password_hashes_bounded(
+        monkeypatch: Any,
+) -> None:
+    executor = security._get_executor()
+    lock = threading.Lock()
+    outstanding = [0, 0]
+
+    def _done(_: Any) -> None:
+        with lock:
+            outstanding[0] -= 1
+
+    class _Executor:
+        def submit(self, *args: Any) -> Any:
+            with lock:
+                outstanding[0] += 1
+                outstanding[1] = max(outstanding)
+            future = executor.submit(*args)
+            future.add_done_callback(_done)
+            return future
+
+    monkeypatch.setattr(settings, "PASSWORD_HASHER_WORKERS", 1)
+    monkeypatch.setattr(security, "_get_executor", _Executor)
+    monkeypatch.setattr(security, "_slots", threading.BoundedSemaphore(2))
+    hashed_passwords = get_password_hashes(passwords=["password_1", "password_2", "password_3", "password_4"])
+    assert len(hashed_passwords) == 4
+    assert verify_password(plain_password="password_4", hashed_password=hashed_passwords[3]) is True
+    # never more calls of the batch queued than workers, and every slot is released
+    assert outstanding[1] == 1
+    assert security._slots.acquire(blocking=False) and security._slots.acquire(blocking=False)
+
+
+def test_get_password_hashes_busy(
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(security, "_slots", threading.BoundedSemaphore(1))
+    security._slots.acquire()
+    with pytest.raises(PasswordHasherBusy):
+        get_password_hashes(passwords=["password_1", "password_2"])
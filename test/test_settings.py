@@ -0,0 +1,44 @@
+import importlib
+from typing import Any
+from typing import Dict
+
+import pytest
+
+import settings
+
+
+@pytest.fixture
+def reload_settings(
+        monkeypatch: Any,
+) -> Any:
+    def _reload(**env: str) -> Dict[str, Any]:
+        # the settings are read at import, the module is reloaded with the environment and restored afterwards
+        with monkeypatch.context() as context:
+            for name in ("CACHE_INVALIDATION_ENABLED", "CUSTOMER_CACHE_SIZE", "RESPONSE_CACHE_BACKEND",
+                         "RESPONSE_CACHE_TTL_SECONDS"):
+                context.delenv(name, raising=False)
+            for name, value in env.items():
+                context.setenv(name, value)
+            importlib.reload(settings)
+            return dict(vars(settings))
+
+    yield _reload
+    importlib.reload(settings)
+
+
+def test_customer_cache_disabled_without_invalidation(
+        reload_settings: Any,
+) -> None:
+    assert reload_settings()["CUSTOMER_CACHE_SIZE"] == 0
+    assert reload_settings(CACHE_INVALIDATION_ENABLED="true")["CUSTOMER_CACHE_SIZE"] == 10000
+    assert reload_settings(CUSTOMER_CACHE_SIZE="100")["CUSTOMER_CACHE_SIZE"] == 100
+
+
+def test_response_cache_disabled_without_invalidation(
+        reload_settings: Any,
+) -> None:
+    assert reload_settings()["RESPONSE_CACHE_TTL_SECONDS"] == 0
+    assert reload_settings(CACHE_INVALIDATION_ENABLED="true")["RESPONSE_CACHE_TTL_SECONDS"] == 5
+    # shared by all the workers
+    assert reload_settings(RESPONSE_CACHE_BACKEND="redis")["RESPONSE_CACHE_TTL_SECONDS"] == 5
+    assert reload_settings(RESPONSE_CACHE_TTL_SECONDS="10")["RESPONSE_CACHE_TTL_SECONDS"] == 10
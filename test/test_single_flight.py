@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_do_coalesces() -> None:
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _function() -> str:
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(single_flight.do, "key", _function)
+        assert started.wait(5)
+        followers = [executor.submit(single_flight.do, "key", _function) for _ in range(3)]
+        while single_flight.stats()["coalesced"] < 3:
+            release.wait(0.01)
+        release.set()
+        assert leader.result() == "result"
+        assert [follower.result() for follower in followers] == ["result"] * 3
+
+    assert len(calls) == 1
+    assert single_flight.stats() == dict(executions=1, coalesced=3, errors=0, in_flight=0)
+
+
+def test_do_error() -> None:
+    single_flight = SingleFlight()
+
+    def _function() -> str:
+        raise ValueError("error")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", _function)
+    # the key is released
+    assert single_flight.do("key", lambda: "result") == "result"
+    assert single_flight.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_do_async_coalesces() -> None:
+    single_flight = SingleFlight()
+    calls = []
+
+    async def _function() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(single_flight.do_async("key", _function) for _ in range(4)))
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert single_flight.stats()["coalesced"] == 3
+
+
+@pytest.mark.asyncio
+async def test_do_async_leader_cancelled() -> None:
+    single_flight = SingleFlight()
+    calls = []
+
+    async def _function() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    leader = asyncio.ensure_future(single_flight.do_async("key", _function))
+    await asyncio.sleep(0)
+    followers = [asyncio.ensure_future(single_flight.do_async("key", _function)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    # one of the followers takes over, the others wait for it
+    assert await asyncio.gather(*followers) == ["result"] * 3
+    assert leader.cancelled()
+    assert len(calls) == 2
+    assert single_flight.stats()["in_flight"] == 0
@@ -0,0 +1,77 @@
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from user.domain.api_key_repository import ApiKeyRepository
+from user.domain.user import User
+from utils import assert_dicts
+from utils import assert_lists
+
+
+def test_create_ok(
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+        user_1: User,
+) -> None:
+    api_key = api_key_repository.create(
+        db_session,
+        user_id=user_1.id,
+        name="service",
+        prefix="crm_000000000001",
+        key_hash="hash",
+    )
+
+    api_key_db = api_key_repository.get_by_prefix(db_session, prefix="crm_000000000001")
+    expected = dict(
+        id=api_key.id,
+        user_id=user_1.id,
+        name="service",
+        prefix="crm_000000000001",
+        key_hash="hash",
+        dt_created="*",
+        dt_revoked=None,
+    )
+    assert_dicts(original=api_key_db.__dict__, expected=expected)
+    assert api_key_db.user.username == user_1.username
+
+
+def test_get_by_prefix_not_exists(
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+) -> None:
+    assert api_key_repository.get_by_prefix(db_session, prefix="crm_000000000001") is None
+
+
+def test_get_list(
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+        user_admin: User,
+        user_1: User,
+) -> None:
+    api_key_1 = api_key_repository.create(db_session, user_id=user_1.id, name="1", prefix="crm_1", key_hash="1")
+    api_key_2 = api_key_repository.create(db_session, user_id=user_1.id, name="2", prefix="crm_2", key_hash="2")
+    api_key_repository.create(db_session, user_id=user_admin.id, name="3", prefix="crm_3", key_hash="3")
+
+    api_keys = api_key_repository.get_list(db_session, user_id=user_1.id)
+    assert_lists(original=[x.__dict__ for x in api_keys], expected=[api_key_1.__dict__, api_key_2.__dict__])
+
+
+def test_revoke_ok(
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+        user_1: User,
+) -> None:
+    api_key = api_key_repository.create(db_session, user_id=user_1.id, name="1", prefix="crm_1", key_hash="1")
+    assert api_key_repository.revoke(db_session, api_key_id=api_key.id, user_id=user_1.id) is True
+    assert api_key_repository.get_by_prefix(db_session, prefix="crm_1").dt_revoked is not None
+
+
+def test_revoke_other_user(
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+        user_admin: User,
+        user_1: User,
+) -> None:
+    api_key = api_key_repository.create(db_session, user_id=user_1.id, name="1", prefix="crm_1", key_hash="1")
+    assert api_key_repository.revoke(db_session, api_key_id=api_key.id, user_id=user_admin.id) is False
+    assert api_key_repository.revoke(db_session, api_key_id=uuid4(), user_id=user_1.id) is False
@@ -0,0 +1,21 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.domain.async_user_repository import AsyncUserRepository
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_by_username_ok(
+        async_db_session: AsyncSession,
+        async_user_repository: AsyncUserRepository,
+) -> None:
+    user = await async_user_repository.get_by_username(async_db_session, username="admin")
+    assert user.is_admin is True
+
+
+async def test_get_by_username_not_exists(
+        async_db_session: AsyncSession,
+        async_user_repository: AsyncUserRepository,
+) -> None:
+    assert await async_user_repository.get_by_username(async_db_session, username="non exists") is None
@@ -0,0 +1,107 @@
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from user.domain.refresh_token_repository import RefreshTokenRepository
+from user.domain.user import User
+from utils import assert_dicts
+
+
+def test_create_ok(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+        user_1: User,
+) -> None:
+    token_id = uuid4()
+    refresh_token_repository.create(db_session, token_id=token_id, user_id=user_1.id, token_hash="hash")
+
+    refresh_token_db = refresh_token_repository.get_by_id(db_session, token_id=token_id)
+    expected = dict(
+        id=token_id,
+        family_id=token_id,
+        user_id=user_1.id,
+        token_hash="hash",
+        dt_created="*",
+        dt_expires="*",
+        dt_used=None,
+        dt_revoked=None,
+    )
+    assert_dicts(original=refresh_token_db.__dict__, expected=expected)
+    assert refresh_token_db.dt_expires > refresh_token_db.dt_created
+
+
+def test_get_by_id_not_exists(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+) -> None:
+    assert refresh_token_repository.get_by_id(db_session, token_id=uuid4()) is None
+
+
+def test_rotate_ok(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+        user_1: User,
+) -> None:
+    refresh_token = refresh_token_repository.create(db_session, token_id=uuid4(), user_id=user_1.id, token_hash="1")
+    new_refresh_token = refresh_token_repository.rotate(
+        db_session,
+        refresh_token=refresh_token,
+        new_token_id=uuid4(),
+        new_token_hash="2",
+    )
+    assert new_refresh_token.family_id == refresh_token.family_id
+    assert new_refresh_token.user_id == user_1.id
+    assert refresh_token_repository.get_by_id(db_session, token_id=refresh_token.id).dt_used is not None
+
+
+def test_rotate_already_used(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+        user_1: User,
+) -> None:
+    refresh_token = refresh_token_repository.create(db_session, token_id=uuid4(), user_id=user_1.id, token_hash="1")
+    refresh_token_repository.rotate(db_session, refresh_token=refresh_token, new_token_id=uuid4(), new_token_hash="2")
+    new_refresh_token = refresh_token_repository.rotate(
+        db_session,
+        refresh_token=refresh_token,
+        new_token_id=uuid4(),
+        new_token_hash="3",
+    )
+    assert new_refresh_token is None
+
+
+def test_revoke_family(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+        user_1: User,
+) -> None:
+    refresh_token = refresh_token_repository.create(db_session, token_id=uuid4(), user_id=user_1.id, token_hash="1")
+    new_refresh_token = refresh_token_repository.rotate(
+        db_session,
+        refresh_token=refresh_token,
+        new_token_id=uuid4(),
+        new_token_hash="2",
+    )
+    other_refresh_token = refresh_token_repository.create(
+        db_session,
+        token_id=uuid4(),
+        user_id=user_1.id,
+        token_hash="3",
+    )
+    refresh_token_repository.revoke_family(db_session, family_id=refresh_token.family_id)
+
+    assert refresh_token_repository.get_by_id(db_session, token_id=new_refresh_token.id).dt_revoked is not None
+    assert refresh_token_repository.get_by_id(db_session, token_id=other_refresh_token.id).dt_revoked is None
+
+
+def test_revoke_all(
+        db_session: Session,
+        refresh_token_repository: RefreshTokenRepository,
+        user_1: User,
+) -> None:
+    refresh_token_1 = refresh_token_repository.create(db_session, token_id=uuid4(), user_id=user_1.id, token_hash="1")
+    refresh_token_2 = refresh_token_repository.create(db_session, token_id=uuid4(), user_id=user_1.id, token_hash="2")
+    refresh_token_repository.revoke_all(db_session, user_id=user_1.id)
+
+    assert refresh_token_repository.get_by_id(db_session, token_id=refresh_token_1.id).dt_revoked is not None
+    assert refresh_token_repository.get_by_id(db_session, token_id=refresh_token_2.id).dt_revoked is not None
@@ -1,4 +1,5 @@
 from datetime import datetime
+from uuid import uuid4
 
 from sqlalchemy.orm import Session
 
@@ -42,6 +43,37 @@ def test_create_ok(
     assert_dicts(original=user_db.__dict__, expected=expected)
 
 
+def test_create_many_ok(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    users = [
+        UserCreate(username="monkey_1", password="password"),
+        UserCreate(username=user_1.username, password="password"),
+        UserCreate(username="monkey_2", password="password", is_admin=True),
+    ]
+    count_1 = user_repository.count(db_session)
+    created = user_repository.create_many(db_session, users=users)
+    count_2 = user_repository.count(db_session)
+
+    assert count_1 + 2 == count_2
+    assert set(created.keys()) == {"monkey_1", "monkey_2"}
+    user_db = user_repository.get_by_id(db_session, user_id=created["monkey_2"])
+    assert user_db.username == "monkey_2"
+    assert user_db.is_admin is True
+
+
+def test_get_usernames(
+        db_session: Session,
+        user_repository: UserRepository,
+        user_admin: User,
+        user_1: User,
+) -> None:
+    usernames = user_repository.get_usernames(db_session, usernames=[user_1.username, "not_exists"])
+    assert usernames == {user_1.username}
+
+
 def test_update_ok(
         db_session: Session,
         user_repository: UserRepository,
@@ -53,7 +85,7 @@ def test_update_ok(
         is_admin=not user_1.is_admin,
         dt_deleted=datetime.utcnow(),
     )
-    user_repository.update(db_session, user_id=user_1.id, new_info=new_info)
+    assert user_repository.update(db_session, user_id=user_1.id, new_info=new_info) is True
 
     user_db = user_repository.get_by_id(db_session, user_id=user_1.id)
     expected = new_info.dict()
@@ -61,6 +93,13 @@ def test_update_ok(
     assert_dicts(original=user_db.__dict__, expected=expected)
 
 
+def test_update_not_exists(
+        db_session: Session,
+        user_repository: UserRepository,
+) -> None:
+    assert user_repository.update(db_session, user_id=uuid4(), new_info=UserUpdate(is_admin=True)) is False
+
+
 def test_get_by_username_ok(
         db_session: Session,
         user_repository: UserRepository,
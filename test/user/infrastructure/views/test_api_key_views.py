@@ -0,0 +1,169 @@
+from http import HTTPStatus
+from typing import Dict
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
+
+import messages
+from user.domain.api_key_repository import ApiKeyRepository
+from user.domain.user import User
+from user.domain.user import UserUpdate
+from user.domain.user_repository import UserRepository
+from utils import assert_dicts
+
+
+def _create_api_key(
+        client: TestClient,
+        headers: Dict,
+) -> Dict:
+    response = client.post(
+        url="/api-keys",
+        json=dict(name="service"),
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()
+
+
+def test_api_key_create_ok(
+        client: TestClient,
+        user_1_headers: Dict,
+        db_session: Session,
+        api_key_repository: ApiKeyRepository,
+        user_1: User,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    expected = dict(
+        id="*",
+        name="service",
+        prefix="*",
+        dt_created="*",
+        dt_revoked=None,
+        key="*",
+    )
+    assert_dicts(original=api_key, expected=expected)
+    assert api_key["key"].startswith(f"{api_key['prefix']}.")
+
+    api_key_db = api_key_repository.get_by_prefix(db_session, prefix=api_key["prefix"])
+    assert api_key_db.user_id == user_1.id
+    assert api_key["key"] not in api_key_db.key_hash
+
+
+def test_api_key_get_list(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    response = client.get(
+        url="/api-keys",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 1
+    assert response.json()[0]["prefix"] == api_key["prefix"]
+    assert "key" not in response.json()[0]
+
+
+@pytest.mark.parametrize("header", ["X-API-Key", "Authorization"])
+def test_api_key_authenticate(
+        client: TestClient,
+        user_1_headers: Dict,
+        header: str,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    value = api_key["key"] if header == "X-API-Key" else f"Bearer {api_key['key']}"
+    response = client.get(
+        url="/customers",
+        headers={header: value},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize("key", ["crm_not_valid", "crm_000000000000.secret", "not_an_api_key"])
+def test_api_key_authenticate_not_valid(
+        client: TestClient,
+        key: str,
+) -> None:
+    response = client.get(
+        url="/customers",
+        headers={"X-API-Key": key},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()["detail"] == messages.USER_NOT_CREDENTIALS
+
+
+def test_api_key_authenticate_wrong_secret(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    response = client.get(
+        url="/customers",
+        headers={"X-API-Key": f"{api_key['key']}x"},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_api_key_authenticate_user_deleted(
+        client: TestClient,
+        user_1_headers: Dict,
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    user_repository.update(db_session, user_id=user_1.id, new_info=UserUpdate(is_admin=True))
+    response = client.get(
+        url="/users",
+        headers={"X-API-Key": api_key["key"]},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    user_repository.update(db_session, user_id=user_1.id, new_info=UserUpdate(dt_deleted="2021-11-11T12:34:56"))
+    response = client.get(
+        url="/customers",
+        headers={"X-API-Key": api_key["key"]},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_not_authenticated(
+        client: TestClient,
+) -> None:
+    response = client.get(
+        url="/customers",
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()["detail"] == messages.USER_NOT_AUTHENTICATED
+
+
+def test_api_key_delete_ok(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    api_key = _create_api_key(client=client, headers=user_1_headers)
+    response = client.delete(
+        url=f"/api-keys/{api_key['id']}",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    response = client.get(
+        url="/customers",
+        headers={"X-API-Key": api_key["key"]},
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_api_key_delete_not_exists(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    response = client.delete(
+        url=f"/api-keys/{uuid4()}",
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == messages.API_KEY_NOT_FOUND
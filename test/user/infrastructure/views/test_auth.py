@@ -1,9 +1,19 @@
+import threading
 from http import HTTPStatus
+from typing import Any
+from typing import Dict
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 from starlette.testclient import TestClient
 
 import messages
+from user import security
 from user.domain.user import User
+from user.login_limiter import login_limiter
 from user.security import create_access_token
 from utils import assert_dicts
 
@@ -22,7 +32,7 @@ def test_generate_token_ok(
     )
     assert response.status_code == HTTPStatus.OK
     expected = dict(
-        access_token=create_access_token(username=user_1.username),
+        access_token=create_access_token(user=user_1),
         token_type="bearer",
     )
     assert_dicts(original=response.json(), expected=expected)
@@ -57,3 +67,181 @@ def test_generate_token_password_not_correct(
     )
     assert response.status_code == HTTPStatus.BAD_REQUEST
     assert response.json()['detail'] == messages.USER_INCORRECT_USERNAME_PASSWORD
+
+
+def test_generate_token_password_hasher_busy(
+        client: TestClient,
+        user_1: User,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(security, "_slots", threading.BoundedSemaphore(1))
+    security._slots.acquire()
+    data = dict(
+        username=user_1.username,
+        password="password",
+    )
+    response = client.post(
+        url="/auth/token",
+        json=data,
+    )
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()["detail"] == messages.PASSWORD_HASHER_BUSY
+    assert response.headers["Retry-After"] == "1"
+
+
+def _login(
+        client: TestClient,
+        user: User,
+) -> str:
+    response = client.post(
+        url="/auth/token",
+        json=dict(username=user.username, password="password"),
+    )
+    assert response.status_code == HTTPStatus.OK
+    return response.json()["refresh_token"]
+
+
+def test_refresh_ok(
+        client: TestClient,
+        user_1: User,
+) -> None:
+    refresh_token = _login(client=client, user=user_1)
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    assert response.status_code == HTTPStatus.OK
+    expected = dict(
+        access_token="*",
+        token_type="bearer",
+        refresh_token="*",
+    )
+    assert_dicts(original=response.json(), expected=expected)
+    assert response.json()["refresh_token"] != refresh_token
+
+    response = client.get(
+        url="/customers",
+        headers=dict(Authorization=f"Bearer {response.json()['access_token']}"),
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_refresh_reused(
+        client: TestClient,
+        user_1: User,
+) -> None:
+    refresh_token = _login(client=client, user=user_1)
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    new_refresh_token = response.json()["refresh_token"]
+
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()["detail"] == messages.REFRESH_TOKEN_NOT_VALID
+
+    # the whole family is revoked
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=new_refresh_token),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.parametrize("refresh_token", ["not_valid", f"{uuid4()}.secret", "not_uuid.secret"])
+def test_refresh_not_valid(
+        client: TestClient,
+        refresh_token: str,
+) -> None:
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()["detail"] == messages.REFRESH_TOKEN_NOT_VALID
+
+
+@pytest.mark.parametrize("time_zone", ["UTC", "Asia/Tokyo", "America/New_York"])
+def test_refresh_expired(
+        client: TestClient,
+        db_session: Session,
+        user_1: User,
+        time_zone: str,
+) -> None:
+    refresh_token = _login(client=client, user=user_1)
+    token_id = refresh_token.split(".")[0]
+    db_session.execute(
+        text("UPDATE refresh_token SET dt_expires = now() - interval '1 minute' WHERE id = :id"),
+        dict(id=token_id),
+    )
+    # the expiry does not depend on the timezone of the database session
+    db_session.execute(text(f"SET TIME ZONE '{time_zone}'"))
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()["detail"] == messages.REFRESH_TOKEN_NOT_VALID
+
+
+def test_refresh_wrong_secret(
+        client: TestClient,
+        user_1: User,
+) -> None:
+    refresh_token = _login(client=client, user=user_1)
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=f"{refresh_token}x"),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_refresh_user_password_changed(
+        client: TestClient,
+        user_admin_headers: Dict,
+        user_1: User,
+) -> None:
+    refresh_token = _login(client=client, user=user_1)
+    client.patch(
+        url=f"/users/{user_1.id}",
+        json=dict(password="new_password"),
+        headers=user_admin_headers,
+    )
+    response = client.post(
+        url="/auth/refresh",
+        json=dict(refresh_token=refresh_token),
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_generate_token_too_many_attempts(
+        client: TestClient,
+        user_1: User,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(login_limiter, "max_failures", dict(username=2, ip=10))
+    data = dict(
+        username=user_1.username,
+        password="wrong_password",
+    )
+    for _ in range(2):
+        response = client.post(
+            url="/auth/token",
+            json=data,
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    # rejected even with the right password, without checking it
+    monkeypatch.setattr(security, "_verify", None)
+    data["password"] = "password"
+    response = client.post(
+        url="/auth/token",
+        json=data,
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json()["detail"] == messages.LOGIN_TOO_MANY_ATTEMPTS
+    assert int(response.headers["Retry-After"]) > 0
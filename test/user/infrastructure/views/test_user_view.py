@@ -1,5 +1,6 @@
 from datetime import datetime
 from http import HTTPStatus
+from typing import Any
 from typing import Dict
 from uuid import uuid4
 
@@ -7,10 +8,13 @@ from sqlalchemy.orm import Session
 from starlette.testclient import TestClient
 
 import messages
+import settings
 from user.domain.user import User
 from user.domain.user import UserUpdate
 from user.domain.user_repository import UserRepository
+from user.security import verify_password
 from utils import assert_dicts
+from utils import assert_lists
 
 
 def test_user_create_ok(
@@ -76,6 +80,70 @@ def test_user_create_without_permissions(
     assert response.json()["detail"] == messages.USER_NOT_PERMISSION
 
 
+def test_user_create_bulk_ok(
+        client: TestClient,
+        user_admin_headers: Dict,
+        db_session: Session,
+        user_repository: UserRepository,
+        user_1: User,
+) -> None:
+    count_1 = user_repository.count(db_session)
+    data = [
+        dict(username="monkey_1", password="password", is_admin=False),
+        dict(username=user_1.username, password="password", is_admin=False),
+        dict(username="monkey_1", password="password", is_admin=False),
+        dict(username="monkey_2", password="password", is_admin=True),
+    ]
+    response = client.post(
+        url="/users/bulk",
+        json=data,
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    expected = [
+        dict(username="monkey_1", id="*", status="created"),
+        dict(username=user_1.username, id=None, status="duplicate"),
+        dict(username="monkey_1", id=None, status="duplicate"),
+        dict(username="monkey_2", id="*", status="created"),
+    ]
+    assert_lists(original=response.json(), expected=expected)
+    count_2 = user_repository.count(db_session)
+    assert count_1 + 2 == count_2
+
+    user_db = user_repository.get_by_username(db_session, username="monkey_2")
+    assert str(user_db.id) == response.json()[3]["id"]
+    assert user_db.is_admin is True
+    assert verify_password(plain_password="password", hashed_password=user_db.password) is True
+
+
+def test_user_create_bulk_too_large(
+        client: TestClient,
+        user_admin_headers: Dict,
+        monkeypatch: Any,
+) -> None:
+    monkeypatch.setattr(settings, "USER_BULK_MAX_SIZE", 1)
+    response = client.post(
+        url="/users/bulk",
+        json=[dict(username="monkey_1", password="password"), dict(username="monkey_2", password="password")],
+        headers=user_admin_headers,
+    )
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == messages.USER_BULK_TOO_LARGE
+
+
+def test_user_create_bulk_without_permissions(
+        client: TestClient,
+        user_1_headers: Dict,
+) -> None:
+    response = client.post(
+        url="/users/bulk",
+        json=[dict(username="monkey", password="password")],
+        headers=user_1_headers,
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json()["detail"] == messages.USER_NOT_PERMISSION
+
+
 def test_user_get_list_only_users(
         client: TestClient,
         user_admin_headers: Dict,
@@ -91,6 +159,7 @@ def test_user_get_list_only_users(
     items = [user_1.__dict__]
     items[0]["dt_created"] = "*"
     items[0].pop("password")
+    items[0].pop("token_epoch")
     expected = dict(
         items=items,
         page=1,
@@ -117,6 +186,7 @@ def test_user_get_list_only_actives(
     items = [user_admin.__dict__]
     items[0]["dt_created"] = "*"
     items[0].pop("password")
+    items[0].pop("token_epoch")
     expected = dict(
         items=items,
         page=1,
@@ -143,6 +213,7 @@ def test_user_get_list_all(
     for item in items:
         item["dt_created"] = "*"
         item.pop("password")
+        item.pop("token_epoch")
     expected = dict(
         items=items,
         page=1,